@@ -0,0 +1,227 @@
+# AgroVistaar/metrics.py
+"""
+In-process metrics, served at /metrics in the Prometheus text format.
+
+``MetricsMiddleware`` (AgroVistaar.middleware) times every request by URL
+name. Model inference, Gemini and OpenWeather calls are timed where they
+happen with ``timed``, and every DB query goes through ``db_query_timer``,
+which is installed on each new connection. Recording is a bisect and a
+locked add, so the hot path pays about a microsecond per observation.
+Components that keep their own counters (LLM cache, FAQ index, weather
+cache, upstream guards...) are read through ``Stats`` each time /metrics
+is scraped.
+
+Values live in the process that recorded them: with several workers, each
+one has to be scraped on its own (or run a single worker per port).
+"""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+MIDDLEWARE_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.005, 0.025)
+QUERY_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1.0)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+_metrics = []
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values, extra=()) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)] + list(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class _Family:
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} {self.type}"
+        yield from self.lines()
+
+
+class Counter(_Family):
+    type = 'counter'
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        _metrics.append(self)
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def lines(self):
+        with self._lock:
+            values = dict(self._values)
+        for labels, value in sorted(values.items()):
+            yield f"{self.name}{_labels(self.labelnames, labels)} {value}"
+
+
+class Histogram(_Family):
+    type = 'histogram'
+
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}  # labels -> [per-bucket counts (+Inf last), sum]
+        self._lock = threading.Lock()
+        _metrics.append(self)
+
+    def observe(self, value, *labels):
+        index = bisect.bisect_left(self.buckets, value)  # buckets are "less than or equal"
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][index] += 1
+            state[1] += value
+
+    def lines(self):
+        with self._lock:
+            values = {labels: (list(counts), total) for labels, (counts, total) in self._values.items()}
+        for labels, (counts, total) in sorted(values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += count
+                le = 'le="%s"' % bound
+                yield f"{self.name}_bucket{_labels(self.labelnames, labels, [le])} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.labelnames, labels)} {total}"
+            yield f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}"
+
+
+class Stats:
+    """
+    Gauges read from a component's own stats when /metrics is scraped.
+
+    ``collect`` returns {label values: {field: value}}; each numeric field is
+    exposed as ``<name>_<field>``. Running totals are snapshots of the
+    component's counters, so they are gauges here too.
+    """
+    type = 'gauge'
+
+    def __init__(self, name, help, collect, labelnames=()):
+        self.name = name
+        self.help = help
+        self.collect = collect
+        self.labelnames = tuple(labelnames)
+        _metrics.append(self)
+
+    def render(self):
+        try:
+            groups = self.collect()
+        except Exception as e:  # a broken component must not take /metrics down
+            print(f"Metrics collection failed for {self.name}: {e}")
+            return
+        families = {}
+        for labels, fields in sorted(groups.items()):
+            for field, value in fields.items():
+                if isinstance(value, (bool, int, float)):
+                    value = int(value) if isinstance(value, bool) else value
+                    families.setdefault(field, []).append(
+                        f"{self.name}_{field}{_labels(self.labelnames, labels)} {value}")
+        for field, lines in families.items():
+            yield f"# HELP {self.name}_{field} {self.help}"
+            yield f"# TYPE {self.name}_{field} {self.type}"
+            yield from lines
+
+
+@contextmanager
+def timed(histogram, *labels):
+    """Observe the block's duration with an extra ``outcome`` label of 'ok' or 'error'."""
+    start = time.perf_counter()
+    outcome = 'error'
+    try:
+        yield
+        outcome = 'ok'
+    finally:
+        histogram.observe(time.perf_counter() - start, *labels, outcome)
+
+
+# ---------------- Metrics ----------------
+REQUEST_SECONDS = Histogram(
+    'agrovistaar_http_request_duration_seconds',
+    'Time until the response (or its first chunk, when streamed) is ready.',
+    ('view', 'method'))
+RESPONSES = Counter(
+    'agrovistaar_http_responses_total',
+    'Responses by URL name, method and status code.',
+    ('view', 'method', 'status'))
+INFERENCE_SECONDS = Histogram(
+    'agrovistaar_model_inference_seconds',
+    'Model prediction calls, one per (micro-)batch.',
+    ('model', 'outcome'))
+INFERENCE_ROWS = Counter(
+    'agrovistaar_model_inference_rows_total',
+    'Rows passed to model prediction calls.',
+    ('model',))
+UPSTREAM_SECONDS = Histogram(
+    'agrovistaar_upstream_request_seconds',
+    'Outbound Gemini and OpenWeather calls (whole stream for streamed replies).',
+    ('service', 'outcome'))
+PAGE_CACHE = Counter(
+    'agrovistaar_page_cache_total',
+    'Services page cache lookups: hit, miss or bypass (signed-in/disabled); not_modified counts 304s.',
+    ('result',))
+DB_QUERY_SECONDS = Histogram(
+    'agrovistaar_db_query_seconds',
+    'Database queries by connection alias and statement type.',
+    ('alias', 'statement'), buckets=QUERY_BUCKETS)
+CROP_INFO_SECONDS = Histogram(
+    'agrovistaar_crop_info_seconds',
+    'Crop info queries by answer path: local (CropInfo table), cache, gemini or error.',
+    ('path',))
+DEFERRED_WRITES = Counter(
+    'agrovistaar_deferred_writes_total',
+    'Writes committed (ok) or dropped (error) by the background write queue.',
+    ('result',))
+MIDDLEWARE_SECONDS = Histogram(
+    'agrovistaar_middleware_seconds',
+    'Time each middleware (or the view) adds to a request; recorded only with MIDDLEWARE_PROFILING.',
+    ('middleware',), buckets=MIDDLEWARE_BUCKETS)
+
+
+# ---------------- Database Queries ----------------
+STATEMENTS = frozenset(['SELECT', 'INSERT', 'UPDATE', 'DELETE', 'BEGIN', 'COMMIT', 'ROLLBACK', 'SAVEPOINT', 'RELEASE', 'PRAGMA'])
+
+
+def db_query_timer(execute, sql, params, many, context):
+    statement = (sql.lstrip()[:9].split(None, 1) or [''])[0].upper()
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        DB_QUERY_SECONDS.observe(time.perf_counter() - start, context['connection'].alias,
+                                 statement if statement in STATEMENTS else 'OTHER')
+
+
+def _install_db_timer(sender, connection, **kwargs):
+    if db_query_timer not in connection.execute_wrappers:
+        connection.execute_wrappers.append(db_query_timer)
+
+
+connection_created.connect(_install_db_timer, dispatch_uid='agrovistaar_db_query_timer')
+
+
+# ---------------- Exposition ----------------
+def render() -> str:
+    lines = []
+    for metric in _metrics:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+def metrics_view(request):
+    return HttpResponse(render(), content_type=CONTENT_TYPE)
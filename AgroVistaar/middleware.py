@@ -0,0 +1,237 @@
+# AgroVistaar/middleware.py
+"""
+Project-wide middleware: request metrics and response compression.
+
+``MetricsMiddleware`` records each request's latency and status under its URL
+name (``chatbot:chat_api``, ``myapp:prediction``...) in ``AgroVistaar.metrics``; it
+runs natively in both sync and async stacks so async views get no extra
+thread hop.
+
+``RequestTraceMiddleware`` records requests for the replay benchmark when
+``REQUEST_TRACE_PATH`` is set (see ``AgroVistaar.traces``); otherwise Django
+drops it at startup.
+
+``FastPathMiddleware`` hands the JSON API routes in ``FAST_PATH_URLS``
+(chat, bulk/price/yield prediction) to a second, lean stack built from
+``FAST_PATH_MIDDLEWARE``, so they skip the session, auth, CSRF, messages,
+clickjacking and locale middleware that only the HTML pages need. Everything
+above it in ``MIDDLEWARE`` (metrics, tracing) still runs for them, and the
+``ALLOWED_HOSTS`` check that ``CommonMiddleware`` would do happens before the
+hand-off.
+
+``CompressionMiddleware`` is Django's ``GZipMiddleware`` plus brotli for
+non-HTML responses when the client sends ``Accept-Encoding: br`` and the
+optional ``brotli`` package is installed. HTML (which carries CSRF tokens)
+and streamed responses always go through the stock gzip path, which has
+Django's BREACH mitigation and flushes each streamed chunk.
+"""
+import logging
+import re
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured, MiddlewareNotUsed
+from django.core.handlers.base import BaseHandler
+from django.core.handlers.exception import convert_exception_to_response
+from django.middleware.gzip import GZipMiddleware
+from django.urls import NoReverseMatch, resolve, reverse
+from django.utils.cache import patch_vary_headers
+from django.utils.module_loading import import_string
+
+from .metrics import REQUEST_SECONDS, RESPONSES
+from .traces import TraceWriter
+
+try:
+    import brotli
+except ImportError:  # optional; gzip only
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        start = time.perf_counter()
+        response = self.get_response(request)
+        self.record(request, response, start)
+        return response
+
+    async def __acall__(self, request):
+        start = time.perf_counter()
+        response = await self.get_response(request)
+        self.record(request, response, start)
+        return response
+
+    @staticmethod
+    def record(request, response, start):
+        match = request.resolver_match
+        view = match.view_name if match else 'unresolved'  # keeps 404 scans from adding label values
+        REQUEST_SECONDS.observe(time.perf_counter() - start, view, request.method)
+        RESPONSES.inc(view, request.method, response.status_code)
+
+
+class RequestTraceMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        path = getattr(settings, 'REQUEST_TRACE_PATH', '')
+        if not path:
+            raise MiddlewareNotUsed
+        self.writer = TraceWriter(path, getattr(settings, 'REQUEST_TRACE_MAX_BODY', 65536))
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def read_body(self, request):
+        # Touching request.body on a large upload would raise RequestDataTooBig (or load it all)
+        length = int(request.META.get('CONTENT_LENGTH') or 0)
+        if length > self.writer.max_body or request.content_type == 'multipart/form-data':
+            return None
+        return request.body
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        body = self.read_body(request)
+        start = time.perf_counter()
+        response = self.get_response(request)
+        self.writer.record(request, body, response, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        body = self.read_body(request)
+        start = time.perf_counter()
+        response = await self.get_response(request)
+        self.writer.record(request, body, response, time.perf_counter() - start)
+        return response
+
+
+class LeanHandler(BaseHandler):
+    """A handler whose middleware chain comes from ``middleware`` instead of ``settings.MIDDLEWARE``."""
+
+    def __init__(self, middleware, is_async=False):
+        super().__init__()
+        self.middleware = middleware
+        self.load_middleware(is_async)
+
+    def load_middleware(self, is_async=False):
+        # Same assembly as BaseHandler.load_middleware, minus the DEBUG logging
+        self._view_middleware = []
+        self._template_response_middleware = []
+        self._exception_middleware = []
+
+        handler = convert_exception_to_response(self._get_response_async if is_async else self._get_response)
+        handler_is_async = is_async
+        for middleware_path in reversed(self.middleware):
+            middleware = import_string(middleware_path)
+            middleware_is_async = getattr(middleware, 'async_capable', False)
+            if not handler_is_async and getattr(middleware, 'sync_capable', True):
+                middleware_is_async = False
+            adapted_handler = self.adapt_method_mode(middleware_is_async, handler, handler_is_async)
+            try:
+                mw_instance = middleware(adapted_handler)
+            except MiddlewareNotUsed:
+                continue
+            if mw_instance is None:
+                raise ImproperlyConfigured(f"Middleware factory {middleware_path} returned None.")
+
+            if hasattr(mw_instance, 'process_view'):
+                self._view_middleware.insert(0, self.adapt_method_mode(is_async, mw_instance.process_view))
+            if hasattr(mw_instance, 'process_template_response'):
+                self._template_response_middleware.append(
+                    self.adapt_method_mode(is_async, mw_instance.process_template_response))
+            if hasattr(mw_instance, 'process_exception'):
+                self._exception_middleware.append(self.adapt_method_mode(False, mw_instance.process_exception))
+
+            handler = convert_exception_to_response(mw_instance)
+            handler_is_async = middleware_is_async
+
+        self._middleware_chain = self.adapt_method_mode(is_async, handler, handler_is_async)
+
+
+class FastPathMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'FAST_PATH_ENABLED', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+        self.lean = LeanHandler(getattr(settings, 'FAST_PATH_MIDDLEWARE', []), self.is_async)
+        self._paths = None
+
+    @property
+    def paths(self) -> frozenset:
+        # Resolved on first use: reversing at startup would import every app's views
+        if self._paths is None:
+            paths = set()
+            for name in getattr(settings, 'FAST_PATH_URLS', []):
+                try:
+                    path = reverse(name)
+                except NoReverseMatch:
+                    logger.warning("FAST_PATH_URLS: no URL named %r", name)
+                    continue
+                if not getattr(resolve(path).func, 'csrf_exempt', False):
+                    logger.warning("FAST_PATH_URLS: %s is not csrf_exempt, keeping it on the full stack", name)
+                    continue
+                paths.add(path)
+            self._paths = frozenset(paths)
+        return self._paths
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if request.path_info in self.paths:
+            request.get_host()  # raises DisallowedHost (a 400) like CommonMiddleware would
+            return self.lean._middleware_chain(request)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        if request.path_info in self.paths:
+            request.get_host()
+            return await self.lean._middleware_chain(request)
+        return await self.get_response(request)
+
+
+_ACCEPTS_BR = re.compile(r'\bbr\b')
+MIN_LENGTH = 200  # same cut-off as GZipMiddleware
+
+
+class CompressionMiddleware(GZipMiddleware):
+    def process_response(self, request, response):
+        if (brotli is None
+                or response.streaming
+                or response.has_header('Content-Encoding')
+                or 'html' in response.get('Content-Type', '')
+                or len(response.content) < MIN_LENGTH
+                or not _ACCEPTS_BR.search(request.META.get('HTTP_ACCEPT_ENCODING', ''))):
+            return super().process_response(request, response)
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        compressed = brotli.compress(response.content, quality=getattr(settings, 'BROTLI_QUALITY', 5))
+        if len(compressed) >= len(response.content):
+            return response
+        response.content = compressed
+        response.headers['Content-Length'] = str(len(response.content))
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = 'br'
+        return response
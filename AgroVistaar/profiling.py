@@ -0,0 +1,118 @@
+# AgroVistaar/profiling.py
+"""
+Per-middleware profiling.
+
+With ``MIDDLEWARE_PROFILING=1`` settings put a ``MiddlewareProbe`` before
+every middleware (and one before the view), in both the main and the
+fast-path stacks. Each probe times everything below it; the outermost probe
+turns those inclusive times into the time each middleware adds on its own
+and records them in ``agrovistaar_middleware_seconds`` and ``stats()``.
+
+A middleware that answers without calling the next one (a redirect, a CSRF
+rejection) is charged for everything below it that ran, which is nothing.
+"""
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.core.exceptions import MiddlewareNotUsed
+
+from .metrics import MIDDLEWARE_SECONDS
+
+_totals = {}
+_lock = threading.Lock()
+
+
+def _target(get_response):
+    """The middleware instance (or handler method) that a probe's ``get_response`` leads to."""
+    target = get_response
+    for _ in range(4):  # unwrap convert_exception_to_response / sync<->async adapters
+        inner = (getattr(target, '__wrapped__', None) or getattr(target, 'func', None)
+                 or getattr(target, 'awaitable', None))
+        if inner is None:
+            break
+        target = inner
+    return target
+
+
+def _name(target) -> str:
+    if getattr(target, '__name__', '') in ('_get_response', '_get_response_async'):
+        return 'view'
+    cls = target if isinstance(target, type) else type(target)
+    return f"{cls.__module__}.{cls.__qualname__}"
+
+
+def record(timings):
+    """``timings`` is [(name, inclusive seconds)] innermost first."""
+    below = 0.0
+    for name, inclusive in timings:
+        own = max(inclusive - below, 0.0)
+        below = inclusive
+        MIDDLEWARE_SECONDS.observe(own, name)
+        with _lock:
+            total = _totals.setdefault(name, [0, 0.0])
+            total[0] += 1
+            total[1] += own
+
+
+def probed(middleware) -> list:
+    """``middleware`` with a probe before each entry and before the view (what settings do when profiling)."""
+    probe = 'AgroVistaar.profiling.MiddlewareProbe'
+    return [path for entry in middleware for path in (probe, entry)] + [probe]
+
+
+def stats() -> dict:
+    """Mean microseconds each middleware adds per request, outermost first."""
+    with _lock:
+        items = list(_totals.items())
+    return {name: round(total / count * 1e6, 1) for name, (count, total) in reversed(items)}
+
+
+def reset():
+    with _lock:
+        _totals.clear()
+
+
+class MiddlewareProbe:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        target = _target(get_response)
+        if isinstance(target, MiddlewareProbe):  # the middleware between them was not used
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.name = _name(target)
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def _enter(self, request):
+        timings = getattr(request, '_middleware_timings', None)
+        if timings is None:
+            timings = request._middleware_timings = []
+            return timings, True
+        return timings, False
+
+    def _exit(self, request, timings, outermost, start):
+        timings.append((self.name, time.perf_counter() - start))
+        if outermost:
+            record(timings)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        timings, outermost = self._enter(request)
+        start = time.perf_counter()
+        try:
+            return self.get_response(request)
+        finally:
+            self._exit(request, timings, outermost, start)
+
+    async def __acall__(self, request):
+        timings, outermost = self._enter(request)
+        start = time.perf_counter()
+        try:
+            return await self.get_response(request)
+        finally:
+            self._exit(request, timings, outermost, start)
@@ -38,22 +38,29 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'chatbot',
+    'crops',
+    'aisim',
     'loginsignup',
     'services',
     'corsheaders',
     'myapp', 
+    'price',
+    'yield',
 ]
 
 MIDDLEWARE = [
+    'AgroVistaar.middleware.MetricsMiddleware',
+    'AgroVistaar.middleware.RequestTraceMiddleware',
+    'AgroVistaar.middleware.FastPathMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'AgroVistaar.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
+    'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'corsheaders.middleware.CorsMiddleware',
-    'django.middleware.common.CommonMiddleware',
     'django.middleware.locale.LocaleMiddleware'
 ]
 
@@ -70,6 +77,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'services.pages.page_cache',
             ],
         },
     },
@@ -173,4 +181,202 @@ load_dotenv(os.path.join(BASE_DIR, '.env'))
 # Gemini API Key
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
 
-# ... rest of the settings ...
\ No newline at end of file
+# ... rest of the settings ...
+
+# Crop model micro-batching (myapp.batching)
+CROP_BATCHING_ENABLED = os.getenv('CROP_BATCHING_ENABLED', '1') == '1'
+CROP_BATCH_MAX_SIZE = int(os.getenv('CROP_BATCH_MAX_SIZE', '32'))
+CROP_BATCH_MAX_WAIT_MS = float(os.getenv('CROP_BATCH_MAX_WAIT_MS', '5'))
+CROP_BATCH_TIMEOUT = 10  # seconds a request waits for its batch result
+
+# Bulk CSV prediction (myapp.bulk)
+BULK_PREDICTION_CHUNK_SIZE = int(os.getenv('BULK_PREDICTION_CHUNK_SIZE', '5000'))
+
+# Lazy model registry (myapp.registry): comma-separated artifact names or "all"
+# to load at startup; use with gunicorn --preload to share them copy-on-write.
+MODEL_PRELOAD = os.getenv('MODEL_PRELOAD', '')
+
+# Crop model inference backend: "keras" (tf.keras .h5) or "numpy" (.npz from
+# `manage.py export_crop_model`, no TensorFlow import at all)
+CROP_MODEL_BACKEND = os.getenv('CROP_MODEL_BACKEND', 'keras')
+
+# Commodity price store (price.store): how often to stat the CSV for changes
+PRICE_STORE_RELOAD_CHECK_SECONDS = int(os.getenv('PRICE_STORE_RELOAD_CHECK_SECONDS', '30'))
+
+# Price prediction API (price.predictor): LRU + TTL memoization of predictions
+PRICE_PREDICTION_CACHE_SIZE = int(os.getenv('PRICE_PREDICTION_CACHE_SIZE', '10000'))
+PRICE_PREDICTION_CACHE_TTL = int(os.getenv('PRICE_PREDICTION_CACHE_TTL', '3600'))
+PRICE_PREDICTION_MAX_BATCH = 1000
+
+# Yield prediction API (yield.predictor)
+YIELD_PREDICTION_MAX_BATCH = 5000
+
+# Gemini response cache (chatbot.llm_cache). LLM_CACHE_BACKEND picks where
+# answers are stored: "locmem" (per process), "file", or "db" (the SQLite
+# database; run `manage.py createcachetable` once).
+LLM_CACHE_ENABLED = os.getenv('LLM_CACHE_ENABLED', '1') == '1'
+LLM_CACHE_BACKEND = os.getenv('LLM_CACHE_BACKEND', 'locmem')
+LLM_CACHE_TTL = int(os.getenv('LLM_CACHE_TTL', str(6 * 60 * 60)))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv('LLM_CACHE_MAX_ENTRIES', '5000'))
+LLM_CACHE_LOCATION_PRECISION = 1  # decimal places of lat/lon, ~11 km buckets
+
+_LLM_CACHE_LOCATIONS = {
+    'locmem': ('django.core.cache.backends.locmem.LocMemCache', 'agrovistaar-llm'),
+    'file': ('django.core.cache.backends.filebased.FileBasedCache', str(BASE_DIR / 'cache' / 'llm')),
+    'db': ('django.core.cache.backends.db.DatabaseCache', 'llm_response_cache'),
+}
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'llm': {
+        'BACKEND': _LLM_CACHE_LOCATIONS[LLM_CACHE_BACKEND][0],
+        'LOCATION': _LLM_CACHE_LOCATIONS[LLM_CACHE_BACKEND][1],
+        'TIMEOUT': LLM_CACHE_TTL,
+        'OPTIONS': {'MAX_ENTRIES': LLM_CACHE_MAX_ENTRIES, 'CULL_FREQUENCY': 4},
+    },
+}
+
+# Outbound Gemini/OpenWeather calls (chatbot.upstream): pooled async HTTP with
+# timeouts. The *_API_BASE settings let load tests point at a local stub.
+GEMINI_API_BASE = os.getenv('GEMINI_API_BASE', 'https://generativelanguage.googleapis.com')
+OPENWEATHER_API_BASE = os.getenv('OPENWEATHER_API_BASE', 'https://api.openweathermap.org')
+OPENWEATHER_API_KEY = os.getenv('OPENWEATHER_API_KEY')
+UPSTREAM_TIMEOUT = float(os.getenv('UPSTREAM_TIMEOUT', '20'))
+UPSTREAM_CONNECT_TIMEOUT = 5.0
+UPSTREAM_MAX_CONNECTIONS = 100
+UPSTREAM_MAX_KEEPALIVE = 20
+WEATHER_TIMEOUT = 5.0
+
+# Weather cache (chatbot.weather): readings are shared per geohash cell
+WEATHER_GEOHASH_PRECISION = int(os.getenv('WEATHER_GEOHASH_PRECISION', '5'))  # 5 ~ 4.9 km cells
+WEATHER_CACHE_TTL = int(os.getenv('WEATHER_CACHE_TTL', '600'))
+WEATHER_CACHE_MAX_ENTRIES = 10000
+
+# Local FAQ answers (chatbot.faq) tried before Gemini
+FAQ_ENABLED = os.getenv('FAQ_ENABLED', '1') == '1'
+FAQ_MIN_CONFIDENCE = 0.7  # cosine similarity to the closest curated phrasing
+FAQ_MIN_MARGIN = 0.2  # lead over the next-best entry
+
+# Outbound AI call limits (chatbot.resilience): per-upstream concurrency cap,
+# wait for a free slot before shedding, overall deadline, and circuit breaker
+UPSTREAM_LIMITS = {
+    'gemini': {
+        'max_concurrency': int(os.getenv('GEMINI_MAX_CONCURRENCY', '50')),
+        'queue_timeout': 2.0,
+        'deadline': 25.0,
+        'failure_threshold': 5,
+        'reset_timeout': 30.0,
+    },
+    'weather': {
+        'max_concurrency': 20,
+        'queue_timeout': 1.0,
+        'deadline': 6.0,
+        'failure_threshold': 5,
+        'reset_timeout': 30.0,
+    },
+}
+
+# Conversation history (chatbot.conversation): token budget for replayed turns and the summary of older ones
+CHAT_HISTORY_ENABLED = os.getenv('CHAT_HISTORY_ENABLED', '1') == '1'
+CHAT_HISTORY_TOKENS = int(os.getenv('CHAT_HISTORY_TOKENS', '1500'))
+CHAT_HISTORY_MAX_TURNS = int(os.getenv('CHAT_HISTORY_MAX_TURNS', '20'))
+CHAT_SUMMARY_TOKENS = int(os.getenv('CHAT_SUMMARY_TOKENS', '300'))
+
+# Response compression (AgroVistaar.middleware): brotli quality for JSON replies when the brotli package is installed
+BROTLI_QUALITY = int(os.getenv('BROTLI_QUALITY', '5'))
+
+# Request replay benchmark (AgroVistaar.traces): set REQUEST_TRACE_PATH to record traffic, e.g. traces/requests.jsonl
+REQUEST_TRACE_PATH = os.getenv('REQUEST_TRACE_PATH', '')
+REQUEST_TRACE_MAX_BODY = int(os.getenv('REQUEST_TRACE_MAX_BODY', '65536'))
+REPLAY_TRACE_PATH = os.getenv('REPLAY_TRACE_PATH', os.path.join(BASE_DIR, 'traces', 'smoke.jsonl'))
+if os.getenv('SQLITE_PATH'):  # lets `manage.py replay` / `bench_auth` run a server against a scratch database
+    DATABASES['default']['NAME'] = os.getenv('SQLITE_PATH')
+
+# Services page cache (services.pages): whole pages for anonymous visitors, navbar/footer fragments
+# for signed-in users. Set PAGE_CACHE_VERSION to the release id on deploy (defaults to a template fingerprint).
+PAGE_CACHE_ENABLED = os.getenv('PAGE_CACHE_ENABLED', '1') == '1'
+PAGE_CACHE_TIMEOUT = int(os.getenv('PAGE_CACHE_TIMEOUT', str(60 * 60)))
+PAGE_CACHE_VERSION = os.getenv('PAGE_CACHE_VERSION', '')
+CACHES['pages'] = {
+    'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    'LOCATION': 'agrovistaar-pages',
+    'TIMEOUT': PAGE_CACHE_TIMEOUT,
+}
+
+# Fast path (AgroVistaar.middleware.FastPathMiddleware): these csrf_exempt JSON APIs run through the
+# lean FAST_PATH_MIDDLEWARE stack instead of the rest of MIDDLEWARE
+FAST_PATH_ENABLED = os.getenv('FAST_PATH_ENABLED', '1') == '1'
+FAST_PATH_URLS = [
+    'chatbot:chat_api',
+    'myapp:bulk_prediction',
+    'price:price_predict',
+    'yield:yield_predict',
+]
+FAST_PATH_MIDDLEWARE = [
+    'django.middleware.security.SecurityMiddleware',
+    'AgroVistaar.middleware.CompressionMiddleware',
+    'corsheaders.middleware.CorsMiddleware',
+]
+
+# Middleware profiling (AgroVistaar.profiling): time each middleware adds, in /metrics and `manage.py bench_middleware`
+MIDDLEWARE_PROFILING = os.getenv('MIDDLEWARE_PROFILING', '0') == '1'
+if MIDDLEWARE_PROFILING:  # a probe before every middleware and before the view
+    _PROBE = 'AgroVistaar.profiling.MiddlewareProbe'
+    MIDDLEWARE = [p for mw in MIDDLEWARE for p in (_PROBE, mw)] + [_PROBE]
+    FAST_PATH_MIDDLEWARE = [p for mw in FAST_PATH_MIDDLEWARE for p in (_PROBE, mw)] + [_PROBE]
+
+# SQLite tuning (AgroVistaar.sqlite): WAL, pragmas, IMMEDIATE write transactions and persistent connections.
+# SQLITE_TUNING=0 restores the stock backend (for comparison with `manage.py bench_auth`).
+SQLITE_TUNING = os.getenv('SQLITE_TUNING', '1') == '1'
+if SQLITE_TUNING and DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3':
+    DATABASES['default'].update({
+        'ENGINE': 'AgroVistaar.sqlite',
+        'CONN_MAX_AGE': int(os.getenv('SQLITE_CONN_MAX_AGE', '600')),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT', '20')),
+            'transaction_mode': 'IMMEDIATE',
+            'pragmas': {
+                'journal_mode': 'WAL',
+                'synchronous': 'NORMAL',  # durable across app crashes; WAL is fsynced at checkpoints
+                'cache_size': -int(os.getenv('SQLITE_CACHE_KB', '16384')),
+                'mmap_size': int(os.getenv('SQLITE_MMAP_BYTES', str(128 * 1024 * 1024))),
+                'temp_store': 'MEMORY',
+            },
+        },
+    })
+
+# Deferred writes (AgroVistaar.write_queue): last-login stamps, committed in batches by one thread
+DB_WRITE_QUEUE_ENABLED = os.getenv('DB_WRITE_QUEUE_ENABLED', '1' if SQLITE_TUNING else '0') == '1'
+DB_WRITE_QUEUE_MAX_BATCH = int(os.getenv('DB_WRITE_QUEUE_MAX_BATCH', '200'))
+DB_WRITE_QUEUE_MAX_DELAY = float(os.getenv('DB_WRITE_QUEUE_MAX_DELAY', '0.05'))
+
+# Password hashing (loginsignup.hashers): PASSWORD_HASHER=argon2 needs argon2-cffi. Hashes made with the
+# other hasher (or an older cost) still verify and are re-hashed to the current cost on the user's next login.
+# Costs default to Django's own (None); setting one lower (e.g. 600000 PBKDF2 iterations, the OWASP minimum)
+# is an explicit opt-in that re-hashes stored passwords down to it.
+PASSWORD_HASHER = os.getenv('PASSWORD_HASHER', 'pbkdf2')
+PASSWORD_PBKDF2_ITERATIONS = int(os.getenv('PASSWORD_PBKDF2_ITERATIONS', '0')) or None
+PASSWORD_ARGON2_TIME_COST = int(os.getenv('PASSWORD_ARGON2_TIME_COST', '0')) or None
+PASSWORD_ARGON2_MEMORY_KB = int(os.getenv('PASSWORD_ARGON2_MEMORY_KB', '0')) or None
+PASSWORD_ARGON2_PARALLELISM = int(os.getenv('PASSWORD_ARGON2_PARALLELISM', '0')) or None
+_PASSWORD_HASHERS = {
+    'pbkdf2': 'loginsignup.hashers.TunedPBKDF2PasswordHasher',
+    'argon2': 'loginsignup.hashers.TunedArgon2PasswordHasher',
+}
+PASSWORD_HASHERS = [_PASSWORD_HASHERS[PASSWORD_HASHER]] + [
+    path for name, path in _PASSWORD_HASHERS.items() if name != PASSWORD_HASHER]
+
+# Login rate limit (loginsignup.ratelimit): per client IP attempts and per username failures, per window
+LOGIN_RATE_LIMIT_ENABLED = os.getenv('LOGIN_RATE_LIMIT_ENABLED', '1') == '1'
+LOGIN_RATE_LIMIT_WINDOW = int(os.getenv('LOGIN_RATE_LIMIT_WINDOW', '300'))
+LOGIN_RATE_LIMIT_PER_IP = int(os.getenv('LOGIN_RATE_LIMIT_PER_IP', '30'))
+LOGIN_RATE_LIMIT_PER_USERNAME = int(os.getenv('LOGIN_RATE_LIMIT_PER_USERNAME', '10'))
+# Reverse proxies in front of Django (1 for a single nginx); the client IP is then taken from X-Forwarded-For
+TRUSTED_PROXY_COUNT = int(os.getenv('TRUSTED_PROXY_COUNT', '0'))
+
+# Crop knowledge base (crops.knowledge): answer crop info queries from CropInfo (seed with `manage.py seed_crop_info`)
+CROP_KB_ENABLED = os.getenv('CROP_KB_ENABLED', '1') == '1'
+CROP_KB_FUZZY_CUTOFF = float(os.getenv('CROP_KB_FUZZY_CUTOFF', '0.8'))
\ No newline at end of file
@@ -0,0 +1,52 @@
+# AgroVistaar/sqlite/base.py
+"""
+SQLite backend with production pragmas.
+
+Same as ``django.db.backends.sqlite3`` plus an ``OPTIONS['pragmas']`` dict
+that is applied to every new connection, e.g.::
+
+    'OPTIONS': {
+        'timeout': 20,                   # busy timeout in seconds
+        'transaction_mode': 'IMMEDIATE', # take the write lock at BEGIN, not mid-transaction
+        'pragmas': {'journal_mode': 'WAL', 'synchronous': 'NORMAL'},
+    }
+
+WAL lets readers run while one connection writes, and IMMEDIATE write
+transactions wait on the busy timeout instead of failing with "database is
+locked" when two read-then-write transactions try to upgrade at once.
+Connections run ``PRAGMA optimize`` before closing, so long-lived
+(``CONN_MAX_AGE``) connections keep the query planner statistics fresh.
+"""
+import re
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.sqlite3 import base
+
+_PRAGMA_NAME = re.compile(r'^[a-z_]+$')
+_PRAGMA_VALUE = re.compile(r'^-?[A-Za-z0-9_]+$')
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        pragmas = params.pop('pragmas', None) or {}
+        for name, value in pragmas.items():
+            if not _PRAGMA_NAME.match(name) or not _PRAGMA_VALUE.match(str(value)):
+                raise ImproperlyConfigured(
+                    f"settings.DATABASES[{self.alias!r}]['OPTIONS']['pragmas'] has an invalid entry {name}={value!r}.")
+        self.pragmas = pragmas
+        return params
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        return conn
+
+    def _close(self):
+        if self.connection is not None and not self.is_in_memory_db():
+            try:
+                self.connection.execute("PRAGMA optimize")
+            except base.Database.Error:
+                pass
+        super()._close()
@@ -0,0 +1,308 @@
+import asyncio
+import copy
+import json
+import os
+import tempfile
+import threading
+from unittest import mock, skipUnless
+
+import httpx
+from django.contrib.auth.models import User
+from django.core.exceptions import ImproperlyConfigured
+from django.db import OperationalError, connection, connections
+from django.http import HttpResponse, QueryDict
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+
+from myapp.management.commands import replay
+
+from . import metrics, traces
+from .middleware import RequestTraceMiddleware
+from .metrics import CONTENT_TYPE, DB_QUERY_SECONDS, DEFERRED_WRITES, Counter, Histogram, Stats, db_query_timer
+from .write_queue import WriteQueue
+
+
+def counted(counter, *labels):
+    return counter._values.get(labels, 0)
+
+
+def observed(histogram, *labels):
+    state = histogram._values.get(labels)
+    return sum(state[0]) if state else 0
+
+
+class MetricsExpositionTests(SimpleTestCase):
+    def metric(self, cls, *args, **kwargs):
+        metric = cls(*args, **kwargs)
+        self.addCleanup(metrics._metrics.remove, metric)
+        return metric
+
+    def test_counter_has_help_type_and_escaped_labels(self):
+        counter = self.metric(Counter, 'test_things_total', 'Things seen.', ('kind', 'path'))
+        counter.inc('a', '/x')
+        counter.inc('a', '/x', amount=2)
+        counter.inc('b', 'say "hi"\\n\n')
+        self.assertEqual(list(counter.render()), [
+            '# HELP test_things_total Things seen.',
+            '# TYPE test_things_total counter',
+            'test_things_total{kind="a",path="/x"} 3',
+            'test_things_total{kind="b",path="say \\"hi\\"\\\\n\\n"} 1',
+        ])
+
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = self.metric(Histogram, 'test_seconds', 'Durations.', ('op',), buckets=(1.0, 0.1))
+        for value in (0.05, 0.1, 0.5, 5.0):  # 0.1 falls in its own bucket: le is inclusive
+            histogram.observe(value, 'read')
+        self.assertEqual(list(histogram.render()), [
+            '# HELP test_seconds Durations.',
+            '# TYPE test_seconds histogram',
+            'test_seconds_bucket{op="read",le="0.1"} 2',
+            'test_seconds_bucket{op="read",le="1.0"} 3',
+            'test_seconds_bucket{op="read",le="+Inf"} 4',
+            'test_seconds_sum{op="read"} 5.65',
+            'test_seconds_count{op="read"} 4',
+        ])
+
+    def test_stats_fields_become_gauges(self):
+        stats = {('gemini',): {'calls': 3, 'hit_rate': 0.5, 'circuit_open': True, 'state': 'open'},
+                 ('weather',): {'calls': 1, 'hit_rate': 0.0, 'circuit_open': False, 'state': 'closed'}}
+        gauges = self.metric(Stats, 'test_guard', 'Guards.', lambda: stats, ('service',))
+        lines = list(gauges.render())
+        self.assertIn('# TYPE test_guard_calls gauge', lines)
+        self.assertIn('test_guard_calls{service="gemini"} 3', lines)
+        self.assertIn('test_guard_hit_rate{service="weather"} 0.0', lines)
+        self.assertIn('test_guard_circuit_open{service="gemini"} 1', lines)
+        self.assertIn('test_guard_circuit_open{service="weather"} 0', lines)
+        self.assertFalse(any('state' in line for line in lines))  # strings are not samples
+
+    def test_failing_stats_are_left_out(self):
+        def collect():
+            raise RuntimeError('boom')
+        self.metric(Stats, 'test_broken', 'Broken.', collect)
+        counter = self.metric(Counter, 'test_after_total', 'Rendered after the broken one.')
+        counter.inc()
+        with mock.patch('builtins.print'):
+            body = metrics.render()
+        self.assertNotIn('test_broken', body)
+        self.assertIn('test_after_total 1\n', body)
+
+    def test_metrics_view(self):
+        counter = self.metric(Counter, 'test_view_total', 'Served.')
+        counter.inc()
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], CONTENT_TYPE)
+        body = response.content.decode()
+        self.assertIn('# TYPE test_view_total counter\ntest_view_total 1\n', body)
+        self.assertIn('# TYPE agrovistaar_http_request_duration_seconds histogram', body)
+        self.assertIn('# TYPE agrovistaar_weather_cache_hits gauge', body)
+
+
+class DBQueryTimerTests(TestCase):
+    def run_sql(self, sql):
+        before = observed(DB_QUERY_SECONDS, 'default', self.statement)
+        with connection.cursor() as cursor:
+            cursor.execute(sql)
+        return observed(DB_QUERY_SECONDS, 'default', self.statement) - before
+
+    def test_installed_on_connections(self):
+        connection.ensure_connection()
+        self.assertIn(db_query_timer, connection.execute_wrappers)
+
+    def test_queries_are_timed_by_statement(self):
+        self.statement = 'SELECT'
+        self.assertEqual(self.run_sql("SELECT 1"), 1)
+        self.assertEqual(self.run_sql("\n  select count(*) from auth_user"), 1)
+        self.statement = 'PRAGMA'
+        self.assertEqual(self.run_sql("PRAGMA user_version"), 1)
+
+    def test_unknown_statements_are_other(self):
+        self.statement = 'OTHER'
+        self.assertEqual(self.run_sql("WITH t AS (SELECT 1) SELECT * FROM t"), 1)
+
+    def test_failed_queries_are_timed(self):
+        self.statement = 'SELECT'
+        before = observed(DB_QUERY_SECONDS, 'default', 'SELECT')
+        with self.assertRaises(OperationalError):
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT * FROM no_such_table")
+        self.assertEqual(observed(DB_QUERY_SECONDS, 'default', 'SELECT') - before, 1)
+
+
+@skipUnless(connection.vendor == 'sqlite' and 'pragmas' in connection.settings_dict['OPTIONS'],
+            "SQLITE_TUNING is off")
+class SQLiteBackendTests(TestCase):
+    def pragma(self, name, conn=connection):
+        with conn.cursor() as cursor:
+            cursor.execute(f"PRAGMA {name}")
+            return cursor.fetchone()[0]
+
+    def file_connection(self, **pragmas):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        settings_dict = copy.deepcopy(connection.settings_dict)
+        settings_dict['NAME'] = os.path.join(tmp.name, 'agro.sqlite3')
+        settings_dict['OPTIONS']['pragmas'].update(pragmas)
+        wrapper = type(connections['default'])(settings_dict, alias='pragma_test')
+        self.addCleanup(wrapper.close)
+        return wrapper
+
+    def test_pragmas_applied_to_connections(self):
+        pragmas = connection.settings_dict['OPTIONS']['pragmas']
+        self.assertEqual(self.pragma('synchronous'), 1)  # NORMAL
+        self.assertEqual(self.pragma('temp_store'), 2)  # MEMORY
+        self.assertEqual(self.pragma('cache_size'), pragmas['cache_size'])
+
+    def test_file_database_uses_wal_and_optimizes_on_close(self):
+        wrapper = self.file_connection()
+        self.assertEqual(self.pragma('journal_mode', wrapper), 'wal')
+        statements = []
+        wrapper.connection.set_trace_callback(statements.append)
+        wrapper.close()
+        self.assertIn('PRAGMA optimize', statements)
+
+    def test_invalid_pragma_is_rejected(self):
+        wrapper = self.file_connection(**{'journal_mode': 'WAL; DROP TABLE auth_user'})
+        with self.assertRaises(ImproperlyConfigured):
+            wrapper.ensure_connection()
+
+
+class WriteQueueBatchingTests(SimpleTestCase):
+    # The writer thread only records batches here; it never touches the test database
+
+    def setUp(self):
+        self.queue = WriteQueue()
+        self.batches = []
+        self.queue._write = self.record
+        patcher = mock.patch('AgroVistaar.write_queue.atexit.register')
+        self.atexit_register = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def record(self, batch):
+        self.batches.append([args[0] for fn, args, _ in batch if fn is not None])
+        for fn, done, _ in batch:
+            if fn is None:  # a flush() waiter
+                done.set()
+
+    @override_settings(DB_WRITE_QUEUE_MAX_BATCH=3, DB_WRITE_QUEUE_MAX_DELAY=0.5)
+    def test_writes_are_batched_up_to_max_batch(self):
+        for i in range(5):
+            self.queue.submit(print, i)
+        self.assertTrue(self.queue.flush(timeout=5))
+        self.assertEqual(self.batches[0], [0, 1, 2])
+        self.assertEqual(sum(self.batches, []), [0, 1, 2, 3, 4])
+
+    @override_settings(DB_WRITE_QUEUE_MAX_BATCH=100, DB_WRITE_QUEUE_MAX_DELAY=0.01)
+    def test_batch_closes_after_max_delay(self):
+        self.queue.submit(print, 'first')
+        self.assertTrue(self.queue.flush(timeout=5))
+        self.assertEqual(self.batches[0], ['first'])
+
+    def test_flush_registered_for_shutdown(self):
+        self.assertTrue(self.queue.flush())  # nothing started yet
+        self.queue.submit(print, 'stamp')
+        self.atexit_register.assert_called_once_with(self.queue.flush)
+        self.assertTrue(self.queue.flush(timeout=5))
+        self.assertEqual(sum(self.batches, []), ['stamp'])
+
+
+@mock.patch('AgroVistaar.write_queue.close_old_connections')
+class WriteQueueWriteTests(TestCase):
+    # _write() runs synchronously on the test thread, inside the test transaction
+
+    def test_failed_write_only_drops_itself(self, close_old_connections):
+        User.objects.create_user('ramesh')
+        before = counted(DEFERRED_WRITES, 'ok'), counted(DEFERRED_WRITES, 'error')
+        done = threading.Event()
+        WriteQueue()._write([
+            (User.objects.create_user, ('suresh',), {}),
+            (User.objects.create_user, ('ramesh',), {}),  # IntegrityError
+            (User.objects.create_user, ('geeta',), {}),
+            (None, done, None),
+        ])
+        self.assertEqual(sorted(User.objects.values_list('username', flat=True)), ['geeta', 'ramesh', 'suresh'])
+        self.assertEqual(counted(DEFERRED_WRITES, 'ok') - before[0], 2)
+        self.assertEqual(counted(DEFERRED_WRITES, 'error') - before[1], 1)
+        self.assertTrue(done.is_set())
+
+    def test_failed_batch_is_counted_and_releases_flush(self, close_old_connections):
+        before = counted(DEFERRED_WRITES, 'error')
+        done = threading.Event()
+        with mock.patch('AgroVistaar.write_queue.transaction.atomic', side_effect=OperationalError('locked')):
+            WriteQueue()._write([
+                (User.objects.create_user, ('suresh',), {}),
+                (User.objects.create_user, ('geeta',), {}),
+                (None, done, None),
+            ])
+        self.assertEqual(counted(DEFERRED_WRITES, 'error') - before, 2)
+        self.assertTrue(done.is_set())
+        self.assertFalse(User.objects.exists())
+
+
+class TraceRedactionTests(SimpleTestCase):
+    FORM = 'application/x-www-form-urlencoded'
+    SECRETS = ('hunter2', 'csrf-secret-token', 'session-secret', 'AIza-secret-key')
+
+    def test_form_passwords_replaced_and_csrf_dropped(self):
+        body = 'csrfmiddlewaretoken=csrf-secret-token&username=ravi&password1=hunter2&password2=hunter2&email=r%40x.in'
+        fields = QueryDict(traces.redact(body, self.FORM))
+        self.assertNotIn('csrfmiddlewaretoken', fields)
+        self.assertEqual(fields.getlist('password1'), [traces.REPLAY_PASSWORD])
+        self.assertEqual(fields.getlist('password2'), [traces.REPLAY_PASSWORD])
+        self.assertEqual((fields['username'], fields['email']), ('ravi', 'r@x.in'))
+
+    def test_json_secrets_removed(self):
+        body = json.dumps({'message': 'गेहूं', 'api_key': 'AIza-secret-key', 'password': 'hunter2'})
+        data = json.loads(traces.redact(body, 'application/json'))
+        self.assertEqual(data, {'message': 'गेहूं', 'password': traces.REPLAY_PASSWORD})
+
+    def test_bodies_without_secrets_kept_verbatim(self):
+        body = '{"message":  "hello",\n "lang": "en"}'
+        self.assertEqual(traces.redact(body, 'application/json'), body)
+        self.assertEqual(traces.redact('not json', 'application/json'), 'not json')
+        self.assertEqual(traces.redact('password=hunter2', 'text/plain'), 'password=hunter2')
+
+    def record(self, request):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        path = os.path.join(tmp.name, 'requests.jsonl')
+        with override_settings(REQUEST_TRACE_PATH=path):
+            middleware = RequestTraceMiddleware(lambda request: HttpResponse())
+        middleware(request)
+        middleware.writer._file.close()
+        with open(path, encoding='utf-8') as f:
+            raw = f.read()
+        return raw, traces.load(path)[0]
+
+    def test_stored_trace_has_no_secrets(self):
+        request = RequestFactory().post(
+            '/login/?next=/profile/&api_key=AIza-secret-key',
+            'username=ravi&password=hunter2&csrfmiddlewaretoken=csrf-secret-token',
+            content_type=self.FORM,
+            HTTP_COOKIE='sessionid=session-secret; csrftoken=csrf-secret-token',
+            HTTP_X_CSRFTOKEN='csrf-secret-token', HTTP_AUTHORIZATION='Bearer AIza-secret-key')
+        raw, entry = self.record(request)
+        for secret in self.SECRETS:
+            self.assertNotIn(secret, raw)
+        self.assertEqual(entry['query'], 'next=%2Fprofile%2F')
+        self.assertEqual(QueryDict(entry['body'])['password'], traces.REPLAY_PASSWORD)
+
+    def test_replay_sends_no_recorded_secrets(self):
+        raw, entry = self.record(RequestFactory().post(
+            '/login/', 'username=ravi&password=hunter2&csrfmiddlewaretoken=csrf-secret-token',
+            content_type=self.FORM, HTTP_COOKIE='sessionid=session-secret'))
+        sent = []
+
+        def handler(request):
+            sent.append(request)
+            return httpx.Response(302)
+
+        real_client = httpx.AsyncClient
+        with mock.patch.object(replay.httpx, 'AsyncClient',
+                               lambda **kwargs: real_client(transport=httpx.MockTransport(handler), **kwargs)):
+            latencies, errors, elapsed = asyncio.run(replay.replay('http://testserver', [entry], 2, 1))
+        self.assertEqual((len(sent), errors), (2, 0))
+        for request in sent:
+            self.assertEqual(request.headers['Cookie'], f'csrftoken={replay.CSRF_TOKEN}')
+            self.assertEqual(QueryDict(request.content.decode())['password'], traces.REPLAY_PASSWORD)
+            for secret in self.SECRETS:
+                self.assertNotIn(secret, str(request.url) + str(request.headers) + request.content.decode())
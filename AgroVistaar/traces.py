@@ -0,0 +1,124 @@
+# AgroVistaar/traces.py
+"""
+Request traces for the replay benchmark (``manage.py replay``).
+
+``RequestTraceMiddleware`` appends one JSON object per request to
+``REQUEST_TRACE_PATH``::
+
+    {"t": 12.5, "method": "POST", "path": "/chatbot/api/", "query": "",
+     "content_type": "application/json", "body": "{...}", "view": "chatbot:chat_api",
+     "status": 200, "ms": 812.3}
+
+``t`` is seconds since the recorder started. Password fields in form posts,
+JSON bodies and query strings are replaced with ``REPLAY_PASSWORD`` and CSRF
+tokens and API keys are dropped, so a trace can be replayed against a scratch
+database whose users have that password. Cookies (and with them the session)
+and other headers are not recorded.
+"""
+import json
+import os
+import threading
+import time
+from urllib.parse import urlencode
+
+from django.http import QueryDict
+from django.urls import Resolver404, resolve
+
+REPLAY_PASSWORD = 'replay-password'
+SECRET_FIELDS = ('password', 'password1', 'password2')
+DROPPED_FIELDS = ('csrfmiddlewaretoken', 'api_key', 'apikey', 'key', 'appid', 'access_token')
+
+# URL name (or app namespace) -> endpoint group reported by the replay benchmark
+ENDPOINTS = {
+    'myapp': 'prediction',
+    'chatbot': 'chat',
+    'crops': 'crops',
+    'aisim': 'aisim',
+    'loginsignup': 'login',
+    'home': 'pages', 'services': 'pages', 'about': 'pages', 'soilInfo': 'pages', 'profile': 'pages',
+}
+
+
+def endpoint_for(path, static_url='/static/') -> str:
+    if path.startswith(static_url):
+        return 'static'
+    try:
+        match = resolve(path)
+    except Resolver404:
+        return 'unresolved'
+    return ENDPOINTS.get(match.namespace) or ENDPOINTS.get(match.url_name) or match.view_name
+
+
+def redact(body: str, content_type: str) -> str:
+    if content_type.startswith('application/json'):
+        return _redact_json(body)
+    if not content_type.startswith('application/x-www-form-urlencoded'):
+        return body
+    fields = QueryDict(body, mutable=True)
+    for name in DROPPED_FIELDS:
+        fields.pop(name, None)
+    for name in SECRET_FIELDS:
+        if name in fields:
+            fields.setlist(name, [REPLAY_PASSWORD])
+    return urlencode(list(fields.lists()), doseq=True)
+
+
+def _redact_json(body: str) -> str:
+    try:
+        data = json.loads(body)
+    except ValueError:
+        return body
+    if not isinstance(data, dict) or not any(name in data for name in DROPPED_FIELDS + SECRET_FIELDS):
+        return body  # unchanged bodies are replayed byte for byte
+    for name in DROPPED_FIELDS:
+        data.pop(name, None)
+    for name in SECRET_FIELDS:
+        if name in data:
+            data[name] = REPLAY_PASSWORD
+    return json.dumps(data, ensure_ascii=False)
+
+
+def load(path):
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+class TraceWriter:
+    """Appends trace lines from any thread; each line is written with a single ``write``."""
+
+    def __init__(self, path, max_body=65536):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.max_body = max_body
+        self._file = open(path, 'a', encoding='utf-8', buffering=1)
+        self._lock = threading.Lock()
+        self._start = time.monotonic()
+
+    def record(self, request, body, response, elapsed):
+        """``body`` is the raw request body, or None when it was too large (or an upload) to keep."""
+        content_type = request.content_type if body != b'' else ''  # servers default bodiless GETs to text/plain
+        if body is None:
+            text, truncated = '', True
+        else:
+            try:
+                text, truncated = redact(body.decode('utf-8'), content_type), False
+            except UnicodeDecodeError:  # file uploads
+                text, truncated = '', True
+        match = request.resolver_match
+        entry = {
+            't': round(time.monotonic() - self._start, 3),
+            'method': request.method,
+            'path': request.path,
+            'query': redact(request.META.get('QUERY_STRING', ''), 'application/x-www-form-urlencoded'),
+            'content_type': content_type,
+            'body': text,
+            'view': match.view_name if match else None,
+            'status': response.status_code,
+            'ms': round(elapsed * 1000.0, 1),
+        }
+        if truncated:
+            entry['body_truncated'] = True
+        line = json.dumps(entry, ensure_ascii=False) + '\n'
+        with self._lock:
+            self._file.write(line)
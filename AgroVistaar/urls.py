@@ -1,8 +1,11 @@
 from django.contrib import admin
 from django.urls import path, include
 
+from AgroVistaar.metrics import metrics_view
+
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('metrics', metrics_view, name='metrics'),  # Prometheus scrape endpoint
     path('', include('services.urls')),    # Home page (services app)
     # path('chatbot/', include('chatbot.urls')),  # Chatbot API & template
 ]
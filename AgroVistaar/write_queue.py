@@ -0,0 +1,103 @@
+# AgroVistaar/write_queue.py
+"""
+Deferred database writes.
+
+SQLite allows one writer at a time, so writes nobody reads back right away
+(last-login stamps) go to a single background thread instead of competing
+with registrations and logins for the write lock. The
+thread collects up to ``DB_WRITE_QUEUE_MAX_BATCH`` writes, waiting at most
+``DB_WRITE_QUEUE_MAX_DELAY`` seconds after the first one, and commits them in
+one transaction. Each write gets a savepoint, so one failure (say an
+IntegrityError) only drops that write.
+
+Writes are lost if the process is killed before they commit; on a normal
+exit the queue is flushed. With ``DB_WRITE_QUEUE_ENABLED`` off, callers write
+inline as before.
+"""
+import atexit
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, transaction
+
+from .metrics import DEFERRED_WRITES
+
+
+class WriteQueue:
+    def __init__(self):
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return getattr(settings, 'DB_WRITE_QUEUE_ENABLED', False)
+
+    def submit(self, fn, *args, **kwargs):
+        """Run ``fn(*args, **kwargs)`` on the writer thread; safe to call from async code."""
+        self._start()
+        self._queue.put((fn, args, kwargs))
+
+    def flush(self, timeout=10.0) -> bool:
+        """Wait until everything submitted so far is committed."""
+        if self._thread is None:
+            return True
+        done = threading.Event()
+        self._queue.put((None, done, None))
+        return done.wait(timeout)
+
+    def _start(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='db-write-queue', daemon=True)
+                self._thread.start()
+                atexit.register(self.flush)
+
+    def _run(self):
+        max_batch = getattr(settings, 'DB_WRITE_QUEUE_MAX_BATCH', 200)
+        max_delay = getattr(settings, 'DB_WRITE_QUEUE_MAX_DELAY', 0.05)
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + max_delay
+            while len(batch) < max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._write(batch)
+
+    def _write(self, batch):
+        writes = [item for item in batch if item[0] is not None]
+        close_old_connections()  # honours CONN_MAX_AGE / health checks between batches
+        ok = failed = 0
+        if writes:
+            try:
+                with transaction.atomic():
+                    for fn, args, kwargs in writes:
+                        try:
+                            with transaction.atomic():
+                                fn(*args, **kwargs)
+                            ok += 1
+                        except Exception as e:  # one bad write must not stop the writer thread
+                            failed += 1
+                            print(f"Deferred write failed: {e}")
+            except DatabaseError as e:
+                ok, failed = 0, len(writes)
+                print(f"Deferred write batch of {len(writes)} failed: {e}")
+        if ok:
+            DEFERRED_WRITES.inc('ok', amount=ok)
+        if failed:
+            DEFERRED_WRITES.inc('error', amount=failed)
+        for fn, done, _ in batch:
+            if fn is None:
+                done.set()
+
+
+write_queue = WriteQueue()
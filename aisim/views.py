@@ -1,15 +1,19 @@
 import json
-import os
-from datetime import datetime
 
-import google.generativeai as genai
 from django.conf import settings
-from django.http import JsonResponse, HttpResponse
+from django.http import JsonResponse
 from django.shortcuts import render
-from django.utils import timezone
 from django.core.exceptions import ImproperlyConfigured
 from dotenv import load_dotenv
 
+from asgiref.sync import sync_to_async
+
+from chatbot.gemini import gemini_pool
+from chatbot.llm_cache import llm_cache
+from chatbot.replies import ai_reply, reply, requested_lang
+from chatbot.resilience import Unavailable
+from chatbot.upstream import scoped_client
+
 # --- Environment & Gemini API Configuration ---
 # It's good practice to load environment variables once, typically in settings.py,
 # but loading them here also works for a self-contained app.
@@ -22,64 +26,58 @@ try:
         raise ImproperlyConfigured(
             "The GEMINI_API_KEY is not set in your Django settings or .env file."
         )
-    genai.configure(api_key=GEMINI_API_KEY)
 except (AttributeError, ImproperlyConfigured) as e:
     raise ImproperlyConfigured(f"Fatal Error: Gemini API configuration failed. {e}") from e
 
+# System prompt with deep analysis focus (static; date and location are sent with each message)
+SYSTEM_PROMPT = """
+You are an advanced agricultural scenario simulator for Indian farmers. Your task is to deeply analyze "what if" questions related to crop production, yield optimization, fertilization, irrigation, climate effects, and overall farm profitability.
+
+**Instructions:**
+1. **Analyze the Scenario:** Provide a detailed, step-by-step analysis of the user's scenario.
+2. **Bilingual Output:** Respond in both Hindi (Devanagari) and English.
+3. **Structured Response:** Include the following sections:
+   * **Scenario (परिदृश्य):** Restate the user's scenario clearly.
+   * **Potential Impacts (संभावित प्रभाव):** Discuss effects on crop production, yield, resource use, and profitability.
+   * **Recommended Actions (अनुशंसित कार्रवाइयां):** Give practical steps to optimize yield and farm outcomes.
+4. **Tone:** Professional, empathetic, and encouraging.
+5. **Context:** Each message starts with a line giving the current date and the user's location (latitude,longitude).
+""".strip()
+
 # --- Main AI Simulator View ---
-def ai_simulator_view(request):
+@scoped_client
+async def ai_simulator_view(request):
     if request.method == 'GET':
-        return render(request, 'aisim/index.html')
+        return await sync_to_async(render)(request, 'aisim/index.html')
 
     if request.method == 'POST':
         try:
             data = json.loads(request.body)
             user_query = data.get('message', '').strip()
             coords = data.get('coords')
+            lang = requested_lang(request, data)
         except json.JSONDecodeError:
-            return JsonResponse({
-                'reply_hi': '⚠️ अमान्य अनुरोध।',
-                'reply_en': '⚠️ Invalid request format.'
-            }, status=400)
+            return reply('⚠️ अमान्य अनुरोध।',
+                         '⚠️ Invalid request format.', requested_lang(request), status=400)
 
         if not user_query:
-            return JsonResponse({
-                'reply_hi': '⚠️ कृपया अपना प्रश्न दर्ज करें।',
-                'reply_en': '⚠️ Please enter your question.'
-            }, status=400)
+            return reply('⚠️ कृपया अपना प्रश्न दर्ज करें।',
+                         '⚠️ Please enter your question.', lang, status=400)
+
+        cached = await llm_cache.aget('aisim', user_query, coords)
+        if cached is not None:
+            return ai_reply(cached, lang)
 
-        # Updated system prompt with deep analysis focus
-        system_prompt = f"""
-        You are an advanced agricultural scenario simulator for Indian farmers. Your task is to deeply analyze "what if" questions related to crop production, yield optimization, fertilization, irrigation, climate effects, and overall farm profitability.
-        
-        **Instructions:**
-        1. **Analyze the Scenario:** Provide a detailed, step-by-step analysis of the user's scenario.
-        2. **Bilingual Output:** Respond in both Hindi (Devanagari) and English.
-        3. **Structured Response:** Include the following sections:
-           * **Scenario (परिदृश्य):** Restate the user's scenario clearly.
-           * **Potential Impacts (संभावित प्रभाव):** Discuss effects on crop production, yield, resource use, and profitability.
-           * **Recommended Actions (अनुशंसित कार्रवाइयां):** Give practical steps to optimize yield and farm outcomes.
-        4. **Tone:** Professional, empathetic, and encouraging.
-        5. **Context:**
-           * Current Date: {timezone.now().strftime('%A, %B %d, %Y')}
-           * User Location: Latitude {coords.get('lat', 'not provided') if coords else 'not provided'}, Longitude {coords.get('lon', 'not provided') if coords else 'not provided'}
-        """
+        model = gemini_pool.get('aisim', 'gemini-1.5-flash', SYSTEM_PROMPT)
 
         try:
-            model = genai.GenerativeModel(
-                model_name='gemini-1.5-flash',
-                system_instruction=system_prompt
-            )
-            ai_response = model.generate_content(user_query).text
-            return JsonResponse({
-                'reply_hi': ai_response,
-                'reply_en': ai_response
-            })
+            ai_response = await model.generate(user_query, coords)
+            await llm_cache.aset('aisim', user_query, coords, ai_response)
+            return ai_reply(ai_response, lang)
         except Exception as e:
             print(f"ERROR: Gemini API call failed. {e}")
-            return JsonResponse({
-                'reply_hi': '⚠️ AI सिम्युलेटर से संपर्क करने में त्रुटि हुई।',
-                'reply_en': '⚠️ An error occurred while contacting the AI simulator.'
-            }, status=500)
+            return reply('⚠️ AI सिम्युलेटर से संपर्क करने में त्रुटि हुई।',
+                         '⚠️ An error occurred while contacting the AI simulator.', lang,
+                         status=503 if isinstance(e, Unavailable) else 500)
 
     return JsonResponse({'error': f'Method {request.method} not allowed.'}, status=405)
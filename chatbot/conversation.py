@@ -0,0 +1,127 @@
+# chatbot/conversation.py
+"""
+Conversation history for AgroBot.
+
+Clients that send a ``conversation_id`` get their earlier turns replayed to
+Gemini. Each call sees a rolling window: the newest turns that fit in
+``CHAT_HISTORY_TOKENS`` (at most ``CHAT_HISTORY_MAX_TURNS``), plus a short
+summary of everything older. When turns fall out of the window they are
+folded into a new summary row, so older turns are never read again.
+
+Summaries are extractive rather than another Gemini call: one line per
+dropped turn (its first sentence), keeping the newest lines that fit in
+``CHAT_SUMMARY_TOKENS``.
+Token counts are estimated from UTF-8 length.
+
+Turns and summaries are written inline, not through the background write
+queue: the next message in the conversation reads them back (and takes its
+``seq`` from them), so they must be committed before the reply goes out.
+"""
+import re
+
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError
+
+from .models import Conversation, Summary, Turn
+
+CONVERSATION_ID = re.compile(r'^[A-Za-z0-9_-]{8,64}$')
+_SENTENCE_END = re.compile(r'(?<=[.!?।])\s')
+
+
+def estimate_tokens(text: str) -> int:
+    # ~4 bytes per token: English is ~4 chars/token, Devanagari (3 bytes/char) a bit over 1 char/token
+    return max(1, len(text.encode('utf-8')) // 4)
+
+
+def first_sentence(text: str, limit=160) -> str:
+    sentence = _SENTENCE_END.split(text.strip(), 1)[0].replace('\n', ' ')
+    return sentence if len(sentence) <= limit else sentence[:limit - 1].rstrip() + '…'
+
+
+def summarize(previous, turns, budget) -> str:
+    """Fold ``turns`` (oldest first) into the previous summary, keeping the newest lines that fit."""
+    lines = previous.split('\n') if previous else []
+    for turn in turns:
+        who = 'User asked' if turn.role == 'user' else 'AgroBot answered'
+        lines.append(f"{who}: {first_sentence(turn.text)}")
+    kept, used = [], 0
+    for line in reversed(lines):
+        cost = estimate_tokens(line)
+        if used + cost > budget:
+            break
+        kept.append(line)
+        used += cost
+    return '\n'.join(reversed(kept))
+
+
+class Window:
+    def __init__(self, conversation, summary, turns, next_seq):
+        self.conversation = conversation
+        self.summary = summary  # text or ''
+        self.turns = turns  # oldest first
+        self.next_seq = next_seq
+
+    def __bool__(self):
+        return bool(self.summary or self.turns)
+
+
+async def load_window(key):
+    """Fetch the summary and newest turns for ``key``, summarizing any that no longer fit."""
+    budget = getattr(settings, 'CHAT_HISTORY_TOKENS', 1500)
+    max_turns = getattr(settings, 'CHAT_HISTORY_MAX_TURNS', 20)
+
+    conversation, _ = await Conversation.objects.aget_or_create(key=key)
+    summary = await Summary.objects.filter(conversation=conversation).order_by('-upto_seq').afirst()
+    after = summary.upto_seq if summary else 0
+    # Each request appends at most two turns, so max_turns + 2 covers everything not yet summarized
+    recent = [t async for t in Turn.objects.filter(conversation=conversation, seq__gt=after)
+              .order_by('-seq')[:max_turns + 2]]
+
+    window, used = [], 0
+    for turn in recent:
+        if len(window) == max_turns or used + turn.tokens > budget:
+            break
+        window.append(turn)
+        used += turn.tokens
+    if window and window[-1].role == 'model':
+        window.pop()  # Gemini wants contents to open with a user turn; its question went to the summary
+    overflow = recent[len(window):]
+    summary_text = summary.text if summary else ''
+    if overflow:
+        summary_text = summarize(summary_text, list(reversed(overflow)),
+                                 getattr(settings, 'CHAT_SUMMARY_TOKENS', 300))
+        row = Summary(conversation=conversation, upto_seq=overflow[0].seq,
+                      text=summary_text, tokens=estimate_tokens(summary_text))
+        try:
+            await row.asave(force_insert=True)
+        except IntegrityError:
+            pass  # a concurrent request in the same conversation wrote this summary already
+
+    next_seq = (recent[0].seq if recent else after) + 1
+    return Window(conversation, summary_text, list(reversed(window)), next_seq)
+
+
+APPEND_ATTEMPTS = 3
+
+
+async def append_turns(window, question, answer):
+    seq = window.next_seq
+    for _ in range(APPEND_ATTEMPTS):
+        turns = [
+            Turn(conversation=window.conversation, seq=seq, role='user',
+                 text=question, tokens=estimate_tokens(question)),
+            Turn(conversation=window.conversation, seq=seq + 1, role='model',
+                 text=answer, tokens=estimate_tokens(answer)),
+        ]
+        try:
+            await Turn.objects.abulk_create(turns)
+            return
+        except IntegrityError:
+            # A concurrent request in this conversation took these seqs; append after its turns
+            last = await (Turn.objects.filter(conversation=window.conversation)
+                          .order_by('-seq').values_list('seq', flat=True).afirst())
+            seq = (last or 0) + 1
+        except DatabaseError as e:
+            print(f"Conversation history write skipped: {e}")
+            return
+    print(f"Conversation history write skipped: no free seq after {APPEND_ATTEMPTS} attempts")
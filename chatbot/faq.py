@@ -0,0 +1,128 @@
+# chatbot/faq.py
+"""
+Local FAQ answers for AgroBot.
+
+``chatbot/data/faq.json`` holds curated bilingual answers, each with a few
+question phrasings. The phrasings are run through ``normalize`` and indexed
+as TF-IDF vectors in an inverted index, so a lookup only touches the postings
+of the query's terms. A query is answered locally when its cosine similarity
+to the closest phrasing is at least ``FAQ_MIN_CONFIDENCE``, beats the next
+entry by ``FAQ_MIN_MARGIN`` and shares at least two terms with it; vague
+queries such as "wheat" or "cotton" and everything else still go to Gemini.
+"""
+import json
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.conf import settings
+
+from AgroVistaar.metrics import Stats
+from myapp.registry import registry
+
+from .text import STOPWORDS, normalize
+
+FAQ_PATH = os.path.join(settings.BASE_DIR, 'chatbot', 'data', 'faq.json')
+
+MIN_MATCHED_TERMS = 2  # single-word queries ("cotton") are too vague to answer from the FAQ
+
+_WORD = re.compile('[\\w\u0900-\u097F]+')
+
+
+def tokenize(text: str) -> list:
+    return [t for t in _WORD.findall(normalize(text)) if t not in STOPWORDS]
+
+
+class FAQIndex:
+    def __init__(self, entries):
+        self.entries = entries
+        # One document per question phrasing; doc_entry maps it back to its entry
+        self.doc_entry = []
+        self.postings = defaultdict(list)  # term -> [(doc, tf)]
+        for entry_idx, entry in enumerate(entries):
+            for question in entry['questions']:
+                doc = len(self.doc_entry)
+                self.doc_entry.append(entry_idx)
+                for term, tf in Counter(tokenize(question)).items():
+                    self.postings[term].append((doc, tf))
+        n = len(self.doc_entry)
+        self.idf = {t: math.log((n + 1) / (len(p) + 1)) + 1 for t, p in self.postings.items()}
+        self.unknown_idf = math.log(n + 1) + 1  # an unseen term weighs as much as the rarest
+        norms = [0.0] * n
+        for term, postings in self.postings.items():
+            for doc, tf in postings:
+                norms[doc] += (tf * self.idf[term]) ** 2
+        self.doc_norm = [math.sqrt(x) or 1.0 for x in norms]
+
+        self._lock = threading.Lock()
+        self.lookups = self.answered = 0
+        self.lookup_seconds = 0.0
+
+    @classmethod
+    def load(cls, path=FAQ_PATH):
+        with open(path, encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def search(self, query):
+        """Return (entry, cosine, runner-up cosine, matched terms) for the best entry."""
+        terms = set(tokenize(query))
+        if not terms:
+            return None, 0.0, 0.0, 0
+        dots = defaultdict(float)
+        matched = defaultdict(int)
+        for term in terms:
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for doc, tf in self.postings[term]:
+                dots[doc] += tf * idf * idf
+                matched[doc] += 1
+        if not dots:
+            return None, 0.0, 0.0, 0
+
+        query_norm = math.sqrt(sum(self.idf.get(t, self.unknown_idf) ** 2 for t in terms))
+        by_entry = {}  # entry -> (cosine, doc) of its closest phrasing
+        for doc, dot in dots.items():
+            entry_idx = self.doc_entry[doc]
+            score = dot / (query_norm * self.doc_norm[doc])
+            if score > by_entry.get(entry_idx, (0.0, None))[0]:
+                by_entry[entry_idx] = (score, doc)
+        ranked = sorted(by_entry.items(), key=lambda item: item[1][0], reverse=True)
+        entry_idx, (best, doc) = ranked[0]
+        second = ranked[1][1][0] if len(ranked) > 1 else 0.0
+        return self.entries[entry_idx], best, second, matched[doc]
+
+    def answer(self, query, min_confidence=None):
+        """Return the matching entry if it clears the confidence threshold, else None."""
+        if min_confidence is None:
+            min_confidence = getattr(settings, 'FAQ_MIN_CONFIDENCE', 0.7)
+        start = time.perf_counter()
+        entry, best, second, matched = self.search(query)
+        hit = (entry is not None and matched >= MIN_MATCHED_TERMS and best >= min_confidence
+               and best - second >= getattr(settings, 'FAQ_MIN_MARGIN', 0.2))
+        with self._lock:
+            self.lookups += 1
+            self.answered += hit
+            self.lookup_seconds += time.perf_counter() - start
+        return entry if hit else None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'entries': len(self.entries),
+                'phrasings': len(self.doc_entry),
+                'terms': len(self.postings),
+                'lookups': self.lookups,
+                'answered_locally': self.answered,
+                'offload_rate': round(self.answered / self.lookups, 4) if self.lookups else 0.0,
+                'avg_lookup_us': round(self.lookup_seconds / self.lookups * 1e6, 2) if self.lookups else 0.0,
+                'min_confidence': getattr(settings, 'FAQ_MIN_CONFIDENCE', 0.7),
+            }
+
+
+registry.register('chatbot_faq', FAQIndex.load)
+Stats('agrovistaar_faq', 'Local FAQ index lookups (reported once the index is loaded).',
+      lambda: {(): registry.get('chatbot_faq').stats()} if registry.is_loaded('chatbot_faq') else {})
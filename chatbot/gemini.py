@@ -0,0 +1,118 @@
+# chatbot/gemini.py
+"""
+Long-lived Gemini model handles shared by the chatbot, crops and aisim views.
+
+One ``GeminiModel`` is kept per (view, model_name) for the life of the
+process. It holds the endpoint URLs and the static system prompt already
+JSON-encoded, so a request only serializes its own message. The date and
+location that used to be formatted into every system prompt are sent as a
+one-line context part ahead of the user's message instead, which keeps the
+system prompt byte-identical across requests (and eligible for Gemini's
+prefix caching). Conversation history, when the caller has any, goes in as
+earlier ``contents`` turns with its summary on the context line. Each handle
+records its per-request setup time, from the call until the request is ready
+to send.
+"""
+import json
+import threading
+import time
+
+from django.utils import timezone
+
+from AgroVistaar.metrics import Stats
+
+from . import upstream
+from .resilience import guards
+
+
+def context_line(coords=None) -> str:
+    """Compact per-request context, e.g. 'Date: Sun 2026-10-18. Location: 28.61,77.21.'"""
+    try:
+        location = f"{float(coords['lat']):.2f},{float(coords['lon']):.2f}"
+    except (TypeError, KeyError, ValueError):
+        location = 'unknown'
+    return f"Date: {timezone.localdate().strftime('%a %Y-%m-%d')}. Location: {location}."
+
+
+class GeminiModel:
+    def __init__(self, view, model_name, system_prompt):
+        start = time.perf_counter()
+        self.view = view
+        self.model_name = model_name
+        self.generate_url = upstream.gemini_url(model_name)
+        self.stream_url = upstream.gemini_url(model_name, 'streamGenerateContent')
+        instruction = json.dumps({'parts': [{'text': system_prompt}]}, ensure_ascii=False)
+        self._head = ('{"system_instruction": ' + instruction + ', "contents": ').encode('utf-8')
+        self.init_seconds = time.perf_counter() - start
+
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.setup_seconds = self.setup_max = 0.0
+
+    def body(self, prompt, coords=None, history=None) -> bytes:
+        """``history`` is a ``chatbot.conversation.Window`` (or None) of earlier turns."""
+        contents = []
+        context = context_line(coords)
+        if history:
+            contents = [{'role': turn.role, 'parts': [{'text': turn.text}]} for turn in history.turns]
+            if history.summary:
+                context += f" Earlier in this conversation: {history.summary}"
+        contents.append({'role': 'user', 'parts': [{'text': context}, {'text': prompt}]})
+        return self._head + json.dumps(contents, ensure_ascii=False).encode('utf-8') + b'}'
+
+    def _prepare(self, prompt, coords, history=None):
+        start = time.perf_counter()
+        body = self.body(prompt, coords, history)
+        client = upstream.get_client()
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.requests += 1
+            self.setup_seconds += elapsed
+            self.setup_max = max(self.setup_max, elapsed)
+        return body, client
+
+    async def generate(self, prompt, coords=None, timeout=None, history=None) -> str:
+        body, client = self._prepare(prompt, coords, history)
+        return await guards['gemini'].call(upstream.gemini_generate, self.generate_url, body,
+                                           timeout=timeout, client=client)
+
+    async def stream(self, prompt, coords=None, timeout=None, history=None):
+        body, client = self._prepare(prompt, coords, history)
+        chunks = upstream.gemini_stream(self.stream_url, body, timeout=timeout, client=client)
+        async for text in guards['gemini'].stream(chunks):
+            yield text
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'init_us': round(self.init_seconds * 1e6, 1),
+                'avg_setup_us': round(self.setup_seconds / self.requests * 1e6, 1) if self.requests else 0.0,
+                'max_setup_us': round(self.setup_max * 1e6, 1),
+            }
+
+
+class ModelPool:
+    def __init__(self):
+        self._models = {}
+        self._lock = threading.Lock()
+
+    def get(self, view, model_name, system_prompt) -> GeminiModel:
+        key = (view, model_name)
+        model = self._models.get(key)
+        if model is None:
+            with self._lock:
+                model = self._models.get(key)
+                if model is None:
+                    model = self._models[key] = GeminiModel(view, model_name, system_prompt)
+        return model
+
+    def stats(self) -> dict:
+        with self._lock:
+            models = dict(self._models)
+        return {f"{view}:{name}": model.stats() for (view, name), model in models.items()}
+
+
+gemini_pool = ModelPool()
+Stats('agrovistaar_gemini_model', 'Pooled Gemini model setup, per view:model.',
+      lambda: {(model,): stats for model, stats in gemini_pool.stats().items()}, ('model',))
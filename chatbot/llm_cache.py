@@ -0,0 +1,116 @@
+# chatbot/llm_cache.py
+"""
+Shared response cache for the Gemini-backed views (chatbot, crops, aisim).
+
+Answers are keyed on the view, the normalized query text, a coarse location
+bucket and the current date (the prompts embed both), so the same question
+from the same area on the same day is answered without calling Gemini.
+Storage is whichever Django cache backend the ``llm`` alias in ``CACHES``
+points at (local memory, files, or a SQLite-backed DB table), which also
+provides the TTL and size-bounded culling; this module adds hit/miss stats.
+"""
+import hashlib
+import threading
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+
+from AgroVistaar.metrics import Stats
+
+from .text import normalize
+
+
+def location_bucket(coords, precision=None) -> str:
+    """Round lat/lon to a coarse grid cell ('unknown' without usable coords)."""
+    if precision is None:
+        precision = getattr(settings, 'LLM_CACHE_LOCATION_PRECISION', 1)
+    try:
+        lat, lon = float(coords['lat']), float(coords['lon'])
+    except (TypeError, KeyError, ValueError):
+        return 'unknown'
+    return f"{round(lat, precision)}:{round(lon, precision)}"
+
+
+class LLMResponseCache:
+    def __init__(self, alias='llm'):
+        self.alias = alias
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    @property
+    def backend(self):
+        return caches[self.alias]
+
+    def make_key(self, view, query, coords=None) -> str:
+        raw = '|'.join([view, normalize(query), location_bucket(coords), timezone.localdate().isoformat()])
+        return f"llm:{view}:{hashlib.sha1(raw.encode('utf-8')).hexdigest()}"
+
+    def _count(self, view, field):
+        with self._lock:
+            entry = self._stats.setdefault(view, {'hits': 0, 'misses': 0, 'sets': 0, 'errors': 0})
+            entry[field] += 1
+
+    def get(self, view, query, coords=None):
+        if not getattr(settings, 'LLM_CACHE_ENABLED', True):
+            return None
+        try:
+            value = self.backend.get(self.make_key(view, query, coords))
+        except Exception as e:
+            print(f"LLM cache read error: {e}")
+            self._count(view, 'errors')
+            return None
+        self._count(view, 'hits' if value is not None else 'misses')
+        return value
+
+    def set(self, view, query, coords, response):
+        if not getattr(settings, 'LLM_CACHE_ENABLED', True) or not response:
+            return
+        try:
+            self.backend.set(self.make_key(view, query, coords), response)
+            self._count(view, 'sets')
+        except Exception as e:
+            print(f"LLM cache write error: {e}")
+            self._count(view, 'errors')
+
+    # Async variants for the async views (DB/file backends run in a thread)
+    async def aget(self, view, query, coords=None):
+        if not getattr(settings, 'LLM_CACHE_ENABLED', True):
+            return None
+        try:
+            value = await self.backend.aget(self.make_key(view, query, coords))
+        except Exception as e:
+            print(f"LLM cache read error: {e}")
+            self._count(view, 'errors')
+            return None
+        self._count(view, 'hits' if value is not None else 'misses')
+        return value
+
+    async def aset(self, view, query, coords, response):
+        if not getattr(settings, 'LLM_CACHE_ENABLED', True) or not response:
+            return
+        try:
+            await self.backend.aset(self.make_key(view, query, coords), response)
+            self._count(view, 'sets')
+        except Exception as e:
+            print(f"LLM cache write error: {e}")
+            self._count(view, 'errors')
+
+    def stats(self) -> dict:
+        with self._lock:
+            views = {view: dict(entry) for view, entry in self._stats.items()}
+        for entry in views.values():
+            lookups = entry['hits'] + entry['misses']
+            entry['hit_rate'] = round(entry['hits'] / lookups, 4) if lookups else 0.0
+        hits = sum(e['hits'] for e in views.values())
+        lookups = hits + sum(e['misses'] for e in views.values())
+        return {
+            'backend': self.backend.__class__.__name__,
+            'hit_rate': round(hits / lookups, 4) if lookups else 0.0,
+            'views': views,
+        }
+
+
+llm_cache = LLMResponseCache()
+Stats('agrovistaar_llm_cache', 'Shared LLM response cache, per view.',
+      lambda: {(view,): entry for view, entry in llm_cache.stats()['views'].items()}, ('view',))
@@ -0,0 +1,83 @@
+import re
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+
+from chatbot.text import analyze
+
+CORPUS_PATH = Path(__file__).resolve().parents[2] / 'data' / 'hinglish_messages.txt'
+
+# Previous implementation: one uncompiled re.sub per rule, then substring checks for intents
+LEGACY_REPLACEMENTS = {
+    r'\bu\b': 'you',
+    r'\br\b': 'are',
+    r'\bpls\b|\bplz\b': 'please',
+    r'\bthx\b|\btnx\b': 'thanks',
+    r'\bok\b|\bokay\b|\bthik hai\b|\btheek hai\b': 'ok',
+    r'\bya\b|\bhaan\b|\byes\b': 'yes',
+    r'\bna\b|\bnahi\b|\bno\b': 'no',
+    r'\bhi\b|\bhello\b|\bnamaste\b|\bhola\b': 'hello',
+    r'\bbye\b|\bbye bye\b|\balvida\b': 'bye',
+    r'\bmausam\b|\bvedar\b': 'weather',
+    r'\bfasal\b|\bfassal\b|\bcrop\b': 'crop',
+    r'\brog\b|\bbimari\b': 'disease',
+    r'\bkhad\b|\burvarak\b': 'fertilizer',
+    r'\bbeej\b|\bbeejon\b': 'seeds',
+    r'\bsinchai\b|\bpani\b': 'irrigation',
+    r'\bke baare me batao\b|\bke baare me bataiye\b|\bbatao\b': '',
+    r'\bkaise kare\b|\bkaise karen\b': 'how to do',
+    r'\bhelp\b|\bmadad\b|\bany help\b': 'help',
+    r'\bthank you\b|\bthanks\b|\bdhanyavad\b': 'thank you',
+    r'\bgovernment\b|\byojana\b|\bsubsidy\b|\bscheme\b': 'scheme',
+}
+
+
+def legacy_normalize(text):
+    text = text.lower()
+    for pat, rep in LEGACY_REPLACEMENTS.items():
+        text = re.sub(pat, rep, text)
+    text = re.sub(r'\s+', ' ', text)
+    return text.strip()
+
+
+def legacy_route(message):
+    input_text = legacy_normalize(message)
+    for key in ('hello', 'thank you', 'ok', 'bye'):
+        if key in input_text:
+            return input_text
+    if "weather" in input_text or "mausam" in input_text:
+        return input_text
+    if "scheme" in input_text:
+        any(k in input_text for k in ["pm kisan", "soil health card", "kisan credit card"])
+    return input_text
+
+
+class Command(BaseCommand):
+    help = "Per-message cost of chatbot normalization + intent detection over a Hinglish corpus, old vs new."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--corpus', default=str(CORPUS_PATH))
+        parser.add_argument('--repeat', type=int, default=200)
+
+    def time_per_message(self, fn, messages, repeat):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for msg in messages:
+                fn(msg)
+        return (time.perf_counter() - start) / (repeat * len(messages)) * 1e6
+
+    def handle(self, *args, **options):
+        messages = [line.strip() for line in open(options['corpus'], encoding='utf-8') if line.strip()]
+
+        mismatches = [m for m in messages if legacy_normalize(m) != analyze(m)[0]]
+        for m in mismatches:
+            self.stdout.write(f"  differs: {m!r}: {legacy_normalize(m)!r} vs {analyze(m)[0]!r}")
+
+        legacy = self.time_per_message(legacy_route, messages, options['repeat'])
+        single = self.time_per_message(analyze, messages, options['repeat'])
+        self.stdout.write(f"{len(messages)} messages x {options['repeat']}, "
+                          f"{len(messages) - len(mismatches)}/{len(messages)} normalize to the same text")
+        self.stdout.write(f"legacy (re.sub per rule + substring intents): {legacy:8.2f} us/message")
+        self.stdout.write(f"single pass (analyze):                       {single:8.2f} us/message "
+                          f"({legacy / single:.1f}x)")
@@ -0,0 +1,53 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from chatbot.faq import FAQIndex, FAQ_PATH
+from chatbot.text import analyze
+
+from .bench_normalize import CORPUS_PATH
+
+ROUTED_INTENTS = {'greeting', 'thanks', 'ok', 'bye', 'weather'}
+
+
+class Command(BaseCommand):
+    help = ("Share of messages that would reach Gemini which the local FAQ index answers instead, "
+            "with per-lookup latency.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--corpus', default=str(CORPUS_PATH), help="One message per line.")
+        parser.add_argument('--faq', default=FAQ_PATH)
+        parser.add_argument('--min-confidence', type=float, default=None)
+        parser.add_argument('--verbose', action='store_true', help="Print every message and its route.")
+
+    def handle(self, *args, **options):
+        index = FAQIndex.load(options['faq'])
+        messages = [line.strip() for line in open(options['corpus'], encoding='utf-8') if line.strip()]
+
+        # Same routing order as chat_view: fixed replies and weather never reach the FAQ or Gemini,
+        # and an unnamed scheme question the FAQ can't answer gets the clarification reply
+        answered = to_gemini = 0
+        lookups, elapsed = 0, 0.0
+        for message in messages:
+            _, intents = analyze(message)
+            if intents & ROUTED_INTENTS:
+                continue
+            start = time.perf_counter()
+            entry = index.answer(message, options['min_confidence'])
+            elapsed += time.perf_counter() - start
+            lookups += 1
+            if entry is not None:
+                answered += 1
+                route = entry['id']
+            elif 'scheme' in intents and 'scheme_name' not in intents:
+                route = '(which scheme?)'
+            else:
+                to_gemini += 1
+                route = '-> gemini'
+            if options['verbose']:
+                self.stdout.write(f"  {route:<22} {message}")
+
+        candidates = answered + to_gemini
+        self.stdout.write(f"{len(messages)} messages, {candidates} would otherwise reach Gemini")
+        self.stdout.write(f"answered locally: {answered}/{candidates} ({answered / max(candidates, 1):.1%} offload)")
+        self.stdout.write(f"avg lookup: {elapsed / max(lookups, 1) * 1e6:.1f} us")
@@ -0,0 +1,213 @@
+import asyncio
+import io
+import json
+import threading
+import time
+
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from chatbot.resilience import guards
+from chatbot.stubs import StubUpstream
+
+ENDPOINTS = {
+    'chat': ('/chatbot/api/', lambda i: {'message': f'How much urea for wheat field {i}?'}),
+    'weather': ('/chatbot/api/', lambda i: {'message': 'mausam kaisa hai', 'coords': {'lat': 28.6, 'lon': 77.2}}),
+    'crops': ('/crops/', lambda i: {'message': f'Rice growth duration in field {i}'}),
+    'aisim': ('/ai_simulator/', lambda i: {'message': f'What if I grow maize instead of rice on plot {i}?'}),
+}
+
+
+# crops/aisim are CSRF-protected; a matching cookie + header pair passes the check over plain HTTP
+CSRF_TOKEN = 'loadtest' * 4
+
+# ---------------- In-process clients ----------------
+# Both call the application directly so time-to-first-byte is observed at the
+# first non-empty body chunk rather than after a client library buffers it.
+async def asgi_post(app, path, payload):
+    body = json.dumps(payload).encode('utf-8')
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'POST',
+        'scheme': 'http', 'path': path, 'raw_path': path.encode(), 'query_string': b'', 'root_path': '',
+        'headers': [(b'host', b'testserver'), (b'content-type', b'application/json'),
+                    (b'content-length', str(len(body)).encode()),
+                    (b'cookie', f'csrftoken={CSRF_TOKEN}'.encode()), (b'x-csrftoken', CSRF_TOKEN.encode())],
+        'client': ('127.0.0.1', 0), 'server': ('testserver', 80),
+    }
+    sent = False
+    state = {'status': None, 'ttfb': None}
+    start = time.perf_counter()
+
+    async def receive():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {'type': 'http.request', 'body': body, 'more_body': False}
+        await asyncio.Event().wait()  # no disconnect until the app finishes
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            state['status'] = message['status']
+        elif message['type'] == 'http.response.body' and message.get('body') and state['ttfb'] is None:
+            state['ttfb'] = time.perf_counter() - start
+
+    await app(scope, receive, send)
+    total = time.perf_counter() - start
+    return state['status'], state['ttfb'] or total, total
+
+
+def wsgi_post(app, path, payload):
+    body = json.dumps(payload).encode('utf-8')
+    environ = {
+        'REQUEST_METHOD': 'POST', 'PATH_INFO': path, 'SCRIPT_NAME': '', 'QUERY_STRING': '',
+        'SERVER_NAME': 'testserver', 'SERVER_PORT': '80', 'SERVER_PROTOCOL': 'HTTP/1.1', 'HTTP_HOST': 'testserver',
+        'CONTENT_TYPE': 'application/json', 'CONTENT_LENGTH': str(len(body)), 'REMOTE_ADDR': '127.0.0.1',
+        'HTTP_COOKIE': f'csrftoken={CSRF_TOKEN}', 'HTTP_X_CSRFTOKEN': CSRF_TOKEN,
+        'wsgi.input': io.BytesIO(body), 'wsgi.errors': io.StringIO(), 'wsgi.url_scheme': 'http',
+        'wsgi.version': (1, 0), 'wsgi.multithread': True, 'wsgi.multiprocess': False, 'wsgi.run_once': False,
+    }
+    state = {'status': None}
+    start = time.perf_counter()
+    ttfb = None
+
+    def start_response(status, headers, exc_info=None):
+        state['status'] = int(status.split(' ', 1)[0])
+
+    result = app(environ, start_response)
+    try:
+        for chunk in result:
+            if chunk and ttfb is None:
+                ttfb = time.perf_counter() - start
+    finally:
+        if hasattr(result, 'close'):
+            result.close()
+    total = time.perf_counter() - start
+    return state['status'], ttfb or total, total
+
+
+def summarize(samples, elapsed):
+    ttfb = np.array([s[1] for s in samples]) * 1000.0
+    total = np.array([s[2] for s in samples]) * 1000.0
+    return {
+        'rps': len(samples) / elapsed if elapsed else 0.0,
+        'ttfb_p50': float(np.percentile(ttfb, 50)),
+        'ttfb_p99': float(np.percentile(ttfb, 99)),
+        'p50': float(np.percentile(total, 50)),
+        'p99': float(np.percentile(total, 99)),
+        'ok': sum(1 for s in samples if s[0] == 200),
+        'total': len(samples),
+    }
+
+
+class Command(BaseCommand):
+    help = ("Load-test the Gemini/weather views against a local stub upstream with injected latency, "
+            "comparing the async (ASGI, one worker) path with N blocking WSGI workers.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--endpoint', choices=sorted(ENDPOINTS), default='chat')
+        parser.add_argument('--levels', default='1,10,50,100', help="Comma-separated client concurrency levels.")
+        parser.add_argument('--requests', type=int, default=200, help="Requests per level.")
+        parser.add_argument('--latency', type=float, default=0.5, help="Stub time to first token, in seconds.")
+        parser.add_argument('--chunk-delay', type=float, default=0.0, help="Stub delay between streamed chunks.")
+        parser.add_argument('--stream', choices=['ndjson', 'sse'], help="Request the streaming chat mode.")
+        parser.add_argument('--error-rate', type=float, default=0.0, help="Share of stub calls that fail with 503.")
+        parser.add_argument('--mode', choices=['asgi', 'wsgi', 'both'], default='both')
+        parser.add_argument('--workers', type=int, default=4, help="Sync worker count emulated in wsgi mode.")
+
+    # ---------------- Runners ----------------
+    def run_asgi(self, path, payloads, concurrency):
+        from django.core.asgi import get_asgi_application
+        app = get_asgi_application()
+
+        async def main():
+            samples = []
+            sem = asyncio.Semaphore(concurrency)
+
+            async def one(payload):
+                async with sem:
+                    samples.append(await asgi_post(app, path, payload))
+
+            start = time.perf_counter()
+            await asyncio.gather(*(one(p) for p in payloads))
+            return samples, time.perf_counter() - start
+
+        return asyncio.run(main())
+
+    def run_wsgi(self, path, payloads, concurrency, workers):
+        from django.core.wsgi import get_wsgi_application
+        app = get_wsgi_application()
+        worker_slots = threading.Semaphore(workers)  # a sync server only runs `workers` requests at once
+        samples = []
+        lock = threading.Lock()
+        queue = list(payloads)
+
+        def client_loop():
+            while True:
+                with lock:
+                    if not queue:
+                        return
+                    payload = queue.pop()
+                start = time.perf_counter()
+                with worker_slots:
+                    queued = time.perf_counter() - start  # time spent waiting for a free worker
+                    status, ttfb, total = wsgi_post(app, path, payload)
+                with lock:
+                    samples.append((status, ttfb + queued, total + queued))
+
+        threads = [threading.Thread(target=client_loop) for _ in range(concurrency)]
+        start = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        return samples, time.perf_counter() - start
+
+    # ---------------- Main ----------------
+    def handle(self, *args, **options):
+        path, make_payload = ENDPOINTS[options['endpoint']]
+        levels = [int(x) for x in options['levels'].split(',') if x]
+        modes = ['wsgi', 'asgi'] if options['mode'] == 'both' else [options['mode']]
+
+        stub = StubUpstream(latency=options['latency'], chunk_delay=options['chunk_delay'],
+                            error_rate=options['error_rate'])
+        with stub:
+            settings.GEMINI_API_BASE = stub.url
+            settings.OPENWEATHER_API_BASE = stub.url
+            settings.GEMINI_API_KEY = settings.GEMINI_API_KEY or 'stub-key'
+            settings.LLM_CACHE_ENABLED = False
+            if 'testserver' not in settings.ALLOWED_HOSTS:
+                settings.ALLOWED_HOSTS = list(settings.ALLOWED_HOSTS) + ['testserver']
+
+            def payload(i):
+                data = make_payload(i)
+                if options['stream']:
+                    data['stream'] = options['stream']
+                return data
+
+            self.stdout.write(f"endpoint {path} ({options['endpoint']}{', ' + options['stream'] if options['stream'] else ''}), "
+                              f"stub latency {options['latency']}s + {options['chunk_delay']}s/chunk, "
+                              f"{options['requests']} requests per level")
+            self.stdout.write(f"{'mode':<10} {'clients':>7} {'req/s':>8} {'ttfb p50':>9} {'ttfb p99':>9} "
+                              f"{'p50 ms':>9} {'p99 ms':>9} {'ok':>9}")
+            for mode in modes:
+                label = f"wsgi x{options['workers']}" if mode == 'wsgi' else 'asgi x1'
+                for level in levels:
+                    payloads = [payload(i) for i in range(options['requests'])]
+                    if mode == 'asgi':
+                        result = summarize(*self.run_asgi(path, payloads, level))
+                    else:
+                        result = summarize(*self.run_wsgi(path, payloads, level, options['workers']))
+                    self.stdout.write(
+                        f"{label:<10} {level:>7} {result['rps']:>8.1f} {result['ttfb_p50']:>9.1f} "
+                        f"{result['ttfb_p99']:>9.1f} {result['p50']:>9.1f} {result['p99']:>9.1f} "
+                        f"{result['ok']:>4}/{result['total']:<4}"
+                    )
+                    for name, g in guards.stats().items():
+                        self.stdout.write(
+                            f"{'':<10} {name}: {g['state']}, calls {g['calls']}, failures {g['failures']}, "
+                            f"timeouts {g['timeouts']}, shed {g['shed']}, fast-failed {g['fast_failed']}, "
+                            f"max in flight {g['max_in_flight']}/{g['max_concurrency']}, upstream hits {stub.requests}"
+                        )
+                    guards.reset()
+                    stub.requests = 0
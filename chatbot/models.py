@@ -1,3 +1,46 @@
 from django.db import models
 
-# Create your models here.
+
+# ---------------- Conversation history (chatbot.conversation) ----------------
+# Turns and summaries are append-only; reads go through the (conversation, seq)
+# and (conversation, upto_seq) unique indexes newest-first with a LIMIT, so a
+# history fetch costs O(window) however long the conversation gets.
+class Conversation(models.Model):
+    key = models.CharField(max_length=64, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.key
+
+
+class Turn(models.Model):
+    ROLE_CHOICES = [('user', 'User'), ('model', 'AgroBot')]
+
+    conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, related_name='turns')
+    seq = models.PositiveIntegerField()
+    role = models.CharField(max_length=5, choices=ROLE_CHOICES)
+    text = models.TextField()
+    tokens = models.PositiveIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['conversation', 'seq'], name='chatbot_turn_conversation_seq'),
+        ]
+
+    def __str__(self):
+        return f"{self.conversation_id}#{self.seq} {self.role}"
+
+
+class Summary(models.Model):
+    """Rolling summary of every turn up to and including ``upto_seq``."""
+    conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, related_name='summaries')
+    upto_seq = models.PositiveIntegerField()
+    text = models.TextField()
+    tokens = models.PositiveIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['conversation', 'upto_seq'], name='chatbot_summary_conversation_seq'),
+        ]
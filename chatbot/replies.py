@@ -0,0 +1,36 @@
+# chatbot/replies.py
+"""
+Bilingual JSON replies shared by the chatbot, crops and aisim views.
+
+Clients may pass ``lang`` ('hi' or 'en') as a query parameter or JSON field
+to get only ``reply_hi`` or ``reply_en`` back. Gemini answers in both
+languages in one text, which ``ai_reply`` splits instead of sending it twice.
+Replies are written as UTF-8 rather than ``\\u`` escapes, which would double
+the size of Devanagari text.
+"""
+from django.http import JsonResponse
+
+from .text import split_bilingual
+
+LANGS = ('hi', 'en')
+
+
+def requested_lang(request, data=None):
+    lang = request.GET.get('lang') or (data.get('lang') if isinstance(data, dict) else None)
+    return lang if lang in LANGS else None
+
+
+UTF8 = {'ensure_ascii': False}
+
+
+def reply(hi, en, lang=None, status=200):
+    if lang:
+        payload = {f'reply_{lang}': hi if lang == 'hi' else en}
+    else:
+        payload = {'reply_hi': hi, 'reply_en': en}
+    return JsonResponse(payload, status=status, json_dumps_params=UTF8)
+
+
+def ai_reply(text, lang=None, status=200):
+    hi, en = split_bilingual(text)
+    return reply(hi, en, lang, status)
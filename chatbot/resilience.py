@@ -0,0 +1,237 @@
+# chatbot/resilience.py
+"""
+Bounded concurrency, deadlines and circuit breaking for outbound AI calls.
+
+Each upstream (``gemini``, ``weather``) gets a ``Guard`` configured from
+``UPSTREAM_LIMITS``:
+
+* at most ``max_concurrency`` calls in flight per process, counted across
+  threads and event loops (under WSGI every request runs in a loop of its
+  own); a caller that cannot get a slot within ``queue_timeout`` seconds is
+  shed (``Overloaded``) instead of piling up behind a slow upstream;
+* every call must finish within ``deadline`` seconds;
+* after ``failure_threshold`` consecutive failures (timeouts, transport
+  errors, 429/5xx) the breaker opens and calls fail fast (``CircuitOpen``)
+  for ``reset_timeout`` seconds, then a single probe decides whether to close.
+  Calls that end otherwise (cancelled, a 4xx, a bad response) say nothing
+  about the upstream's health and leave the breaker as it is.
+
+Views catch ``Unavailable`` and answer with their usual bilingual error.
+"""
+import asyncio
+import threading
+import time
+
+import httpx
+from django.conf import settings
+
+from AgroVistaar.metrics import Stats
+
+from .upstream import UpstreamError
+
+DEFAULT_LIMITS = {
+    'max_concurrency': 50,
+    'queue_timeout': 2.0,
+    'deadline': 25.0,
+    'failure_threshold': 5,
+    'reset_timeout': 30.0,
+}
+
+SLOT_POLL_INTERVAL = 0.01  # seconds between retries while waiting for a free slot
+
+
+class Unavailable(UpstreamError):
+    """Call refused locally without contacting the upstream."""
+
+
+class Overloaded(Unavailable):
+    pass
+
+
+class CircuitOpen(Unavailable):
+    pass
+
+
+def is_upstream_failure(exc) -> bool:
+    """Errors that say the upstream is unhealthy (not that our request was bad)."""
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code == 429 or exc.response.status_code >= 500
+    return isinstance(exc, (asyncio.TimeoutError, httpx.TransportError))
+
+
+class Guard:
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+    def __init__(self, name, max_concurrency, queue_timeout, deadline, failure_threshold, reset_timeout):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.queue_timeout = queue_timeout
+        self.deadline = deadline
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self._lock = threading.Lock()
+        self.state = self.CLOSED
+        self.opened_at = 0.0
+        self.consecutive_failures = 0
+        self._probing = False
+        self.counters = dict.fromkeys(
+            ['calls', 'successes', 'failures', 'neutral', 'timeouts', 'shed', 'fast_failed', 'opened'], 0)
+        self.in_flight = self.max_in_flight = 0
+
+    @classmethod
+    def from_settings(cls, name):
+        limits = dict(DEFAULT_LIMITS, **getattr(settings, 'UPSTREAM_LIMITS', {}).get(name, {}))
+        return cls(name, **limits)
+
+    def _count(self, field, n=1):
+        with self._lock:
+            self.counters[field] += n
+
+    def _take_slot(self) -> bool:
+        with self._lock:
+            if self.in_flight >= self.max_concurrency:
+                return False
+            self.counters['calls'] += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            return True
+
+    # ---------------- Breaker ----------------
+    def _admit(self):
+        with self._lock:
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at < self.reset_timeout:
+                    self.counters['fast_failed'] += 1
+                    raise CircuitOpen(f"{self.name}: circuit open")
+                self.state = self.HALF_OPEN
+            if self.state == self.HALF_OPEN:
+                if self._probing:
+                    self.counters['fast_failed'] += 1
+                    raise CircuitOpen(f"{self.name}: circuit half-open, probe in flight")
+                self._probing = True
+                return True
+            return False
+
+    def _record(self, ok, probe):
+        """Count an outcome: True closes the breaker, False counts towards opening it, None is neutral."""
+        with self._lock:
+            if probe:
+                self._probing = False
+            if ok is None:
+                self.counters['neutral'] += 1
+                return
+            if ok:
+                self.counters['successes'] += 1
+                self.consecutive_failures = 0
+                self.state = self.CLOSED
+                return
+            self.counters['failures'] += 1
+            self.consecutive_failures += 1
+            if probe or (self.state == self.CLOSED and self.consecutive_failures >= self.failure_threshold):
+                if self.state != self.OPEN:
+                    self.counters['opened'] += 1
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    # ---------------- Calls ----------------
+    async def _enter(self):
+        probe = self._admit()
+        give_up = time.monotonic() + self.queue_timeout
+        try:
+            while not self._take_slot():
+                if time.monotonic() >= give_up:
+                    self._count('shed')
+                    raise Overloaded(f"{self.name}: {self.max_concurrency} calls in flight")
+                await asyncio.sleep(SLOT_POLL_INTERVAL)
+        except BaseException:
+            if probe:
+                with self._lock:
+                    self._probing = False
+            raise
+        return probe
+
+    def _exit(self, probe, exc):
+        with self._lock:
+            self.in_flight -= 1
+        if isinstance(exc, asyncio.TimeoutError):
+            self._count('timeouts')
+        if exc is None:
+            self._record(True, probe)
+        elif is_upstream_failure(exc):
+            self._record(False, probe)
+        else:
+            self._record(None, probe)
+
+    async def call(self, coro_fn, *args, **kwargs):
+        """Run ``await coro_fn(*args, **kwargs)`` under the slot limit, deadline and breaker."""
+        probe = await self._enter()
+        exc = None
+        try:
+            return await asyncio.wait_for(coro_fn(*args, **kwargs), timeout=self.deadline)
+        except BaseException as e:
+            exc = e
+            raise
+        finally:
+            self._exit(probe, exc)
+
+    async def stream(self, agen):
+        """Relay an async generator, holding a slot until it finishes; the deadline covers the whole stream."""
+        probe = await self._enter()
+        loop = asyncio.get_running_loop()
+        end = loop.time() + self.deadline
+        exc = None
+        try:
+            while True:
+                try:
+                    item = await asyncio.wait_for(agen.__anext__(), timeout=max(0.0, end - loop.time()))
+                except StopAsyncIteration:
+                    break
+                yield item
+        except BaseException as e:
+            exc = e
+            raise
+        finally:
+            await agen.aclose()
+            self._exit(probe, exc)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(
+                self.counters,
+                state=self.state,
+                in_flight=self.in_flight,
+                max_in_flight=self.max_in_flight,
+                max_concurrency=self.max_concurrency,
+                consecutive_failures=self.consecutive_failures,
+            )
+
+
+class GuardSet:
+    def __init__(self):
+        self._guards = {}
+        self._lock = threading.Lock()
+
+    def __getitem__(self, name) -> Guard:
+        guard = self._guards.get(name)
+        if guard is None:
+            with self._lock:
+                guard = self._guards.get(name)
+                if guard is None:
+                    guard = self._guards[name] = Guard.from_settings(name)
+        return guard
+
+    def reset(self):
+        with self._lock:
+            self._guards.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            guards = dict(self._guards)
+        return {name: guard.stats() for name, guard in guards.items()}
+
+
+guards = GuardSet()
+Stats('agrovistaar_upstream_guard', 'Outbound call limits and circuit breaker, per service.',
+      lambda: {(name,): dict(stats, circuit_open=stats['state'] != Guard.CLOSED)
+               for name, stats in guards.stats().items()}, ('service',))
@@ -0,0 +1,137 @@
+# chatbot/stubs.py
+"""
+Local stand-in for the Gemini and OpenWeather HTTP APIs, for load tests.
+
+Runs a threaded HTTP server that answers ``...:generateContent``,
+``...:streamGenerateContent?alt=sse`` and ``/data/2.5/weather`` after an
+injected delay (``latency`` to the first token, ``chunk_delay`` between
+streamed chunks) and, with ``error_rate``, fails that share of requests with
+a 503, so capacity can be measured
+without network access or API quota. Point ``GEMINI_API_BASE`` and
+``OPENWEATHER_API_BASE`` at ``StubUpstream.url``.
+"""
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+STUB_REPLY = (
+    "गेहूं के लिए प्रति हेक्टेयर लगभग 120 किलो नाइट्रोजन दें।\n"
+    "For wheat, apply about 120 kg nitrogen per hectare in split doses."
+)
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+
+class StubUpstream:
+    def __init__(self, latency=0.5, weather_latency=None, host='127.0.0.1', port=0, reply=STUB_REPLY,
+                 chunks=8, chunk_delay=0.0, error_rate=0.0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.chunk_delay = chunk_delay
+        self.chunks = max(1, chunks)
+        self.weather_latency = latency if weather_latency is None else weather_latency
+        self.reply = reply
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = _Server((host, port), self._handler_class())
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name='stub-upstream', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def reply_chunks(self):
+        words = self.reply.split(' ')
+        size = -(-len(words) // self.chunks)
+        return [' '.join(words[i:i + size]) + (' ' if i + size < len(words) else '')
+                for i in range(0, len(words), size)]
+
+    def _count(self):
+        with self._lock:
+            self.requests += 1
+
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def _send_json(self, status, payload):
+                body = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _send_stream(self):
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/event-stream')
+                self.send_header('Transfer-Encoding', 'chunked')
+                self.end_headers()
+                time.sleep(stub.latency)
+                for i, text in enumerate(stub.reply_chunks()):
+                    if i:
+                        time.sleep(stub.chunk_delay)
+                    event = {'candidates': [{'content': {'role': 'model', 'parts': [{'text': text}]}}]}
+                    data = f"data: {json.dumps(event)}\r\n\r\n".encode('utf-8')
+                    self.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+                    self.wfile.flush()
+                self.wfile.write(b"0\r\n\r\n")
+
+            def _fail(self):
+                time.sleep(stub.latency)
+                self._send_json(503, {'error': {'code': 503, 'message': 'injected failure'}})
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get('Content-Length') or 0))
+                stub._count()
+                if random.random() < stub.error_rate:
+                    return self._fail()
+                if ':streamGenerateContent' in self.path:
+                    return self._send_stream()
+                if ':generateContent' not in self.path:
+                    return self._send_json(404, {'error': 'not found'})
+                time.sleep(stub.latency + stub.chunk_delay * (len(stub.reply_chunks()) - 1))
+                self._send_json(200, {
+                    'candidates': [{'content': {'role': 'model', 'parts': [{'text': stub.reply}]}}],
+                })
+
+            def do_GET(self):
+                stub._count()
+                if random.random() < stub.error_rate:
+                    return self._fail()
+                if not self.path.startswith('/data/2.5/weather'):
+                    return self._send_json(404, {'error': 'not found'})
+                time.sleep(stub.weather_latency)
+                self._send_json(200, {
+                    'name': 'Stubpur',
+                    'weather': [{'description': 'clear sky'}],
+                    'main': {'temp': 31.5},
+                })
+
+        return Handler
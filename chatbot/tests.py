@@ -1,3 +1,588 @@
-from django.test import TestCase
+import asyncio
+import datetime
+import json
+import threading
+import warnings
+from unittest import mock
 
-# Create your tests here.
+import httpx
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+
+from . import upstream
+from .conversation import append_turns, load_window
+from .faq import FAQIndex
+from .llm_cache import LLMResponseCache, location_bucket
+from .management.commands.bench_normalize import CORPUS_PATH, legacy_normalize
+from .models import Turn
+from .resilience import CircuitOpen, Guard, Overloaded, guards
+from .text import BilingualSplitter, analyze, split_bilingual
+from .weather import WeatherService, cell_center, geohash
+
+
+def legacy_intents(message):
+    """Intents as the chat view detected them before chatbot.text: substring checks on the normalized text."""
+    text = legacy_normalize(message)
+    found = {intent for key, intent in [('hello', 'greeting'), ('thank you', 'thanks'), ('ok', 'ok'), ('bye', 'bye')]
+             if key in text}
+    if 'weather' in text or 'mausam' in text:
+        found.add('weather')
+    if 'scheme' in text:
+        found.add('scheme')
+    if any(k in text for k in ['pm kisan', 'soil health card', 'kisan credit card']):
+        found.add('scheme_name')
+    return found
+
+
+class AnalyzeTests(SimpleTestCase):
+    def test_matches_legacy_on_corpus(self):
+        messages = [line.strip() for line in open(CORPUS_PATH, encoding='utf-8') if line.strip()]
+        self.assertGreater(len(messages), 50)
+        for message in messages:
+            with self.subTest(message=message):
+                text, intents = analyze(message)
+                self.assertEqual(text, legacy_normalize(message))
+                self.assertEqual(set(intents), legacy_intents(message))
+
+    def test_normalized_text(self):
+        cases = {
+            '  Batao   fasal  ': 'crop',
+            'gehu ke baare me batao': 'gehu',
+            'kaise kare   khad plz': 'how to do fertilizer please',
+            'thx u': 'thank you you',
+            'मुझे  गेहूं   बताओ': 'मुझे गेहूं बताओ',
+            'pm kisan': 'pm kisan',
+        }
+        for message, expected in cases.items():
+            with self.subTest(message=message):
+                self.assertEqual(analyze(message)[0], expected)
+
+    def test_intents(self):
+        cases = {
+            'Namaste ji': {'greeting'},
+            'theek hai, bye': {'ok', 'bye'},
+            'PM Kisan yojana': {'scheme', 'scheme_name'},
+            'mausam': {'weather'},
+            'gehu me khad': set(),
+        }
+        for message, expected in cases.items():
+            with self.subTest(message=message):
+                self.assertEqual(analyze(message)[1], frozenset(expected))
+
+    def test_intents_need_whole_words(self):
+        # The old substring checks answered "Okay." to "book" and greeted "othello"
+        self.assertEqual(analyze('book a tractor')[1], frozenset())
+        self.assertEqual(analyze('othello variety')[1], frozenset())
+        self.assertEqual(legacy_intents('book a tractor'), {'ok'})
+
+
+@override_settings(DB_WRITE_QUEUE_ENABLED=True)
+class ConversationTests(TransactionTestCase):
+    async def seqs(self, key):
+        return [(t.seq, t.role, t.text) async for t in Turn.objects.filter(conversation__key=key).order_by('seq')]
+
+    async def test_follow_up_is_stored_after_first_turns(self):
+        window = await load_window('conv-follow-up')
+        await append_turns(window, 'price of tomatoes', 'Tomatoes are ₹20/kg.')
+        window = await load_window('conv-follow-up')
+        self.assertEqual([t.seq for t in window.turns], [1, 2])
+        await append_turns(window, 'and onions', 'Onions are ₹30/kg.')
+        self.assertEqual(await self.seqs('conv-follow-up'), [
+            (1, 'user', 'price of tomatoes'), (2, 'model', 'Tomatoes are ₹20/kg.'),
+            (3, 'user', 'and onions'), (4, 'model', 'Onions are ₹30/kg.'),
+        ])
+
+    async def test_window_starts_with_a_user_turn(self):
+        window = await load_window('conv-window')
+        for i in range(3):
+            await append_turns(window, f'q{i}', f'a{i}')
+            window = await load_window('conv-window')
+        with override_settings(CHAT_HISTORY_MAX_TURNS=3):
+            window = await load_window('conv-window')
+        self.assertEqual([(t.role, t.text) for t in window.turns], [('user', 'q2'), ('model', 'a2')])
+        self.assertIn('AgroBot answered: a1', window.summary)
+        roles = [t.role for t in window.turns]
+        self.assertEqual(roles, ['user', 'model'] * (len(roles) // 2))
+
+    async def test_concurrent_requests_both_keep_their_turns(self):
+        first = await load_window('conv-concurrent')
+        second = await load_window('conv-concurrent')
+        await append_turns(first, 'q1', 'a1')
+        await append_turns(second, 'q2', 'a2')
+        self.assertEqual([seq for seq, _, _ in await self.seqs('conv-concurrent')], [1, 2, 3, 4])
+
+
+REPLY = """**Hindi:**
+गेहूं की बुवाई नवंबर में करें।
+- बीज दर: 100 किलो/हेक्टेयर
+
+**English:**
+Sow wheat (गेहूं) in November.
+- Seed rate: 100 kg/ha
+"""
+
+
+class BilingualSplitTests(SimpleTestCase):
+    def test_labelled_sections(self):
+        hi, en = split_bilingual(REPLY)
+        self.assertEqual(hi, "गेहूं की बुवाई नवंबर में करें।\n- बीज दर: 100 किलो/हेक्टेयर")
+        self.assertEqual(en, "Sow wheat (गेहूं) in November.\n- Seed rate: 100 kg/ha")
+
+    def test_unlabelled_lines_go_by_script(self):
+        hi, en = split_bilingual("Use DAP at sowing.\nबुवाई के समय डीएपी डालें।")
+        self.assertEqual((hi, en), ("बुवाई के समय डीएपी डालें।", "Use DAP at sowing."))
+
+    def test_neutral_lines_stay_in_their_section(self):
+        hi, en = split_bilingual("हिंदी:\n🌾 ✅\nEnglish:\n42")
+        self.assertEqual((hi, en), ("🌾 ✅", "42"))
+        # Before any section they go to both sides
+        self.assertEqual(split_bilingual("🌾\nनमस्ते\nHello"), ("🌾\nनमस्ते", "🌾\nHello"))
+
+    def test_single_language_reply_on_both_sides(self):
+        self.assertEqual(split_bilingual("Only English here."), ("Only English here.", "Only English here."))
+        self.assertEqual(split_bilingual("सिर्फ हिंदी।"), ("सिर्फ हिंदी।", "सिर्फ हिंदी।"))
+
+    def test_splitter_matches_split_bilingual_for_any_chunking(self):
+        hi, en = split_bilingual(REPLY)
+        for size in (1, 3, 7, 20, len(REPLY)):
+            chunks = [REPLY[i:i + size] for i in range(0, len(REPLY), size)]
+            for lang, expected in (('hi', hi), ('en', en)):
+                with self.subTest(size=size, lang=lang):
+                    splitter = BilingualSplitter(lang)
+                    streamed = ''.join(splitter.feed(chunk) for chunk in chunks) + splitter.flush()
+                    self.assertEqual(streamed.strip(), expected)
+
+    def test_splitter_holds_partial_lines(self):
+        splitter = BilingualSplitter('en')
+        self.assertEqual(splitter.feed("Sow in Nov"), '')
+        self.assertEqual(splitter.feed("ember.\nबुवाई"), "Sow in November.\n")
+        self.assertEqual(splitter.flush(), '')
+
+
+def status_error(code):
+    request = httpx.Request('POST', 'https://upstream.example/')
+    return httpx.HTTPStatusError(str(code), request=request, response=httpx.Response(code, request=request))
+
+
+class GuardTests(SimpleTestCase):
+    def guard(self, **limits):
+        defaults = dict(max_concurrency=2, queue_timeout=0.05, deadline=0.2, failure_threshold=3, reset_timeout=60)
+        return Guard('test', **dict(defaults, **limits))
+
+    async def ok(self):
+        return 'ok'
+
+    async def fail(self, exc):
+        raise exc
+
+    async def fail_times(self, guard, n, exc=None):
+        for _ in range(n):
+            with self.assertRaises(type(exc or httpx.ConnectError('down'))):
+                await guard.call(self.fail, exc or httpx.ConnectError('down'))
+
+    async def test_opens_after_consecutive_failures(self):
+        guard = self.guard()
+        await self.fail_times(guard, 2)
+        self.assertEqual(guard.state, Guard.CLOSED)
+        await self.fail_times(guard, 1, status_error(503))
+        self.assertEqual(guard.state, Guard.OPEN)
+        with self.assertRaises(CircuitOpen):
+            await guard.call(self.ok)
+        self.assertEqual(guard.stats()['fast_failed'], 1)
+
+    async def test_success_resets_failure_count(self):
+        guard = self.guard()
+        await self.fail_times(guard, 2)
+        self.assertEqual(await guard.call(self.ok), 'ok')
+        await self.fail_times(guard, 2)
+        self.assertEqual(guard.state, Guard.CLOSED)
+
+    async def test_client_errors_do_not_count(self):
+        guard = self.guard()
+        await self.fail_times(guard, 5, status_error(400))
+        await self.fail_times(guard, 5, ValueError('bad prompt'))
+        self.assertEqual(guard.state, Guard.CLOSED)
+        await self.fail_times(guard, 3, status_error(429))
+        self.assertEqual(guard.state, Guard.OPEN)
+
+    async def test_half_open_probe_closes_or_reopens(self):
+        guard = self.guard()
+        await self.fail_times(guard, 3)
+        guard.opened_at -= guard.reset_timeout  # the reset timeout has passed
+        await self.fail_times(guard, 1)  # the probe fails: open again for another reset_timeout
+        self.assertEqual(guard.state, Guard.OPEN)
+        with self.assertRaises(CircuitOpen):
+            await guard.call(self.ok)
+
+        guard.opened_at -= guard.reset_timeout
+        self.assertEqual(await guard.call(self.ok), 'ok')
+        self.assertEqual(guard.state, Guard.CLOSED)
+
+    async def test_one_probe_at_a_time(self):
+        guard = self.guard()
+        await self.fail_times(guard, 3)
+        guard.opened_at -= guard.reset_timeout
+        release = asyncio.Event()
+
+        async def slow():
+            await release.wait()
+            return 'probe'
+
+        probe = asyncio.create_task(guard.call(slow))
+        await asyncio.sleep(0)
+        self.assertEqual(guard.state, Guard.HALF_OPEN)
+        with self.assertRaises(CircuitOpen):
+            await guard.call(self.ok)
+        release.set()
+        self.assertEqual(await probe, 'probe')
+        self.assertEqual(guard.state, Guard.CLOSED)
+
+    async def test_deadline_counts_as_failure(self):
+        guard = self.guard(failure_threshold=1)
+        with self.assertRaises(asyncio.TimeoutError):
+            await guard.call(asyncio.sleep, 1)
+        self.assertEqual(guard.stats()['timeouts'], 1)
+        self.assertEqual(guard.state, Guard.OPEN)
+
+    async def test_sheds_when_slots_are_full(self):
+        guard = self.guard()
+        release = asyncio.Event()
+        held = [asyncio.create_task(guard.call(release.wait)) for _ in range(2)]
+        await asyncio.sleep(0)
+        with self.assertRaises(Overloaded):
+            await guard.call(self.ok)
+        release.set()
+        await asyncio.gather(*held)
+        stats = guard.stats()
+        self.assertEqual((stats['shed'], stats['max_in_flight'], stats['in_flight']), (1, 2, 0))
+        self.assertEqual(guard.state, Guard.CLOSED)
+
+    async def test_stream_holds_slot_until_done(self):
+        guard = self.guard()
+
+        async def chunks():
+            for chunk in ('a', 'b'):
+                yield chunk
+
+        seen = []
+        async for chunk in guard.stream(chunks()):
+            seen.append((chunk, guard.in_flight))
+        self.assertEqual(seen, [('a', 1), ('b', 1)])
+        self.assertEqual(guard.in_flight, 0)
+
+    async def test_limit_holds_across_event_loops(self):
+        # Under WSGI every request runs its own event loop; the slots are shared by all of them
+        guard = self.guard(max_concurrency=1, queue_timeout=0)
+        started, release = threading.Event(), threading.Event()
+
+        async def held():
+            started.set()
+            await asyncio.to_thread(release.wait, 5)
+
+        other = threading.Thread(target=lambda: asyncio.run(guard.call(held)))
+        other.start()
+        started.wait(5)
+        try:
+            with self.assertRaises(Overloaded):
+                await guard.call(self.ok)
+        finally:
+            release.set()
+            other.join(5)
+        self.assertEqual(await guard.call(self.ok), 'ok')
+        self.assertEqual(guard.stats()['max_in_flight'], 1)
+
+    async def test_waits_for_a_slot_within_queue_timeout(self):
+        guard = self.guard(max_concurrency=1, queue_timeout=1.0)
+        held = asyncio.create_task(guard.call(asyncio.sleep, 0.05))
+        await asyncio.sleep(0)
+        self.assertEqual(await guard.call(self.ok), 'ok')
+        await held
+        self.assertEqual(guard.stats()['shed'], 0)
+
+    async def test_cancelled_probe_leaves_breaker_half_open(self):
+        guard = self.guard()
+        await self.fail_times(guard, 3)
+        guard.opened_at -= guard.reset_timeout
+        probe = asyncio.create_task(guard.call(asyncio.sleep, 10))
+        await asyncio.sleep(0)
+        probe.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await probe
+        self.assertEqual(guard.state, Guard.HALF_OPEN)
+        self.assertEqual((guard.stats()['neutral'], guard.in_flight), (1, 0))
+        # The next call is the probe
+        await self.fail_times(guard, 1)
+        self.assertEqual(guard.state, Guard.OPEN)
+
+    async def test_client_error_probe_does_not_close_breaker(self):
+        guard = self.guard()
+        await self.fail_times(guard, 3)
+        guard.opened_at -= guard.reset_timeout
+        await self.fail_times(guard, 1, status_error(400))
+        self.assertEqual(guard.state, Guard.HALF_OPEN)
+        self.assertEqual(await guard.call(self.ok), 'ok')
+        self.assertEqual(guard.state, Guard.CLOSED)
+
+    async def test_abandoned_stream_is_neutral(self):
+        guard = self.guard()
+
+        async def chunks():
+            yield 'a'
+            yield 'b'
+
+        stream = guard.stream(chunks())
+        self.assertEqual(await stream.__anext__(), 'a')
+        await stream.aclose()  # the client went away mid-reply
+        stats = guard.stats()
+        self.assertEqual((stats['neutral'], stats['successes'], stats['in_flight']), (1, 0, 0))
+
+
+@override_settings(LLM_CACHE_ENABLED=True, LLM_CACHE_LOCATION_PRECISION=1)
+class LLMCacheKeyTests(SimpleTestCase):
+    def setUp(self):
+        self.cache = LLMResponseCache()
+
+    def test_same_question_in_other_spellings_shares_a_key(self):
+        key = self.cache.make_key('chat', 'Mausam kaisa hai')
+        self.assertEqual(self.cache.make_key('chat', '  mausam   KAISA hai '), key)
+        self.assertEqual(self.cache.make_key('chat', 'vedar kaisa hai'), key)
+        self.assertNotEqual(self.cache.make_key('chat', 'mausam kaisa tha'), key)
+
+    def test_view_is_part_of_the_key(self):
+        self.assertNotEqual(self.cache.make_key('chat', 'wheat'), self.cache.make_key('crops', 'wheat'))
+        self.assertTrue(self.cache.make_key('crops', 'wheat').startswith('llm:crops:'))
+
+    def test_location_bucket(self):
+        self.assertEqual(location_bucket({'lat': 28.6139, 'lon': 77.2090}), '28.6:77.2')
+        self.assertEqual(location_bucket({'lat': '28.64', 'lon': '77.21'}), '28.6:77.2')
+        for coords in (None, {}, {'lat': 28.6}, {'lat': 'north', 'lon': 77.2}):
+            with self.subTest(coords=coords):
+                self.assertEqual(location_bucket(coords), 'unknown')
+
+    def test_nearby_coords_share_a_key(self):
+        near = self.cache.make_key('chat', 'weather', {'lat': 28.61, 'lon': 77.21})
+        self.assertEqual(self.cache.make_key('chat', 'weather', {'lat': 28.64, 'lon': 77.18}), near)
+        self.assertNotEqual(self.cache.make_key('chat', 'weather', {'lat': 19.07, 'lon': 72.87}), near)
+        self.assertNotEqual(self.cache.make_key('chat', 'weather'), near)
+
+    def test_date_is_part_of_the_key(self):
+        with mock.patch('chatbot.llm_cache.timezone.localdate', return_value=datetime.date(2025, 3, 1)):
+            today = self.cache.make_key('chat', 'wheat')
+        with mock.patch('chatbot.llm_cache.timezone.localdate', return_value=datetime.date(2025, 3, 2)):
+            self.assertNotEqual(self.cache.make_key('chat', 'wheat'), today)
+
+    def test_round_trip_and_stats(self):
+        self.cache.backend.clear()
+        self.assertIsNone(self.cache.get('chat', 'khad kab dale'))
+        self.cache.set('chat', 'khad kab dale', None, {'reply_en': 'At sowing.'})
+        self.assertEqual(self.cache.get('chat', 'urvarak kab dale'), {'reply_en': 'At sowing.'})
+        stats = self.cache.stats()['views']['chat']
+        self.assertEqual((stats['hits'], stats['misses'], stats['sets'], stats['hit_rate']), (1, 1, 1, 0.5))
+
+    @override_settings(LLM_CACHE_ENABLED=False)
+    def test_disabled(self):
+        self.cache.set('chat', 'wheat', None, {'reply_en': 'x'})
+        self.assertIsNone(self.cache.get('chat', 'wheat'))
+
+
+GEMINI_TEXT = "हिंदी:\nगेहूं नवंबर में बोएं।\nEnglish:\nSow wheat in November."
+GEMINI_CHUNKS = ["हिंदी:\nगेहूं नवंबर", " में बोएं।\nEnglish:\nSow wheat", " in November."]
+
+
+@override_settings(FAQ_MIN_CONFIDENCE=0.7, FAQ_MIN_MARGIN=0.2)
+class FAQIndexTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.faq = FAQIndex.load()
+
+    def answered(self, query, **kwargs):
+        entry = self.faq.answer(query, **kwargs)
+        return entry and entry['id']
+
+    def test_paraphrases_are_answered(self):
+        self.assertEqual(self.answered('How do I apply for a Kisan Credit Card?'), 'kisan_credit_card')
+        self.assertEqual(self.answered('kcc ka interest rate kitna hai'), 'kisan_credit_card')
+        self.assertEqual(self.answered('soil health card benefits kya hain'), 'soil_health_card')
+
+    def test_hindi_and_hinglish(self):
+        self.assertEqual(self.answered('पीएम किसान योजना क्या है'), 'pm_kisan')
+        self.assertEqual(self.answered('PM kisan yojana kya hai bhai'), 'pm_kisan')
+        self.assertEqual(self.answered('mitti ki jaanch kaise karaye'), 'soil_sampling')
+
+    def test_off_topic_goes_to_gemini(self):
+        self.assertIsNone(self.answered('who won the cricket match yesterday'))
+        self.assertIsNone(self.answered('kya hai'))  # stopwords only
+
+    def test_vague_single_term_goes_to_gemini(self):
+        entry, best, _, matched = self.faq.search('wheat')
+        self.assertGreaterEqual(best, 0.7)
+        self.assertEqual(matched, 1)
+        self.assertIsNone(self.answered('wheat'))
+
+    def test_confidence_threshold(self):
+        _, best, _, _ = self.faq.search('pm kisan ki kist kab aayegi')
+        self.assertLess(best, 0.7)
+        self.assertIsNone(self.answered('pm kisan ki kist kab aayegi'))
+        self.assertEqual(self.answered('pm kisan ki kist kab aayegi', min_confidence=best), 'pm_kisan')
+
+    def test_margin_over_runner_up(self):
+        faq = FAQIndex([
+            {'id': 'dose', 'questions': ['wheat fertilizer dose urea']},
+            {'id': 'timing', 'questions': ['wheat fertilizer timing urea']},
+        ])
+        self.assertIsNone(faq.answer('wheat fertilizer urea'))
+        with override_settings(FAQ_MIN_MARGIN=0.0):
+            self.assertIsNotNone(faq.answer('wheat fertilizer urea'))
+        self.assertEqual(faq.answer('wheat fertilizer dose urea')['id'], 'dose')
+        self.assertEqual(faq.stats()['answered_locally'], 2)
+
+
+class WeatherServiceTests(SimpleTestCase):
+    CELL = 360 / 2 ** 13  # width of a precision-5 cell in degrees of longitude
+
+    def setUp(self):
+        guards.reset()
+        self.addCleanup(guards.reset)
+        self.service = WeatherService(precision=5, ttl=600, maxsize=100)
+        self.calls = []
+        self.release = None
+
+    async def fetch_weather(self, lat, lon):
+        self.calls.append((lat, lon))
+        if self.release is not None:
+            await self.release.wait()
+        return {'name': 'Delhi', 'coord': [lat, lon]}
+
+    def test_geohash(self):
+        self.assertEqual(geohash(57.64911, 10.40744, 11), 'u4pruydqqvj')
+        self.assertEqual(geohash(28.6139, 77.2090), 'ttnfu')
+
+    def test_cell_boundaries(self):
+        # A point on a boundary belongs to the cell above/right of it
+        self.assertEqual(geohash(0.0, 0.0), 's0000')
+        self.assertEqual(geohash(0.0, -1e-9), 'ebpbp')
+        self.assertEqual(geohash(-1e-9, 0.0), 'kpbpb')
+        boundary = 3 * self.CELL
+        self.assertEqual(geohash(28.6, boundary), geohash(28.6, boundary + self.CELL / 2))
+        self.assertNotEqual(geohash(28.6, boundary), geohash(28.6, boundary - 1e-9))
+
+    def test_cell_center_round_trips(self):
+        for lat, lon in ((28.6139, 77.2090), (-33.86, 151.2), (0.0, 0.0), (89.99, -179.99)):
+            cell = geohash(lat, lon)
+            center = cell_center(cell)
+            self.assertEqual(geohash(*center), cell)
+            self.assertLessEqual(abs(center[0] - lat), self.CELL / 2)
+            self.assertLessEqual(abs(center[1] - lon), self.CELL / 2)
+
+    async def test_concurrent_lookups_in_one_cell_share_a_call(self):
+        self.release = asyncio.Event()
+        with mock.patch.object(upstream, 'fetch_weather', self.fetch_weather):
+            first = asyncio.create_task(self.service.get(28.6139, 77.2090))
+            second = asyncio.create_task(self.service.get(28.6150, 77.2100))  # same cell
+            await asyncio.sleep(0)
+            self.release.set()
+            a, b = await asyncio.gather(first, second)
+            self.assertIs(a, b)
+            self.assertEqual(self.calls, [cell_center('ttnfu')])
+            self.assertEqual(await self.service.get(28.62, 77.21), a)  # now cached
+            await self.service.get(19.07, 72.87)  # another cell
+        self.assertEqual(len(self.calls), 2)
+        stats = self.service.stats()
+        self.assertEqual((stats['coalesced'], stats['upstream_calls'], stats['hits']), (1, 2, 1))
+
+    async def test_failed_call_reaches_every_waiter_and_is_not_cached(self):
+        self.release = asyncio.Event()
+
+        async def down(lat, lon):
+            self.calls.append((lat, lon))
+            await self.release.wait()
+            raise httpx.ConnectError('down')
+
+        with mock.patch.object(upstream, 'fetch_weather', down):
+            waiters = [asyncio.create_task(self.service.get(28.6139, 77.2090)) for _ in range(2)]
+            await asyncio.sleep(0)
+            self.release.set()
+            for result in await asyncio.gather(*waiters, return_exceptions=True):
+                self.assertIsInstance(result, httpx.ConnectError)
+        self.assertEqual(len(self.calls), 1)
+        self.release = None
+        with mock.patch.object(upstream, 'fetch_weather', self.fetch_weather):
+            self.assertEqual((await self.service.get(28.6139, 77.2090))['name'], 'Delhi')
+
+
+def gemini_transport(request):
+    if ':streamGenerateContent' in request.url.path:
+        events = ''.join(f"data: {json.dumps({'candidates': [{'content': {'parts': [{'text': chunk}]}}]})}\n\n"
+                         for chunk in GEMINI_CHUNKS)
+        return httpx.Response(200, text=events, headers={'Content-Type': 'text/event-stream'})
+    return httpx.Response(200, json={'candidates': [{'content': {'parts': [{'text': GEMINI_TEXT}]}}]})
+
+
+@override_settings(LLM_CACHE_ENABLED=False, FAQ_ENABLED=False, CHAT_HISTORY_ENABLED=False)
+class GeminiStubTestCase(TestCase):
+    """Chat view tests against a stub Gemini (httpx.MockTransport); ``self.clients`` lists the clients opened."""
+    MESSAGE = {'message': 'quinoa sowing window in Rajasthan'}
+
+    def setUp(self):
+        guards.reset()
+        self.clients = []
+
+        def new_client():
+            client = httpx.AsyncClient(transport=httpx.MockTransport(gemini_transport))
+            self.clients.append(client)
+            return client
+
+        patcher = mock.patch.object(upstream, 'new_client', new_client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def stream(self, **extra):
+        response = self.client.post('/chatbot/api/', dict(self.MESSAGE, stream='ndjson', **extra),
+                                    content_type='application/json')
+        with warnings.catch_warnings():  # WSGI consumes the async body in a loop of its own, as here
+            warnings.simplefilter('ignore')
+            body = b''.join(response)
+        return [json.loads(line) for line in body.decode().splitlines()]
+
+
+class UpstreamClientLifetimeTests(GeminiStubTestCase):
+    def test_wsgi_request_closes_its_client(self):
+        for _ in range(2):
+            response = self.client.post('/chatbot/api/', self.MESSAGE, content_type='application/json')
+            self.assertEqual(response.json()['reply_en'], "Sow wheat in November.")
+        self.assertEqual(len(self.clients), 2)
+        self.assertTrue(all(client.is_closed for client in self.clients))
+
+    def test_wsgi_stream_closes_its_client(self):
+        self.assertEqual(self.stream(lang='en')[-1]['type'], 'done')
+        self.assertEqual(len(self.clients), 1)
+        self.assertTrue(self.clients[0].is_closed)
+
+    def test_no_client_without_upstream_call(self):
+        self.client.post('/chatbot/api/', {'message': 'namaste'}, content_type='application/json')
+        self.assertEqual(self.clients, [])
+
+    async def test_asgi_requests_share_the_loop_client(self):
+        for _ in range(2):
+            response = await self.async_client.post('/chatbot/api/', self.MESSAGE, content_type='application/json')
+            self.assertEqual(response.json()['reply_en'], "Sow wheat in November.")
+        self.assertEqual(len(self.clients), 1)
+        self.assertFalse(self.clients[0].is_closed)
+        await self.clients[0].aclose()
+
+
+class StreamReplyTests(GeminiStubTestCase):
+    DONE = {'type': 'done', 'reply_hi': "गेहूं नवंबर में बोएं।", 'reply_en': "Sow wheat in November."}
+
+    def test_deltas_split_by_language(self):
+        events = self.stream()
+        self.assertEqual(''.join(e['text'] for e in events[:-1]), ''.join(GEMINI_CHUNKS))  # raw text as before
+        self.assertEqual(''.join(e['reply_hi'] for e in events[:-1]).strip(), self.DONE['reply_hi'])
+        self.assertEqual(''.join(e['reply_en'] for e in events[:-1]).strip(), self.DONE['reply_en'])
+        self.assertEqual(events[-1], self.DONE)
+
+    def test_requested_language_only(self):
+        events = self.stream(lang='hi')
+        self.assertEqual(''.join(e['text'] for e in events[:-1]).strip(), self.DONE['reply_hi'])
+        self.assertNotIn('Sow', ''.join(e['text'] for e in events[:-1]))
+        self.assertEqual(events[-1], self.DONE)
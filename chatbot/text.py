@@ -0,0 +1,162 @@
+# chatbot/text.py
+"""
+Message normalization for AgroBot.
+
+Hinglish/English spellings are mapped to canonical words by one precompiled
+alternation (longest phrase first) that also collapses whitespace, so a
+message is scanned once. The same pass reports the intents the chat view
+routes on: greeting, thanks, ok, bye, weather, scheme and scheme_name.
+
+Gemini's bilingual replies are split back into Hindi and English line by
+line (``split_bilingual``, or ``BilingualSplitter`` for streamed chunks).
+``STOPWORDS`` is the filler both the FAQ index and the crop knowledge base
+ignore when matching a message.
+"""
+import re
+
+# (replacement, intent, spellings)
+RULES = [
+    ('you', None, ['u']),
+    ('are', None, ['r']),
+    ('please', None, ['pls', 'plz']),
+    ('thank you', 'thanks', ['thx', 'tnx', 'thanks', 'thank you', 'dhanyavad']),
+    ('ok', 'ok', ['ok', 'okay', 'thik hai', 'theek hai']),
+    ('yes', None, ['ya', 'haan', 'yes']),
+    ('no', None, ['na', 'nahi', 'no']),
+    ('hello', 'greeting', ['hi', 'hello', 'namaste', 'hola']),
+    ('bye', 'bye', ['bye', 'alvida']),
+    ('weather', 'weather', ['weather', 'mausam', 'vedar']),
+    ('crop', None, ['fasal', 'fassal', 'crop']),
+    ('disease', None, ['rog', 'bimari']),
+    ('fertilizer', None, ['khad', 'urvarak']),
+    ('seeds', None, ['beej', 'beejon']),
+    ('irrigation', None, ['sinchai', 'pani']),
+    ('', None, ['ke baare me batao', 'ke baare me bataiye', 'batao']),
+    ('how to do', None, ['kaise kare', 'kaise karen']),
+    ('help', None, ['help', 'madad', 'any help']),
+    ('scheme', 'scheme', ['government', 'yojana', 'subsidy', 'scheme']),
+    (None, 'scheme_name', ['pm kisan', 'soil health card', 'kisan credit card']),  # kept as written
+]
+
+_TOKENS = {}
+for replacement, intent, spellings in RULES:
+    for spelling in spellings:
+        _TOKENS[spelling] = (spelling if replacement is None else replacement, intent)
+
+_PATTERN = re.compile(
+    r'(?P<ws>\s+)|\b(?P<tok>' + '|'.join(re.escape(s) for s in sorted(_TOKENS, key=len, reverse=True)) + r')\b'
+)
+
+
+def analyze(text: str):
+    """Return (normalized text, frozenset of intents) from a single scan."""
+    text = text.lower()
+    parts, intents, pos = [], set(), 0
+    after_space = True  # also drops leading whitespace
+    for m in _PATTERN.finditer(text):
+        if m.start() > pos:
+            parts.append(text[pos:m.start()])
+            after_space = False
+        pos = m.end()
+        token = m.group('tok')
+        if token is None:
+            # Whitespace runs collapse to one space, including across a dropped phrase
+            if not after_space:
+                parts.append(' ')
+                after_space = True
+            continue
+        replacement, intent = _TOKENS[token]
+        if intent:
+            intents.add(intent)
+        if replacement:
+            parts.append(replacement)
+            after_space = False
+    parts.append(text[pos:])
+    return ''.join(parts).rstrip(), frozenset(intents)
+
+
+def normalize(text: str) -> str:
+    return analyze(text)[0]
+
+
+_HINDI = re.compile('[\u0900-\u097F]')
+
+
+def detect_hindi(text: str) -> bool:
+    return _HINDI.search(text) is not None
+
+
+# Hinglish/English filler that carries no topic (checked after normalize)
+STOPWORDS = frozenset('''
+a an the is are was be of for in on to and or with at by from about my me i we you your it this that
+what which how when where why do does did can should will please tell know want need get
+kya kaise kaisa kaisi kab kaha kahan kaun kaunsa kaunsi kitna kitni kitne kyu kyon
+hai hain ho tha the ka ki ke ko se me mein par pe aur ya bhi hi na nahi mujhe hum aap apne
+ji bhai chahiye karna kare karen karu de dena dale dalna liye wala wali sahi
+matra tarika best achha achhe jankari milega milegi milta crop
+'''.split())
+
+
+# ---------------- Bilingual Replies ----------------
+_LATIN = re.compile('[A-Za-z]')
+_LABEL = re.compile(r'^[\s*#_:()-]*(?:(hindi|हिंदी|हिन्दी)|(english|अंग्रेज़ी|अंग्रेजी))[\s*#_:()-]*$', re.IGNORECASE)
+
+
+def _classify(line, section):
+    """Return (section, target) for one line; target is 'hi', 'en', 'both' or None (dropped)."""
+    label = _LABEL.match(line)
+    if label:
+        return ('hi' if label.group(1) else 'en'), None
+    if detect_hindi(line):
+        # English lines often quote a Hindi crop name; go by which script dominates
+        if len(_HINDI.findall(line)) >= len(_LATIN.findall(line)):
+            return 'hi', 'hi'
+        return 'en', 'en'
+    if _LATIN.search(line):
+        return 'en', 'en'
+    # Blank lines, bullets, numbers and emoji stay with the section they sit in
+    return section, section or 'both'
+
+
+def split_bilingual(text: str):
+    """Split a bilingual reply into (hindi, english) in one pass over its lines.
+
+    A reply written in only one language is returned on both sides.
+    """
+    out = {'hi': [], 'en': []}
+    section = None
+    for line in text.splitlines(keepends=True):
+        section, target = _classify(line, section)
+        if target == 'both':
+            out['hi'].append(line)
+            out['en'].append(line)
+        elif target:
+            out[target].append(line)
+    hi, en = ''.join(out['hi']).strip(), ''.join(out['en']).strip()
+    return hi or en, en or hi
+
+
+class BilingualSplitter:
+    """Incremental ``split_bilingual`` for one language: feed streamed chunks, get back its complete lines."""
+
+    def __init__(self, lang):
+        self.lang = lang
+        self.section = None
+        self._partial = ''
+
+    def _take(self, lines):
+        kept = []
+        for line in lines:
+            self.section, target = _classify(line, self.section)
+            if target in (self.lang, 'both'):
+                kept.append(line)
+        return ''.join(kept)
+
+    def feed(self, chunk: str) -> str:
+        lines = (self._partial + chunk).splitlines(keepends=True)
+        self._partial = lines.pop() if lines and not lines[-1].endswith(('\n', '\r')) else ''
+        return self._take(lines)
+
+    def flush(self) -> str:
+        partial, self._partial = self._partial, ''
+        return self._take([partial]) if partial else ''
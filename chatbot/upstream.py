@@ -0,0 +1,150 @@
+# chatbot/upstream.py
+"""
+Non-blocking access to Gemini and OpenWeather for the async views.
+
+Both APIs are called over pooled ``httpx.AsyncClient`` connections with
+explicit timeouts. A client is bound to the event loop that created it, so
+one is kept per running loop: under an ASGI server (``AgroVistaar.asgi``)
+that is one long-lived pool per worker, reused across requests.
+
+Under WSGI (``runserver``, ``AgroVistaar.wsgi``) Django runs each async view,
+and each streamed response body, in an event loop of its own that ends with
+it, so a per-loop client would never be reused or closed. Views wrapped in
+``scoped_client`` (and streams inside ``client_scope``) get a client that
+lives for that request only and is closed on the way out; connection pooling
+across requests needs ASGI. Every call is timed in
+``agrovistaar_upstream_request_seconds`` (AgroVistaar.metrics).
+"""
+import asyncio
+import contextvars
+import functools
+import json
+import weakref
+from contextlib import asynccontextmanager
+
+import httpx
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+
+from AgroVistaar.metrics import UPSTREAM_SECONDS, timed
+
+
+class UpstreamError(Exception):
+    pass
+
+
+_clients = weakref.WeakKeyDictionary()
+_scope = contextvars.ContextVar('upstream_client_scope', default=None)  # [client] once one is opened
+
+
+def new_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(
+            getattr(settings, 'UPSTREAM_TIMEOUT', 20.0),
+            connect=getattr(settings, 'UPSTREAM_CONNECT_TIMEOUT', 5.0),
+        ),
+        limits=httpx.Limits(
+            max_connections=getattr(settings, 'UPSTREAM_MAX_CONNECTIONS', 100),
+            max_keepalive_connections=getattr(settings, 'UPSTREAM_MAX_KEEPALIVE', 20),
+        ),
+    )
+
+
+def get_client() -> httpx.AsyncClient:
+    scope = _scope.get()
+    if scope is not None:
+        if not scope:  # opened on first use; most requests never call out
+            scope.append(new_client())
+        return scope[0]
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None or client.is_closed:
+        client = _clients[loop] = new_client()
+    return client
+
+
+@asynccontextmanager
+async def client_scope(request):
+    """Under WSGI, give the code inside a client of its own and close it on exit; under ASGI do nothing."""
+    if isinstance(request, ASGIRequest):
+        yield
+        return
+    scope = []
+    token = _scope.set(scope)
+    try:
+        yield
+    finally:
+        _scope.reset(token)
+        if scope:
+            await scope[0].aclose()
+
+
+def scoped_client(view):
+    """Decorator for async views that call upstream (see ``client_scope``)."""
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        async with client_scope(request):
+            return await view(request, *args, **kwargs)
+    return wrapper
+
+
+# ---------------- Gemini ----------------
+def gemini_url(model_name, method='generateContent'):
+    base = getattr(settings, 'GEMINI_API_BASE', 'https://generativelanguage.googleapis.com')
+    return f"{base.rstrip('/')}/v1beta/models/{model_name}:{method}"
+
+
+def gemini_headers():
+    return {'x-goog-api-key': settings.GEMINI_API_KEY or '', 'Content-Type': 'application/json'}
+
+
+def extract_text(data) -> str:
+    """Concatenate the text parts of the first candidate of a Gemini response."""
+    try:
+        parts = data['candidates'][0]['content']['parts']
+    except (KeyError, IndexError, TypeError):
+        reason = (data.get('promptFeedback') or {}).get('blockReason') if isinstance(data, dict) else None
+        raise UpstreamError(f"Gemini returned no text{f' ({reason})' if reason else ''}")
+    return ''.join(p.get('text', '') for p in parts)
+
+
+async def gemini_generate(url, body: bytes, timeout=None, client=None) -> str:
+    """POST a pre-encoded ``generateContent`` request body (see ``chatbot.gemini``)."""
+    kwargs = {'timeout': timeout} if timeout is not None else {}
+    with timed(UPSTREAM_SECONDS, 'gemini'):
+        resp = await (client or get_client()).post(url, content=body, headers=gemini_headers(), **kwargs)
+        resp.raise_for_status()
+        return extract_text(resp.json())
+
+
+async def gemini_stream(url, body: bytes, timeout=None, client=None):
+    """Yield text chunks from a ``streamGenerateContent`` URL as Gemini produces them."""
+    kwargs = {'timeout': timeout} if timeout is not None else {}
+    with timed(UPSTREAM_SECONDS, 'gemini_stream'):
+        async with (client or get_client()).stream('POST', url, params={'alt': 'sse'}, content=body,
+                                                   headers=gemini_headers(), **kwargs) as resp:
+            resp.raise_for_status()
+            async for line in resp.aiter_lines():
+                if not line.startswith('data:'):
+                    continue
+                chunk = json.loads(line[5:])
+                try:
+                    text = extract_text(chunk)
+                except UpstreamError:
+                    # The closing chunk may carry only finishReason/usage; a block is a real error
+                    if isinstance(chunk, dict) and chunk.get('promptFeedback'):
+                        raise
+                    continue
+                if text:
+                    yield text
+
+
+# ---------------- OpenWeather ----------------
+async def fetch_weather(lat, lon) -> dict:
+    base = getattr(settings, 'OPENWEATHER_API_BASE', 'https://api.openweathermap.org')
+    params = {'lat': lat, 'lon': lon, 'units': 'metric', 'appid': getattr(settings, 'OPENWEATHER_API_KEY', None)}
+    with timed(UPSTREAM_SECONDS, 'weather'):
+        resp = await get_client().get(f"{base.rstrip('/')}/data/2.5/weather", params=params,
+                                      timeout=getattr(settings, 'WEATHER_TIMEOUT', 5.0))
+        resp.raise_for_status()
+        return resp.json()
@@ -4,7 +4,7 @@ from . import views
 app_name = 'chatbot'  
 urlpatterns = [
     path('', views.chat_view, name='chat_page'),
-    path('api/', views.chat_view, name='chat_api') 
+    path('api/', views.chat_view, name='chat_api'),
 ]
 
 
@@ -2,71 +2,44 @@
 
 import json
 import os
-import re
-import requests
-from datetime import datetime
 from dotenv import load_dotenv
 
-import google.generativeai as genai
+import asyncio
+
+import httpx
 from django.conf import settings
-from django.http import JsonResponse, HttpResponse
-from django.shortcuts import render
+from django.http import JsonResponse, HttpResponse, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
-from django.utils import timezone
 from django.core.exceptions import ImproperlyConfigured
+from django.db import DatabaseError
+
+from myapp.registry import registry, ModelLoadError
+
+from . import faq  # registers 'chatbot_faq'
+from .conversation import CONVERSATION_ID, append_turns, load_window
+from .gemini import gemini_pool
+from .llm_cache import llm_cache
+from .replies import ai_reply, reply, requested_lang
+from .resilience import Unavailable
+from .text import BilingualSplitter, analyze, split_bilingual
+from .upstream import client_scope, scoped_client
+from .weather import weather_service
 
 # ---------------- Environment & Gemini API ----------------
 load_dotenv()
-OPENWEATHER_API_KEY = os.getenv("OPENWEATHER_API_KEY")
 
 try:
     GEMINI_API_KEY = getattr(settings, "GEMINI_API_KEY", None)
     if not GEMINI_API_KEY:
         raise ImproperlyConfigured("GEMINI_API_KEY not set in settings or .env")
-    genai.configure(api_key=GEMINI_API_KEY)
 except ImproperlyConfigured as e:
     raise ImproperlyConfigured(f"Gemini API configuration error: {e}") from e
 
 # ---------------- Helper Functions ----------------
-def normalize(text: str) -> str:
-    text = text.lower()
-    replacements = {
-        r'\bu\b': 'you',
-        r'\br\b': 'are',
-        r'\bpls\b|\bplz\b': 'please',
-        r'\bthx\b|\btnx\b': 'thanks',
-        r'\bok\b|\bokay\b|\bthik hai\b|\btheek hai\b': 'ok',
-        r'\bya\b|\bhaan\b|\byes\b': 'yes',
-        r'\bna\b|\bnahi\b|\bno\b': 'no',
-        r'\bhi\b|\bhello\b|\bnamaste\b|\bhola\b': 'hello',
-        r'\bbye\b|\bbye bye\b|\balvida\b': 'bye',
-        r'\bmausam\b|\bvedar\b': 'weather',
-        r'\bfasal\b|\bfassal\b|\bcrop\b': 'crop',
-        r'\brog\b|\bbimari\b': 'disease',
-        r'\bkhad\b|\burvarak\b': 'fertilizer',
-        r'\bbeej\b|\bbeejon\b': 'seeds',
-        r'\bsinchai\b|\bpani\b': 'irrigation',
-        r'\bke baare me batao\b|\bke baare me bataiye\b|\bbatao\b': '',
-        r'\bkaise kare\b|\bkaise karen\b': 'how to do',
-        r'\bhelp\b|\bmadad\b|\bany help\b': 'help',
-        r'\bthank you\b|\bthanks\b|\bdhanyavad\b': 'thank you',
-        r'\bgovernment\b|\byojana\b|\bsubsidy\b|\bscheme\b': 'scheme',
-    }
-    for pat, rep in replacements.items():
-        text = re.sub(pat, rep, text)
-    text = re.sub(r'\s+', ' ', text)
-    return text.strip()
-
-def detect_hindi(text: str) -> bool:
-    return bool(re.search('[\u0900-\u097F]', text))
-
-def get_weather(lat: float, lon: float) -> dict:
+async def get_weather(lat: float, lon: float) -> dict:
     """Return both Hindi and English weather strings"""
     try:
-        url = f"https://api.openweathermap.org/data/2.5/weather?lat={lat}&lon={lon}&units=metric&appid={OPENWEATHER_API_KEY}"
-        resp = requests.get(url)
-        resp.raise_for_status()
-        data = resp.json()
+        data = await weather_service.get(lat, lon)
         city = data.get('name', '')
         desc = data['weather'][0]['description']
         temp = data['main']['temp']
@@ -74,16 +47,122 @@ def get_weather(lat: float, lon: float) -> dict:
             'hi': f"🌤 वर्तमान मौसम {city} में: {desc}, तापमान: {temp}°C है।",
             'en': f"🌤 Current weather in {city}: {desc}, Temp: {temp}°C."
         }
-    except requests.RequestException as e:
+    except (httpx.HTTPError, asyncio.TimeoutError, Unavailable, KeyError, IndexError, ValueError) as e:
         print(f"Weather API error: {e}")
         return {
             'hi': "⚠️ मौसम की जानकारी नहीं मिल पाई।",
             'en': "⚠️ Could not fetch weather."
         }
 
+# Static system prompt; the date and location arrive as a context line with each message
+SYSTEM_PROMPT = """You are "AgroBot", an expert agricultural assistant for Indian farmers.
+Respond in both Hindi and English. Keep responses short, friendly, and actionable.
+Each message starts with a context line giving the current date and the user's location (latitude,longitude), followed by a summary of earlier conversation when there is one."""
+
+# Checked in this order; intents come from chatbot.text.analyze
+BASIC_REPLIES = {
+    'greeting': ("नमस्ते! मैं एग्रोबॉट हूँ। खेती से संबंधित सवाल पूछें।",
+                 "Hello! I am AgroBot. Ask me any questions about farming."),
+    'thanks': ("खुशी है कि मैं मदद कर सका।", "You're welcome! Happy to help."),
+    'ok': ("ठीक है।", "Okay."),
+    'bye': ("अलविदा! शुभकामनाएँ।", "Goodbye! Take care."),
+}
+
+# ---------------- Streaming ----------------
+# Clients opt in with {"stream": true|"ndjson"|"sse"} or an Accept header; others keep plain JSON.
+STREAM_FORMATS = {
+    'ndjson': ('application/x-ndjson', lambda event: json.dumps(event, ensure_ascii=False) + "\n"),
+    'sse': ('text/event-stream', lambda event: f"data: {json.dumps(event, ensure_ascii=False)}\n\n"),
+}
+
+
+def stream_format(request, data):
+    accept = request.headers.get('Accept', '')
+    if 'text/event-stream' in accept:
+        return 'sse'
+    if 'application/x-ndjson' in accept:
+        return 'ndjson'
+    mode = data.get('stream')
+    if mode in STREAM_FORMATS:
+        return mode
+    return 'ndjson' if mode is True else None
+
+
+def stream_reply(request, fmt, model, message, coords, window=None, lang=None):
+    """Forward Gemini's chunks as ``delta`` events, then ``done`` (or ``error``).
+
+    With ``lang`` only that language's lines are forwarded, a line at a time.
+    Without it each delta's ``text`` is the raw chunk and ``reply_hi``/``reply_en``
+    hold its complete lines in each language. ``done`` carries the whole reply
+    split like the JSON path, so clients can switch language afterwards.
+    """
+    content_type, encode = STREAM_FORMATS[fmt]
+
+    def delta(splitters, text, flush=False):
+        split = {code: splitter.flush() if flush else splitter.feed(text) for code, splitter in splitters.items()}
+        if lang:
+            return {'type': 'delta', 'text': split[lang]} if split[lang] else None
+        if not text and not any(split.values()):
+            return None
+        return {'type': 'delta', 'text': text, 'reply_hi': split['hi'], 'reply_en': split['en']}
+
+    async def events():
+        parts = []
+        splitters = {code: BilingualSplitter(code) for code in ([lang] if lang else ['hi', 'en'])}
+        # Under WSGI the body is consumed in a new event loop, after the view's client is closed
+        async with client_scope(request):
+            try:
+                async for text in model.stream(message, coords, history=window):
+                    parts.append(text)
+                    event = delta(splitters, text)
+                    if event:
+                        yield encode(event)
+                event = delta(splitters, '', flush=True)
+                if event:
+                    yield encode(event)
+            except Exception as e:
+                print(f"Gemini API error: {e}")
+                error = {'reply_hi': "⚠️ AI से उत्तर नहीं मिला।", 'reply_en': "⚠️ Could not generate response."}
+                if lang:
+                    error = {f'reply_{lang}': error[f'reply_{lang}']}
+                yield encode({'type': 'error', **error})
+                return
+            full = ''.join(parts)
+            await remember('chatbot', window, message, coords, full)
+            hi, en = split_bilingual(full)
+            yield encode({'type': 'done', 'reply_hi': hi, 'reply_en': en})
+
+    response = StreamingHttpResponse(events(), content_type=f"{content_type}; charset=utf-8")
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # stop nginx from holding chunks back
+    return response
+
+# ---------------- Conversation History ----------------
+async def conversation_window(data):
+    """Load the history window for the request's ``conversation_id``, or None if it has none."""
+    conversation_id = data.get('conversation_id')
+    if not getattr(settings, 'CHAT_HISTORY_ENABLED', True) or not isinstance(conversation_id, str):
+        return None
+    if not CONVERSATION_ID.match(conversation_id):
+        return None
+    try:
+        return await load_window(conversation_id)
+    except DatabaseError as e:
+        print(f"Conversation history error: {e}")
+        return None
+
+
+async def remember(view, window, message, coords, reply):
+    """Record the exchange; replies given with history depend on it, so only history-free ones are cached."""
+    if not window:
+        await llm_cache.aset(view, message, coords, reply)
+    if window is not None:
+        await append_turns(window, message, reply)
+
 # ---------------- Main Chat View ----------------
 @csrf_exempt
-def chat_view(request):
+@scoped_client
+async def chat_view(request):
     if request.method == 'GET':
         index_path = os.path.join(settings.BASE_DIR, 'chatbot', 'templates', 'chatbot', 'chat.html')
         if os.path.exists(index_path):
@@ -99,68 +178,62 @@ def chat_view(request):
         data = json.loads(request.body)
         message = data.get('message', '').strip()
         coords = data.get('coords')
+        fmt = stream_format(request, data)
+        lang = requested_lang(request, data)
     except json.JSONDecodeError:
-        return JsonResponse({'reply_hi': '⚠️ अमान्य JSON।', 'reply_en': '⚠️ Invalid JSON format.'}, status=400)
+        return reply('⚠️ अमान्य JSON।', '⚠️ Invalid JSON format.', requested_lang(request), status=400)
 
     if not message:
-        return JsonResponse({'reply_hi': '⚠️ कृपया संदेश भेजें।', 'reply_en': '⚠️ Please send a valid message.'}, status=400)
+        return reply('⚠️ कृपया संदेश भेजें।', '⚠️ Please send a valid message.', lang, status=400)
 
-    input_text = normalize(message)
+    input_text, intents = analyze(message)
 
     # ---------------- Basic Replies ----------------
-    basic_map = {
-        'hello': ("नमस्ते! मैं एग्रोबॉट हूँ। खेती से संबंधित सवाल पूछें।",
-                  "Hello! I am AgroBot. Ask me any questions about farming."),
-        'thank you': ("खुशी है कि मैं मदद कर सका।", "You're welcome! Happy to help."),
-        'ok': ("ठीक है।", "Okay."),
-        'bye': ("अलविदा! शुभकामनाएँ।", "Goodbye! Take care."),
-    }
-    for key, (hi_msg, en_msg) in basic_map.items():
-        if key in input_text:
-            return JsonResponse({'reply_hi': hi_msg, 'reply_en': en_msg})
+    for intent, (hi_msg, en_msg) in BASIC_REPLIES.items():
+        if intent in intents:
+            return reply(hi_msg, en_msg, lang)
 
     # ---------------- Weather Handling ----------------
-    if "weather" in input_text or "mausam" in input_text:
+    if 'weather' in intents:
         if coords and coords.get('lat') and coords.get('lon'):
-            weather = get_weather(coords['lat'], coords['lon'])
-            return JsonResponse({'reply_hi': weather['hi'], 'reply_en': weather['en']})
+            weather = await get_weather(coords['lat'], coords['lon'])
+            return reply(weather['hi'], weather['en'], lang)
         else:
-            return JsonResponse({
-                'reply_hi': "🌤 कृपया मौसम जानकारी के लिए स्थान की अनुमति दें।",
-                'reply_en': "🌤 Please allow location access to get weather."
-            })
+            return reply("🌤 कृपया मौसम जानकारी के लिए स्थान की अनुमति दें।",
+                         "🌤 Please allow location access to get weather.", lang)
+
+    # ---------------- Local FAQ Answers ----------------
+    if getattr(settings, 'FAQ_ENABLED', True):
+        try:
+            entry = registry.get('chatbot_faq').answer(message)
+        except ModelLoadError:
+            entry = None
+        if entry is not None:
+            return reply(entry['reply_hi'], entry['reply_en'], lang)
 
     # ---------------- Government Scheme Handling ----------------
-    if "scheme" in input_text:
-        if not any(k in input_text for k in ["pm kisan", "soil health card", "kisan credit card"]):
-            return JsonResponse({
-                'reply_hi': "कृपया बताएं कि आप किस योजना के बारे में जानना चाहते हैं?",
-                'reply_en': "Please specify which government scheme you want information about (e.g., PM Kisan, Soil Health Card)."
-            })
+    if 'scheme' in intents and 'scheme_name' not in intents:
+        return reply("कृपया बताएं कि आप किस योजना के बारे में जानना चाहते हैं?",
+                     "Please specify which government scheme you want information about (e.g., PM Kisan, Soil Health Card).", lang)
 
     # ---------------- Gemini AI for other queries ----------------
-    system_prompt = f"""
-You are "AgroBot", an expert agricultural assistant for Indian farmers.
-Respond in both Hindi and English. Keep responses short, friendly, and actionable.
-Current Date: {timezone.now().strftime('%A, %B %d, %Y')}.
-User location: latitude {coords['lat'] if coords else 'unknown'}, longitude {coords['lon'] if coords else 'unknown'}.
-"""
+    window = await conversation_window(data)
+    if not window:
+        cached = await llm_cache.aget('chatbot', message, coords)
+        if cached is not None:
+            if window is not None:
+                await append_turns(window, message, cached)
+            return ai_reply(cached, lang)
+
+    model = gemini_pool.get('chatbot', 'gemini-1.5-flash', SYSTEM_PROMPT)
+    if fmt:
+        return stream_reply(request, fmt, model, message, coords, window, lang)
 
     try:
-        model = genai.GenerativeModel(
-            model_name='gemini-1.5-flash',
-            system_instruction=system_prompt
-        )
-        ai_response = model.generate_content(message).text
-
-        # Optionally split Hindi and English manually if needed
-        return JsonResponse({
-            'reply_hi': ai_response,  # Gemini can generate bilingual text in one response
-            'reply_en': ai_response
-        })
+        ai_response = await model.generate(message, coords, history=window)
+        await remember('chatbot', window, message, coords, ai_response)
+        return ai_reply(ai_response, lang)  # Gemini answers in both languages; split them
     except Exception as e:
         print(f"Gemini API error: {e}")
-        return JsonResponse({
-            'reply_hi': "⚠️ AI से उत्तर नहीं मिला।",
-            'reply_en': "⚠️ Could not generate response."
-        }, status=500)
+        return reply("⚠️ AI से उत्तर नहीं मिला।", "⚠️ Could not generate response.", lang,
+                     status=503 if isinstance(e, Unavailable) else 500)
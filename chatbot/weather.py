@@ -0,0 +1,131 @@
+# chatbot/weather.py
+"""
+Weather lookups shared by everyone in the same area.
+
+Coordinates are bucketed into geohash cells (precision 5 is roughly a
+4.9 km x 4.9 km square) and the OpenWeather reading for a cell's centre is
+cached for ``WEATHER_CACHE_TTL`` seconds. Concurrent misses for one cell
+await a single upstream call instead of each issuing their own. Requests go
+through the pooled, time-limited client in ``chatbot.upstream``.
+"""
+import asyncio
+import threading
+import time
+
+from django.conf import settings
+
+from AgroVistaar.cache import MISSING, TTLCache
+from AgroVistaar.metrics import Stats
+
+from . import upstream
+from .resilience import guards
+
+_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+_DECODE = {c: i for i, c in enumerate(_BASE32)}
+
+
+def geohash(lat: float, lon: float, precision: int = 5) -> str:
+    lat_lo, lat_hi, lon_lo, lon_hi = -90.0, 90.0, -180.0, 180.0
+    chars, bits, value, even = [], 0, 0, True
+    while len(chars) < precision:
+        if even:
+            mid = (lon_lo + lon_hi) / 2
+            value = value * 2 + (lon >= mid)
+            lon_lo, lon_hi = (mid, lon_hi) if lon >= mid else (lon_lo, mid)
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            value = value * 2 + (lat >= mid)
+            lat_lo, lat_hi = (mid, lat_hi) if lat >= mid else (lat_lo, mid)
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(_BASE32[value])
+            bits, value = 0, 0
+    return ''.join(chars)
+
+
+def cell_center(cell: str):
+    """Return the (lat, lon) centre of a geohash cell."""
+    lat_lo, lat_hi, lon_lo, lon_hi = -90.0, 90.0, -180.0, 180.0
+    even = True
+    for c in cell:
+        value = _DECODE[c]
+        for shift in range(4, -1, -1):
+            bit = (value >> shift) & 1
+            if even:
+                mid = (lon_lo + lon_hi) / 2
+                lon_lo, lon_hi = (mid, lon_hi) if bit else (lon_lo, mid)
+            else:
+                mid = (lat_lo + lat_hi) / 2
+                lat_lo, lat_hi = (mid, lat_hi) if bit else (lat_lo, mid)
+            even = not even
+    return (lat_lo + lat_hi) / 2, (lon_lo + lon_hi) / 2
+
+
+class WeatherService:
+    def __init__(self, precision=None, ttl=None, maxsize=None):
+        self.precision = precision or getattr(settings, 'WEATHER_GEOHASH_PRECISION', 5)
+        self.cache = TTLCache(
+            maxsize=maxsize or getattr(settings, 'WEATHER_CACHE_MAX_ENTRIES', 10000),
+            ttl=ttl or getattr(settings, 'WEATHER_CACHE_TTL', 600),
+        )
+        self._inflight = {}  # cell -> asyncio.Task of the upstream call
+        self._lock = threading.Lock()
+        self.coalesced = self.upstream_calls = self.upstream_errors = 0
+        self.upstream_seconds = self.upstream_max = 0.0
+
+    async def get(self, lat, lon) -> dict:
+        """Return the OpenWeather payload for the cell containing (lat, lon)."""
+        cell = geohash(float(lat), float(lon), self.precision)
+        data = self.cache.get(cell)
+        if data is not MISSING:
+            return data
+
+        loop = asyncio.get_running_loop()
+        task = self._inflight.get(cell)
+        if task is None or task.get_loop() is not loop:
+            task = loop.create_task(self._fetch(cell))
+            self._inflight[cell] = task
+            task.add_done_callback(lambda t: self._inflight.get(cell) is t and self._inflight.pop(cell, None))
+        else:
+            with self._lock:
+                self.coalesced += 1
+        # shield: one waiter giving up must not cancel the call the others are waiting on
+        return await asyncio.shield(task)
+
+    async def _fetch(self, cell):
+        lat, lon = cell_center(cell)
+        start = time.perf_counter()
+        try:
+            data = await guards['weather'].call(upstream.fetch_weather, lat, lon)
+        except Exception:
+            with self._lock:
+                self.upstream_errors += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.upstream_calls += 1
+                self.upstream_seconds += elapsed
+                self.upstream_max = max(self.upstream_max, elapsed)
+        self.cache.set(cell, data)
+        return data
+
+    def stats(self) -> dict:
+        stats = self.cache.stats()
+        with self._lock:
+            stats.update({
+                'geohash_precision': self.precision,
+                'coalesced': self.coalesced,
+                'inflight': len(self._inflight),
+                'upstream_calls': self.upstream_calls,
+                'upstream_errors': self.upstream_errors,
+                'upstream_avg_ms': round(self.upstream_seconds / self.upstream_calls * 1000, 2) if self.upstream_calls else 0.0,
+                'upstream_max_ms': round(self.upstream_max * 1000, 2),
+            })
+        return stats
+
+
+weather_service = WeatherService()
+Stats('agrovistaar_weather_cache', 'Geohash weather cache and its OpenWeather calls.',
+      lambda: {(): weather_service.stats()})
@@ -0,0 +1,257 @@
+# crops/knowledge.py
+"""
+Crop facts served from the ``CropInfo`` table before asking Gemini.
+
+``crops/data/crop_kb.json`` lists the crops we can answer for: the name used
+in ``yield/data/crop_yield.csv``, a Hindi name, English/Hinglish/Hindi
+aliases, the typical sowing-to-harvest duration and the crop groups
+(cereals, pulses...) the fertilizer datasets refer to. ``manage.py
+seed_crop_info`` fills ``CropInfo`` from it (``build_rows``): yield is total
+production / total area over the CSV, production is the average per year
+(both in bales for the fibre crops, as the CSV counts them), and fertilizer
+advice comes from the Fertilizer Guide cards plus the fertilizers most often
+recommended for the crop in ``Fertilizer Prediction.csv``.
+
+``CropIndex`` resolves crop names in a query from an in-memory alias table
+(longest phrase first, then close misspellings of single words that keep the
+alias's first letter, so "price" is not read as "rice"), and
+``answer`` fetches every named crop in one query on the unique ``name``
+index. A query is answered locally only when each remaining word is a
+stopword or asks for one of the stored facts (duration, fertilizer, yield,
+production); anything else ("wheat rust in Punjab") goes to Gemini.
+"""
+import difflib
+import json
+import os
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+
+import pandas as pd
+from django.conf import settings
+
+from AgroVistaar.metrics import CROP_INFO_SECONDS
+from chatbot.text import STOPWORDS, normalize
+from myapp.registry import ModelLoadError, registry
+
+from .models import CropInfo
+
+KB_PATH = os.path.join(settings.BASE_DIR, 'crops', 'data', 'crop_kb.json')
+YIELD_PATH = os.path.join(settings.BASE_DIR, 'yield', 'data', 'crop_yield.csv')
+FERTILIZER_PATH = os.path.join(settings.BASE_DIR, 'myapp', 'data', 'Fertilizer Prediction.csv')
+GUIDE_PATH = os.path.join(settings.BASE_DIR, 'AgroVistaar Fertilizer Guide', 'fertilizer.html')
+
+# Words that ask for a stored fact, by section of the answer (checked after normalize)
+FACT_TERMS = {
+    'duration': '''duration days day time long grow growing growth harvest ready mature maturity
+                   period months din samay mahine lagta lagte lagenge tayar taiyar
+                   अवधि दिन समय महीने लगता लगते तैयार''',
+    'fertilizer': '''fertilizer fertilizers fertiliser fertilisers manure dose nutrient nutrients
+                     उर्वरक खाद''',
+    'yield': '''yield yields production produce produced output upaj utpadan paidavar hectare ha per
+                total india country average
+                उपज उत्पादन पैदावार प्रति हेक्टेयर कुल भारत औसत''',
+}
+_SECTION = {term: section for section, terms in FACT_TERMS.items() for term in terms.split()}
+# Filler on top of chatbot.text.STOPWORDS ("crop" is in there already)
+EXTRA_STOPWORDS = frozenset('''
+info information details detail data facts all much many take takes does give show its crops
+kitni kitne kitna lagti hoti hota hote ke baare bare batao bataiye btao hindi english
+की का के में है हैं क्या कितनी कितने कितना लगती होती होता होते बारे बताओ बताइए जानकारी फसल और लिए को से
+'''.split())
+_WORD = re.compile('[\\w\u0900-\u097F]+')
+MAX_PHRASE = 3  # longest alias, in words
+FUZZY_MIN_LENGTH = 4
+# Real words within the fuzzy cutoff of an alias with the same first letter (season ~ sarson, march ~ mirch)
+NOT_MISSPELLINGS = frozenset('season seasons march ground'.split())
+
+
+class CropIndex:
+    def __init__(self, kb):
+        self.crops = {crop['name']: crop for crop in kb['crops']}
+        self.aliases = {}  # normalized alias phrase -> crop name
+        for crop in kb['crops']:
+            for alias in [crop['name'], *crop['aliases']]:
+                self.aliases[' '.join(_WORD.findall(normalize(alias)))] = crop['name']
+        self.groups = {}  # normalized group phrase -> group
+        for group, phrases in kb['groups'].items():
+            for phrase in phrases:
+                self.groups[' '.join(_WORD.findall(normalize(phrase)))] = group
+        # Only Latin single words are matched fuzzily, against aliases with the same first letter;
+        # Hindi aliases must match exactly
+        self.fuzzy_vocabulary = defaultdict(list)
+        for alias in self.aliases:
+            if ' ' not in alias and alias.isascii() and len(alias) >= FUZZY_MIN_LENGTH:
+                self.fuzzy_vocabulary[alias[0]].append(alias)
+
+    @classmethod
+    def load(cls, path=KB_PATH):
+        with open(path, encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def resolve(self, text):
+        """Return (crop names in order of mention, answer sections asked for, words left unexplained)."""
+        words = _WORD.findall(normalize(text))
+        names, sections, leftover = [], set(), []
+        i = 0
+        while i < len(words):
+            for size in range(min(MAX_PHRASE, len(words) - i), 0, -1):
+                name = self.aliases.get(' '.join(words[i:i + size]))
+                if name is not None:
+                    if name not in names:
+                        names.append(name)
+                    i += size
+                    break
+            else:
+                word = words[i]
+                i += 1
+                if word in _SECTION:
+                    sections.add(_SECTION[word])
+                elif word in STOPWORDS or word in EXTRA_STOPWORDS:
+                    continue
+                elif (len(word) >= FUZZY_MIN_LENGTH and word not in NOT_MISSPELLINGS
+                      and (close := difflib.get_close_matches(word, self.fuzzy_vocabulary.get(word[0], ()), n=1,
+                                                              cutoff=getattr(settings, 'CROP_KB_FUZZY_CUTOFF', 0.8)))):
+                    name = self.aliases[close[0]]
+                    if name not in names:
+                        names.append(name)
+                else:
+                    leftover.append(word)
+        return names, sections, leftover
+
+    def members(self, text):
+        """Crops named in a dataset's crop list, directly or through a group ("Cereals (Wheat, Rice)")."""
+        found = []
+        for part in re.split(r'[,()/]', text):
+            phrase = ' '.join(_WORD.findall(normalize(part)))
+            if phrase in self.aliases:
+                found.append(self.aliases[phrase])
+            elif phrase in self.groups:
+                group = self.groups[phrase]
+                found.extend(name for name, crop in self.crops.items() if group in crop['groups'])
+        return list(dict.fromkeys(found))
+
+
+registry.register('crop_index', CropIndex.load)
+
+
+# ---------------- Seeding ----------------
+_CARD = re.compile(r'<h2>(.*?)</h2>\s*<p><strong>Crops:</strong>(.*?)</p>\s*'
+                   r'<p><strong>Method:</strong>(.*?)</p>\s*<p><strong>Dose:</strong>(.*?)</p>', re.S)
+
+
+def build_rows(index=None, yield_path=YIELD_PATH, fertilizer_path=FERTILIZER_PATH, guide_path=GUIDE_PATH):
+    """One CropInfo (unsaved) per crop in the knowledge base that has rows in crop_yield.csv."""
+    index = index or CropIndex.load()
+    df = pd.read_csv(yield_path, usecols=['Crop', 'Crop_Year', 'Area', 'Production'])
+    df['Crop'] = df['Crop'].str.strip()
+    totals = df.groupby('Crop').agg(area=('Area', 'sum'), production=('Production', 'sum'),
+                                    years=('Crop_Year', 'nunique'))
+
+    guide = defaultdict(list)  # crop -> ["Urea (N): Soil / Foliar, 50-100 kg/ha", ...]
+    with open(guide_path, encoding='utf-8') as f:
+        for fertilizer, crops, method, dose in _CARD.findall(f.read()):
+            for name in index.members(crops):
+                guide[name].append(f"{fertilizer.strip()}: {method.strip()}, {dose.strip()}")
+
+    recommended = defaultdict(Counter)  # crop -> fertilizer -> soil-test rows recommending it
+    soil = pd.read_csv(fertilizer_path)
+    for crop_type, fertilizer in zip(soil['Crop Type'], soil['Fertilizer Name']):
+        for name in index.members(crop_type):
+            recommended[name][fertilizer.strip()] += 1
+
+    rows = []
+    for name, crop in index.crops.items():
+        if name not in totals.index or not totals.at[name, 'area']:
+            continue
+        parts = list(guide[name])
+        if recommended[name]:
+            top = ', '.join(f for f, _ in recommended[name].most_common(3))
+            parts.append(f"Most recommended in soil tests: {top}")
+        rows.append(CropInfo(
+            name=name,
+            growth_duration_days=crop['duration_days'],
+            fertilizer_info='; '.join(parts),
+            per_hectare_yield=round(float(totals.at[name, 'production'] / totals.at[name, 'area']), 3),
+            total_production=round(float(totals.at[name, 'production'] / totals.at[name, 'years']), 1),
+        ))
+    return rows
+
+
+# ---------------- Answers ----------------
+def _amount_en(value, unit='tonnes'):
+    return f"{value / 1e6:.2f} million {unit}" if value >= 1e6 else f"{value:,.0f} {unit}"
+
+
+def _amount_hi(value, unit='टन'):
+    return f"{value / 1e5:.1f} लाख {unit}" if value >= 1e5 else f"{value:,.0f} {unit}"
+
+
+def format_answer(info, crop, sections):
+    """(hi, en) lines for one crop, limited to the asked-for sections (all when none were named)."""
+    sections = sections or set(FACT_TERMS)
+    unit_en, unit_hi = crop.get('unit', ('tonnes', 'टन'))  # fibre crops are counted in bales
+    en = [f"🌾 {info.name}"]
+    hi = [f"🌾 {crop['hi']} ({info.name})"]
+    if 'duration' in sections:
+        en.append(f"Takes about {info.growth_duration_days} days from sowing to harvest.")
+        hi.append(f"बुवाई से कटाई तक लगभग {info.growth_duration_days} दिन लगते हैं।")
+    if 'yield' in sections:
+        en.append(f"Average yield {info.per_hectare_yield:.2f} {unit_en} per hectare; India produces about "
+                  f"{_amount_en(info.total_production, unit_en)} a year.")
+        hi.append(f"औसत उपज {info.per_hectare_yield:.2f} {unit_hi} प्रति हेक्टेयर; भारत में सालाना लगभग "
+                  f"{_amount_hi(info.total_production, unit_hi)} उत्पादन।")
+    if 'fertilizer' in sections:
+        en.append(f"Fertilizer: {info.fertilizer_info}.")
+        hi.append(f"उर्वरक: {info.fertilizer_info}।")
+    return '\n'.join(hi), '\n'.join(en)
+
+
+async def answer(query):
+    """(hi, en) from CropInfo, or None when the query needs Gemini."""
+    try:
+        index = registry.get('crop_index')
+    except ModelLoadError as e:
+        print(f"Crop knowledge base unavailable: {e}")
+        return None
+    names, sections, leftover = index.resolve(query)
+    if not names or leftover:
+        return None
+    rows = {info.name: info async for info in CropInfo.objects.filter(name__in=names)}
+    if len(rows) < len(names):
+        return None  # a crop that was never seeded
+    if 'fertilizer' in sections and not all(rows[name].fertilizer_info for name in names):
+        return None
+    parts = [format_answer(rows[name], index.crops[name], sections) for name in names]
+    return '\n\n'.join(hi for hi, _ in parts), '\n\n'.join(en for _, en in parts)
+
+
+# ---------------- Stats ----------------
+class PathStats:
+    """Queries and latency per answer path: local, cache, gemini or error."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = Counter()
+        self.seconds = defaultdict(float)
+
+    def record(self, path, start):
+        elapsed = time.perf_counter() - start
+        CROP_INFO_SECONDS.observe(elapsed, path)
+        with self._lock:
+            self.counts[path] += 1
+            self.seconds[path] += elapsed
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = sum(self.counts.values())
+            return {
+                'queries': total,
+                'local_fraction': round(self.counts['local'] / total, 4) if total else 0.0,
+                'paths': {path: {'queries': count, 'avg_ms': round(self.seconds[path] / count * 1000, 3)}
+                          for path, count in sorted(self.counts.items())},
+            }
+
+
+path_stats = PathStats()
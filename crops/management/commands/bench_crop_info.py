@@ -0,0 +1,58 @@
+import asyncio
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncClient, override_settings
+
+from chatbot.stubs import StubUpstream
+from crops.knowledge import path_stats
+from crops.models import CropInfo
+
+# Crop info questions as farmers type them: English, Hinglish, Hindi, misspelt, and out of scope
+SAMPLE_QUERIES = [
+    'wheat', 'rice fertilizer', 'gehu ki fasal kitne din me tayar hoti hai', 'गेहूं की उपज',
+    'धान के लिए खाद', 'wheet yield per hectare', 'sugarcan duration', 'sweet potato production',
+    'dhan aur gehu ki jankari', 'cotton yield', 'how many days for moong', 'potatos khad',
+    'मक्का कितने दिन में तैयार होती है', 'soyabean fertilizer dose', 'bajra total production',
+    'chana urvarak', 'sarson ki upaj', 'groundnut info', 'arhar kitne din', 'onion yield per ha',
+    'wheat rust in punjab', 'best crop for sandy soil', 'what is the best time to sow mustard',
+    'tomato fertilizer', 'how to control whitefly on cotton', 'मेरे खेत में कौन सी फसल लगाऊं',
+    'drip irrigation subsidy for sugarcane', 'price of onion in nashik',
+]
+
+
+class Command(BaseCommand):
+    help = ("Send sample crop info queries through crop_info_view with Gemini stubbed and report the "
+            "fraction answered from CropInfo and the latency of each answer path.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--queries', default='', help="File with one query per line (default: built-in sample).")
+        parser.add_argument('--rounds', type=int, default=2,
+                            help="Passes over the queries; later passes hit the LLM cache for Gemini answers.")
+        parser.add_argument('--latency', type=float, default=0.3, help="Stub Gemini latency in seconds.")
+
+    def handle(self, *args, **options):
+        if not CropInfo.objects.exists():
+            raise CommandError("CropInfo is empty; run `manage.py seed_crop_info` first.")
+        queries = SAMPLE_QUERIES
+        if options['queries']:
+            with open(options['queries'], encoding='utf-8') as f:
+                queries = [line.strip() for line in f if line.strip()]
+
+        async def run():
+            client = AsyncClient()
+            for _ in range(options['rounds']):
+                for query in queries:
+                    await client.post('/crops/', json.dumps({'message': query}), content_type='application/json')
+
+        with StubUpstream(latency=options['latency']) as stub:
+            with override_settings(GEMINI_API_BASE=stub.url):
+                asyncio.run(run())
+
+        stats = path_stats.stats()
+        self.stdout.write(f"{'path':<8} {'queries':>8} {'share':>7} {'avg ms':>9}")
+        for path, row in stats['paths'].items():
+            self.stdout.write(f"{path:<8} {row['queries']:>8} {row['queries'] / stats['queries']:>7.1%} "
+                              f"{row['avg_ms']:>9.3f}")
+        self.stdout.write(f"Served locally: {stats['local_fraction']:.1%} of {stats['queries']} queries "
+                          f"({stub.requests} Gemini calls)")
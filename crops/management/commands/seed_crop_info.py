@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from crops.knowledge import FERTILIZER_PATH, GUIDE_PATH, YIELD_PATH, build_rows
+from crops.models import CropInfo
+
+FIELDS = ['growth_duration_days', 'fertilizer_info', 'per_hectare_yield', 'total_production']
+
+
+class Command(BaseCommand):
+    help = "Fill CropInfo from crop_yield.csv aggregates and the fertilizer datasets (updates existing rows)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--yield-csv', default=YIELD_PATH)
+        parser.add_argument('--fertilizer-csv', default=FERTILIZER_PATH)
+        parser.add_argument('--guide', default=GUIDE_PATH, help="Fertilizer Guide HTML.")
+        parser.add_argument('--dry-run', action='store_true', help="Print the rows without saving them.")
+
+    def handle(self, *args, **options):
+        rows = build_rows(yield_path=options['yield_csv'], fertilizer_path=options['fertilizer_csv'],
+                          guide_path=options['guide'])
+        if options['dry_run']:
+            for row in rows:
+                self.stdout.write(f"{row.name:<24} {row.growth_duration_days:>4} d {row.per_hectare_yield:>8.3f} t/ha "
+                                  f"{row.total_production:>14,.0f} t/yr  {row.fertilizer_info[:60]}")
+            return
+        CropInfo.objects.bulk_create(rows, update_conflicts=True, unique_fields=['name'], update_fields=FIELDS)
+        without_fertilizer = sum(not row.fertilizer_info for row in rows)
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {len(rows)} crops ({without_fertilizer} without fertilizer data) into CropInfo."))
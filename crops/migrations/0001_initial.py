@@ -0,0 +1,25 @@
+# Generated by Django 5.1.5 on 2026-10-18 10:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CropInfo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('growth_duration_days', models.IntegerField()),
+                ('fertilizer_info', models.TextField()),
+                ('per_hectare_yield', models.FloatField()),
+                ('total_production', models.FloatField()),
+            ],
+        ),
+    ]
@@ -1,3 +1,90 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from . import knowledge
+from .knowledge import CropIndex
+from .models import CropInfo
+
+
+class CropIndexResolveTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.index = CropIndex.load()
+
+    def test_stored_facts_are_answered_locally(self):
+        self.assertEqual(self.index.resolve("wheat fertilizer"), (['Wheat'], {'fertilizer'}, []))
+        self.assertEqual(self.index.resolve("How long does wheat take to grow?"), (['Wheat'], {'duration'}, []))
+        self.assertEqual(self.index.resolve("paddy and sugar cane production"), (['Rice', 'Sugarcane'], {'yield'}, []))
+        self.assertEqual(self.index.resolve("tell me about finger millet"), (['Ragi'], set(), []))
+
+    def test_other_questions_fall_back_to_gemini(self):
+        self.assertEqual(self.index.resolve("wheat rust in Punjab"), (['Wheat'], set(), ['rust', 'punjab']))
+        self.assertEqual(self.index.resolve("weather today"), ([], set(), ['weather', 'today']))
+
+    def test_hindi_and_hinglish_aliases(self):
+        self.assertEqual(self.index.resolve("गेहूं की उपज"), (['Wheat'], {'yield'}, []))
+        self.assertEqual(self.index.resolve("गेहूँ में कितना खाद"), (['Wheat'], {'fertilizer'}, []))
+        self.assertEqual(self.index.resolve("gehun kitne din me tayar hota hai"), (['Wheat'], {'duration'}, []))
+        self.assertEqual(self.index.resolve("chawal ki paidavar"), (['Rice'], {'yield'}, []))
+
+    def test_misspellings_are_matched(self):
+        for query in ("wheet fertilizer", "whaet fertilizer", "gehuu fertilizer"):
+            with self.subTest(query=query):
+                self.assertEqual(self.index.resolve(query), (['Wheat'], {'fertilizer'}, []))
+        self.assertEqual(self.index.resolve("sunflowr yield")[0], ['Sunflower'])
+
+    def test_real_words_are_not_read_as_misspelt_crops(self):
+        self.assertEqual(self.index.resolve("wheat price"), (['Wheat'], set(), ['price']))
+        self.assertEqual(self.index.resolve("wheat season"), (['Wheat'], set(), ['season']))
+        self.assertEqual(self.index.resolve("sow wheat in march")[0], ['Wheat'])
+        self.assertEqual(self.index.resolve("tamatar fertilizer")[0], [])  # not matar (peas)
+
+
+class CropAnswerTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        CropInfo.objects.create(name='Wheat', growth_duration_days=120, fertilizer_info='Urea (N): Soil, 100 kg/ha',
+                                per_hectare_yield=3.2, total_production=9.5e7)
+        CropInfo.objects.create(name='Rice', growth_duration_days=130, fertilizer_info='',
+                                per_hectare_yield=2.6, total_production=1.1e8)
+
+    async def test_answers_only_the_sections_asked_for(self):
+        hi, en = await knowledge.answer("wheat fertilizer")
+        self.assertIn("Fertilizer: Urea (N): Soil, 100 kg/ha.", en)
+        self.assertNotIn("days", en)
+        self.assertIn("गेहूं (Wheat)", hi)
+
+    async def test_hindi_query(self):
+        hi, en = await knowledge.answer("गेहूं कितने दिन में तैयार होता है")
+        self.assertIn("120 दिन", hi)
+        self.assertIn("Takes about 120 days", en)
+
+    async def test_needs_gemini(self):
+        self.assertIsNone(await knowledge.answer("wheat rust in Punjab"))
+        self.assertIsNone(await knowledge.answer("wheat price"))
+
+    async def test_unseeded_crop_is_not_answered(self):
+        self.assertIsNone(await knowledge.answer("barley yield"))
+        self.assertIsNone(await knowledge.answer("wheat and barley duration"))
+
+    async def test_missing_fertilizer_info_is_not_answered(self):
+        self.assertIsNone(await knowledge.answer("rice fertilizer"))
+        hi, en = await knowledge.answer("rice yield")
+        self.assertIn("Average yield 2.60 tonnes per hectare", en)
+
+    async def test_view_routes_between_local_and_gemini(self):
+        model = mock.Mock(generate=mock.AsyncMock(return_value="हिंदी उत्तर\n\nEnglish answer"))
+        with mock.patch('crops.views.gemini_pool.get', return_value=model), \
+                mock.patch('crops.views.llm_cache.aget', mock.AsyncMock(return_value=None)), \
+                mock.patch('crops.views.llm_cache.aset', mock.AsyncMock()):
+            local = await self.async_client.post(reverse('crops:crop_info'), {'message': 'wheat fertilizer'},
+                                                 content_type='application/json')
+            model.generate.assert_not_awaited()
+            remote = await self.async_client.post(reverse('crops:crop_info'), {'message': 'wheat rust in Punjab'},
+                                                  content_type='application/json')
+            model.generate.assert_awaited_once()
+        self.assertEqual((local.status_code, remote.status_code), (200, 200))
+        self.assertIn("Urea", local.content.decode())
@@ -1,71 +1,85 @@
 import json
+import time
 from django.shortcuts import render
 from django.http import JsonResponse
-from django.utils import timezone
 from django.conf import settings
 from django.core.exceptions import ImproperlyConfigured
-import google.generativeai as genai
+
+from asgiref.sync import sync_to_async
+
+from chatbot.gemini import gemini_pool
+from chatbot.llm_cache import llm_cache
+from chatbot.replies import ai_reply, reply, requested_lang
+from chatbot.resilience import Unavailable
+from chatbot.upstream import scoped_client
+
+from . import knowledge
 
 # --- Gemini API Configuration ---
 GEMINI_API_KEY = getattr(settings, "GEMINI_API_KEY", None)
 if not GEMINI_API_KEY:
     raise ImproperlyConfigured("GEMINI_API_KEY is not set in Django settings.")
-genai.configure(api_key=GEMINI_API_KEY)
+
+# Gemini system prompt (static; date and location are sent with each message)
+SYSTEM_PROMPT = """
+You are an advanced agricultural assistant for Indian farmers.
+Analyze the crop scenario and provide detailed info about:
+- Crop growth duration
+- Fertilizer requirements
+- Total production and per-hectare yield
+
+Respond in both Hindi and English.
+
+Each message starts with a context line giving the current date and the user's location (latitude,longitude).
+""".strip()
 
 # --- Main Crop Info View ---
-def crop_info_view(request):
+@scoped_client
+async def crop_info_view(request):
     if request.method == "GET":
         # Render the HTML form
-        return render(request, "crops/index.html")
+        return await sync_to_async(render)(request, "crops/index.html")
 
     if request.method == "POST":
         try:
             data = json.loads(request.body)
             user_query = data.get("message", "").strip()
             coords = data.get("coords")
+            lang = requested_lang(request, data)
         except json.JSONDecodeError:
-            return JsonResponse({
-                "reply_hi": "⚠️ अमान्य अनुरोध।",
-                "reply_en": "⚠️ Invalid request format."
-            }, status=400)
+            return reply("⚠️ अमान्य अनुरोध।",
+                         "⚠️ Invalid request format.", requested_lang(request), status=400)
 
         if not user_query:
-            return JsonResponse({
-                "reply_hi": "⚠️ कृपया अपना प्रश्न दर्ज करें।",
-                "reply_en": "⚠️ Please enter a question."
-            }, status=400)
-
-        # Gemini system prompt
-        system_prompt = f"""
-        You are an advanced agricultural assistant for Indian farmers.
-        Analyze the crop scenario and provide detailed info about:
-        - Crop growth duration
-        - Fertilizer requirements
-        - Total production and per-hectare yield
-
-        Respond in both Hindi and English.
-
-        Context:
-        Current Date: {timezone.now().strftime('%A, %B %d, %Y')}
-        User Location: Latitude {coords.get('lat', 'not provided') if coords else 'not provided'},
-        Longitude {coords.get('lon', 'not provided') if coords else 'not provided'}
-        """
+            return reply("⚠️ कृपया अपना प्रश्न दर्ज करें।",
+                         "⚠️ Please enter a question.", lang, status=400)
+
+        start = time.perf_counter()
+
+        # --- Local answers from the CropInfo table ---
+        if getattr(settings, "CROP_KB_ENABLED", True):
+            local = await knowledge.answer(user_query)
+            if local is not None:
+                knowledge.path_stats.record("local", start)
+                return reply(*local, lang)
+
+        cached = await llm_cache.aget("crops", user_query, coords)
+        if cached is not None:
+            knowledge.path_stats.record("cache", start)
+            return ai_reply(cached, lang)
+
+        model = gemini_pool.get("crops", "gemini-1.5-flash", SYSTEM_PROMPT)
 
         try:
-            model = genai.GenerativeModel(
-                model_name="gemini-1.5-flash",
-                system_instruction=system_prompt
-            )
-            ai_response = model.generate_content(user_query).text
-            return JsonResponse({
-                "reply_hi": ai_response,
-                "reply_en": ai_response
-            })
+            ai_response = await model.generate(user_query, coords)
+            await llm_cache.aset("crops", user_query, coords, ai_response)
+            knowledge.path_stats.record("gemini", start)
+            return ai_reply(ai_response, lang)
         except Exception as e:
+            knowledge.path_stats.record("error", start)
             print(f"ERROR: Gemini API call failed: {e}")
-            return JsonResponse({
-                "reply_hi": "⚠️ AI सिम्युलेटर से संपर्क करने में त्रुटि हुई।",
-                "reply_en": "⚠️ An error occurred while contacting the AI simulator."
-            }, status=500)
+            return reply("⚠️ AI सिम्युलेटर से संपर्क करने में त्रुटि हुई।",
+                         "⚠️ An error occurred while contacting the AI simulator.", lang,
+                         status=503 if isinstance(e, Unavailable) else 500)
 
     return JsonResponse({"error": f"Method {request.method} not allowed."}, status=405)
@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class LoginsignupConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'loginsignup'
+
+    def ready(self):
+        from django.contrib.auth.signals import user_logged_in
+
+        from .signals import defer_last_login
+        # Replaces django.contrib.auth's receiver (same dispatch_uid) with one that queues the update
+        user_logged_in.disconnect(dispatch_uid='update_last_login')
+        user_logged_in.connect(defer_last_login, dispatch_uid='update_last_login')
@@ -0,0 +1,33 @@
+# loginsignup/hashers.py
+"""
+Password hashers with their cost taken from settings.
+
+``PASSWORD_HASHER`` picks the one used for new passwords; the other stays in
+``PASSWORD_HASHERS`` so existing hashes still verify, and Django re-hashes a
+password with the current hasher and cost on the user's next login.
+Unset (``None``) costs fall back to Django's own defaults. A cost set below
+them is taken as given, and re-hashes existing passwords down to it, so
+only set one deliberately. Argon2 needs the optional ``argon2-cffi`` package.
+"""
+from django.conf import settings
+from django.contrib.auth.hashers import Argon2PasswordHasher, PBKDF2PasswordHasher
+
+
+class TunedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    @property
+    def iterations(self):
+        return getattr(settings, 'PASSWORD_PBKDF2_ITERATIONS', None) or PBKDF2PasswordHasher.iterations
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    @property
+    def time_cost(self):
+        return getattr(settings, 'PASSWORD_ARGON2_TIME_COST', None) or Argon2PasswordHasher.time_cost
+
+    @property
+    def memory_cost(self):
+        return getattr(settings, 'PASSWORD_ARGON2_MEMORY_KB', None) or Argon2PasswordHasher.memory_cost
+
+    @property
+    def parallelism(self):
+        return getattr(settings, 'PASSWORD_ARGON2_PARALLELISM', None) or Argon2PasswordHasher.parallelism
@@ -0,0 +1,134 @@
+import asyncio
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from myapp.management.commands.replay import CSRF_TOKEN, DEFAULT_SERVER, ProcessStats, free_port
+
+# name -> environment for the server process
+CONFIGS = {
+    'stock': {'SQLITE_TUNING': '0', 'DB_WRITE_QUEUE_ENABLED': '0'},
+    'tuned': {'SQLITE_TUNING': '1', 'DB_WRITE_QUEUE_ENABLED': '0'},
+    'tuned+queue': {'SQLITE_TUNING': '1', 'DB_WRITE_QUEUE_ENABLED': '1'},
+}
+
+# Written to the scratch directory for --hasher md5: PBKDF2 takes ~0.4 s per hash, which hides the database
+FAST_HASH_SETTINGS = """
+from {module} import *  # noqa
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+"""
+
+
+async def register_and_login(base_url, n, concurrency, prefix):
+    """``n`` users each register then log in, ``concurrency`` at a time; returns per-step latencies and errors."""
+    latencies = {'register': [], 'login': []}
+    errors = {'register': 0, 'login': 0}
+    expected = {'register': '/login/', 'login': '/'}
+    counter = iter(range(n))
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60.0) as client:
+        async def post(step, path, data):
+            headers = {'Cookie': f'csrftoken={CSRF_TOKEN}', 'X-CSRFToken': CSRF_TOKEN}
+            start = time.perf_counter()
+            try:
+                resp = await client.post(path, data=data, headers=headers)
+                ok = resp.status_code == 302 and resp.headers.get('Location') == expected[step]
+            except httpx.HTTPError:
+                ok = False
+            latencies[step].append(time.perf_counter() - start)
+            errors[step] += not ok
+
+        async def worker():
+            for i in counter:
+                username = f'{prefix}{i}'
+                await post('register', '/register/', {'username': username, 'email': f'{username}@example.com',
+                                                      'password1': 'bench-password', 'password2': 'bench-password'})
+                await post('login', '/login/', {'username': username, 'password': 'bench-password'})
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return {step: np.array(values) * 1000.0 for step, values in latencies.items()}, errors, elapsed
+
+
+class Command(BaseCommand):
+    help = ("Benchmark concurrent registration + login throughput against a scratch SQLite database, "
+            "with the stock backend, the tuned backend, and the tuned backend plus the write queue.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--levels', default='1,8,32', help="Comma-separated concurrency levels.")
+        parser.add_argument('--users', type=int, default=200, help="Users registered (and logged in) per level.")
+        parser.add_argument('--configs', default=','.join(CONFIGS), help="Comma-separated subset of: %s." % ', '.join(CONFIGS))
+        parser.add_argument('--hasher', choices=['md5', 'default'], default='md5',
+                            help="md5 (default) isolates database cost; 'default' keeps the project's password hashers.")
+        parser.add_argument('--server-cmd', default=DEFAULT_SERVER,
+                            help="Server command; {python} and {port} are substituted.")
+
+    def handle(self, *args, **options):
+        levels = [int(x) for x in options['levels'].split(',') if x]
+        names = [c for c in options['configs'].split(',') if c]
+        unknown = [c for c in names if c not in CONFIGS]
+        if unknown:
+            raise CommandError(f"Unknown config(s): {', '.join(unknown)}.")
+
+        self.stdout.write(f"{'config':<12} {'conc':>5} {'users/s':>8} {'reg p50':>8} {'reg p95':>8} "
+                          f"{'login p50':>9} {'login p95':>9} {'errors':>7} {'cpu ms/user':>11}")
+        for name in names:
+            scratch = tempfile.mkdtemp(prefix='agrovistaar-auth-')
+            server = None
+            try:
+                base_url, server = self.start_server(options['server_cmd'], scratch, CONFIGS[name],
+                                                     options['hasher'] == 'md5')
+                stats = ProcessStats(server.pid)
+                for level in levels:
+                    cpu_before = stats.cpu_seconds([server.pid]) if stats.available else 0.0
+                    latencies, errors, elapsed = asyncio.run(
+                        register_and_login(base_url, options['users'], level, f'bench{level}u'))
+                    cpu = stats.cpu_seconds([server.pid]) - cpu_before if stats.available else None
+                    n = options['users']
+                    self.stdout.write(
+                        f"{name:<12} {level:>5} {n / elapsed:>8.1f} "
+                        f"{np.percentile(latencies['register'], 50):>8.0f} {np.percentile(latencies['register'], 95):>8.0f} "
+                        f"{np.percentile(latencies['login'], 50):>9.0f} {np.percentile(latencies['login'], 95):>9.0f} "
+                        f"{errors['register'] + errors['login']:>7} "
+                        + (f"{cpu / n * 1000.0:>11.1f}" if cpu is not None else f"{'-':>11}")
+                    )
+            finally:
+                if server is not None:
+                    server.terminate()
+                    server.wait(timeout=10)
+                shutil.rmtree(scratch, ignore_errors=True)
+
+    def start_server(self, command, scratch, config, fast_hash):
+        port = free_port()
+        env = dict(os.environ, SQLITE_PATH=os.path.join(scratch, 'db.sqlite3'), REQUEST_TRACE_PATH='',
+                   LOGIN_RATE_LIMIT_ENABLED='0', **config)
+        if fast_hash:
+            with open(os.path.join(scratch, 'bench_auth_settings.py'), 'w') as f:
+                f.write(FAST_HASH_SETTINGS.format(module=os.environ['DJANGO_SETTINGS_MODULE']))
+            env['PYTHONPATH'] = os.pathsep.join(filter(None, [scratch, os.environ.get('PYTHONPATH')]))
+            env['DJANGO_SETTINGS_MODULE'] = 'bench_auth_settings'
+        subprocess.run([sys.executable, 'manage.py', 'migrate', '--noinput', '-v0'],
+                       cwd=settings.BASE_DIR, env=env, check=True)
+        server = subprocess.Popen(command.format(python=sys.executable, port=port).split(), cwd=settings.BASE_DIR,
+                                  env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        base_url = f'http://127.0.0.1:{port}'
+        deadline = time.monotonic() + 60
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError(f"Server exited with code {server.returncode}: {command}")
+            try:
+                httpx.get(base_url + '/metrics', timeout=1.0)
+                return base_url, server
+            except httpx.HTTPError:
+                time.sleep(0.2)
+        server.terminate()
+        raise CommandError("Server did not start within 60 s.")
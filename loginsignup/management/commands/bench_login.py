@@ -0,0 +1,67 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.test import Client, override_settings
+
+from loginsignup.hashers import TunedPBKDF2PasswordHasher
+
+BENCH_USER = 'bench-login'
+BENCH_PASSWORD = 'bench-login-password'
+
+# (label, PASSWORD_HASHERS, extra settings)
+HASHERS = [
+    ('pbkdf2, Django default', ['django.contrib.auth.hashers.PBKDF2PasswordHasher'], {}),
+    ('pbkdf2, settings', ['loginsignup.hashers.TunedPBKDF2PasswordHasher'], {}),
+    ('pbkdf2, 600k (opt-in)', ['loginsignup.hashers.TunedPBKDF2PasswordHasher'],
+     {'PASSWORD_PBKDF2_ITERATIONS': 600000}),
+    ('argon2, settings', ['loginsignup.hashers.TunedArgon2PasswordHasher'], {}),
+]
+
+
+class Command(BaseCommand):
+    help = ("Benchmark logins per second per core through login_view (in-process, one thread) "
+            "for each password hasher, plus rejected and rate-limited attempts.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--logins', type=int, default=20, help="Login attempts per row.")
+
+    def run(self, n, username, password, ip='10.0.0.1'):
+        client = Client(REMOTE_ADDR=ip)
+        wall, cpu = time.perf_counter(), time.process_time()
+        for _ in range(n):
+            response = client.post('/login/', {'username': username, 'password': password})
+        wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+        return response, n / wall, n / cpu if cpu else float('inf')
+
+    def row(self, label, response, per_second, per_core):
+        self.stdout.write(f"{label:<36} {response.get('Location', response.status_code)!s:<8} "
+                          f"{per_second:>10.1f} {per_core:>12.1f}")
+
+    def handle(self, *args, **options):
+        n = options['logins']
+        self.stdout.write(f"{'path':<36} {'-> to':<8} {'logins/s':>10} {'per core-s':>12}")
+        unlimited = {'LOGIN_RATE_LIMIT_ENABLED': False}
+        for label, hashers, extra in HASHERS:
+            with override_settings(PASSWORD_HASHERS=hashers, **unlimited, **extra):
+                User.objects.filter(username=BENCH_USER).delete()
+                try:
+                    User.objects.create_user(BENCH_USER, password=BENCH_PASSWORD)
+                except ValueError as e:  # argon2-cffi not installed
+                    self.stdout.write(f"{label:<36} skipped: {e}")
+                    continue
+                try:
+                    self.row(label, *self.run(n, BENCH_USER, BENCH_PASSWORD))
+                    self.row(f"{label}, unknown user", *self.run(n, BENCH_USER + '-missing', BENCH_PASSWORD))
+                finally:
+                    User.objects.filter(username=BENCH_USER).delete()
+
+        # Over the per-IP limit every attempt is refused before authenticate()
+        cache.clear()
+        with override_settings(LOGIN_RATE_LIMIT_ENABLED=True, LOGIN_RATE_LIMIT_PER_IP=0):
+            self.row("rate-limited (no hashing)", *self.run(n * 50, BENCH_USER, BENCH_PASSWORD, ip='10.0.0.2'))
+        cache.clear()
+        self.stdout.write(f"PASSWORD_HASHER={settings.PASSWORD_HASHER}, "
+                          f"PBKDF2 iterations={TunedPBKDF2PasswordHasher().iterations}")
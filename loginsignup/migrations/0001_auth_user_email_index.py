@@ -0,0 +1,18 @@
+# Generated by Django 5.1.5
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        # auth_user.email has no index of its own; registration looks users up by it
+        migrations.RunSQL(
+            sql='CREATE INDEX IF NOT EXISTS loginsignup_auth_user_email_idx ON auth_user (email);',
+            reverse_sql='DROP INDEX IF EXISTS loginsignup_auth_user_email_idx;',
+        ),
+    ]
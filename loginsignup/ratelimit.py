@@ -0,0 +1,71 @@
+# loginsignup/ratelimit.py
+"""
+Login rate limiting, checked before any password hashing.
+
+Fixed windows of ``LOGIN_RATE_LIMIT_WINDOW`` seconds in the ``default`` cache:
+each client IP gets ``LOGIN_RATE_LIMIT_PER_IP`` attempts and each username
+``LOGIN_RATE_LIMIT_PER_USERNAME`` failed attempts (a successful login clears
+the username's count). The default cache is per process, so with several
+workers the effective limits are that many times higher.
+
+Behind a reverse proxy every request arrives from the proxy's address; set
+``TRUSTED_PROXY_COUNT`` to the number of proxies in front of Django (1 for a
+single nginx) and the client IP is read from ``X-Forwarded-For`` instead.
+Entries left of the trusted hops are supplied by the client and ignored.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+def _key(scope, value) -> str:
+    return f"login-rate:{scope}:{hashlib.blake2b(value.encode('utf-8'), digest_size=16).hexdigest()}"
+
+
+def _window() -> int:
+    return getattr(settings, 'LOGIN_RATE_LIMIT_WINDOW', 300)
+
+
+def client_ip(request) -> str:
+    remote_addr = request.META.get('REMOTE_ADDR', '')
+    hops = getattr(settings, 'TRUSTED_PROXY_COUNT', 0)
+    if hops <= 0:
+        return remote_addr
+    # Each trusted proxy appends the address it received the request from
+    forwarded = [a.strip() for a in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',') if a.strip()]
+    if len(forwarded) < hops:
+        return remote_addr  # did not come through every proxy
+    return forwarded[-hops]
+
+
+def allow(ip, username) -> bool:
+    """Count an attempt from ``ip``; False if it or ``username`` is over its limit."""
+    if not getattr(settings, 'LOGIN_RATE_LIMIT_ENABLED', True):
+        return True
+    if cache.get(_key('user', username.lower()), 0) >= getattr(settings, 'LOGIN_RATE_LIMIT_PER_USERNAME', 10):
+        return False
+    key = _key('ip', ip)
+    if cache.add(key, 1, _window()):
+        return True
+    try:
+        attempts = cache.incr(key)
+    except ValueError:  # expired between add() and incr()
+        cache.add(key, 1, _window())
+        return True
+    return attempts <= getattr(settings, 'LOGIN_RATE_LIMIT_PER_IP', 30)
+
+
+def failed(username):
+    if not getattr(settings, 'LOGIN_RATE_LIMIT_ENABLED', True):
+        return
+    key = _key('user', username.lower())
+    if not cache.add(key, 1, _window()):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, 1, _window())
+
+
+def succeeded(username):
+    cache.delete(_key('user', username.lower()))
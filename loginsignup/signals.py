@@ -0,0 +1,12 @@
+from django.contrib.auth.models import User, update_last_login
+from django.utils import timezone
+
+from AgroVistaar.write_queue import write_queue
+
+
+def defer_last_login(sender, user, **kwargs):
+    """Stamp ``last_login`` through the write queue instead of inside the login request."""
+    if not write_queue.enabled:
+        return update_last_login(sender, user, **kwargs)
+    user.last_login = timezone.now()
+    write_queue.submit(User.objects.filter(pk=user.pk).update, last_login=user.last_login)
@@ -1,3 +1,186 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.hashers import Argon2PasswordHasher, PBKDF2PasswordHasher
+from django.contrib.auth.models import User
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.db import IntegrityError
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+
+from . import ratelimit
+from .hashers import TunedArgon2PasswordHasher, TunedPBKDF2PasswordHasher
+
+FAST_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+
+def last_message(response):
+    return [str(m) for m in get_messages(response.wsgi_request)][-1]
+
+
+@override_settings(PASSWORD_PBKDF2_ITERATIONS=None, PASSWORD_ARGON2_TIME_COST=None,
+                   PASSWORD_ARGON2_MEMORY_KB=None, PASSWORD_ARGON2_PARALLELISM=None)
+class HasherTests(SimpleTestCase):
+    def django_hash(self, password='s3cret-pass'):
+        hasher = PBKDF2PasswordHasher()
+        return hasher.encode(password, hasher.salt())
+
+    def test_defaults_match_django(self):
+        self.assertEqual(TunedPBKDF2PasswordHasher().iterations, PBKDF2PasswordHasher.iterations)
+        argon2 = TunedArgon2PasswordHasher()
+        self.assertEqual((argon2.time_cost, argon2.memory_cost, argon2.parallelism),
+                         (Argon2PasswordHasher.time_cost, Argon2PasswordHasher.memory_cost,
+                          Argon2PasswordHasher.parallelism))
+
+    def test_existing_hash_is_not_downgraded(self):
+        self.assertFalse(TunedPBKDF2PasswordHasher().must_update(self.django_hash()))
+
+    def test_explicit_cost_is_used(self):
+        with override_settings(PASSWORD_PBKDF2_ITERATIONS=1_200_000):
+            hasher = TunedPBKDF2PasswordHasher()
+            self.assertEqual(hasher.iterations, 1_200_000)
+            self.assertTrue(hasher.must_update(self.django_hash()))
+            self.assertTrue(hasher.verify('s3cret-pass', hasher.encode('s3cret-pass', hasher.salt())))
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHERS, DB_WRITE_QUEUE_ENABLED=False)
+class RegisterTests(TestCase):
+    def setUp(self):
+        User.objects.create_user('ramesh', email='ramesh@example.com', password='khet-2024-pass')
+
+    def register(self, username, email, password='naya-pass-123', confirm=None):
+        return self.client.post('/register/', {'username': username, 'email': email,
+                                               'password1': password, 'password2': confirm or password})
+
+    def test_new_user_is_created(self):
+        response = self.register('suresh', 'suresh@example.com')
+        self.assertRedirects(response, '/login/', fetch_redirect_response=False)
+        self.assertTrue(User.objects.filter(username='suresh', email='suresh@example.com').exists())
+
+    def test_username_taken(self):
+        response = self.register('ramesh', 'other@example.com')
+        self.assertRedirects(response, '/register/', fetch_redirect_response=False)
+        self.assertEqual(last_message(response), "Username already taken!")
+        self.assertEqual(User.objects.count(), 1)
+
+    def test_email_taken(self):
+        response = self.register('suresh', 'ramesh@example.com')
+        self.assertEqual(last_message(response), "Email already registered!")
+        self.assertEqual(User.objects.count(), 1)
+
+    def test_username_and_email_taken_reports_username(self):
+        User.objects.create_user('geeta', email='geeta@example.com', password='x')
+        response = self.register('ramesh', 'geeta@example.com')
+        self.assertEqual(last_message(response), "Username already taken!")
+
+    def test_passwords_must_match(self):
+        response = self.register('suresh', 'suresh@example.com', confirm='different-pass')
+        self.assertEqual(last_message(response), "Passwords do not match!")
+        self.assertFalse(User.objects.filter(username='suresh').exists())
+
+    def test_concurrent_registration_race(self):
+        # Another request created the user between the lookup and create_user()
+        with mock.patch.object(User.objects, 'create_user', side_effect=IntegrityError):
+            response = self.register('suresh', 'suresh@example.com')
+        self.assertRedirects(response, '/register/', fetch_redirect_response=False)
+        self.assertEqual(last_message(response), "Username already taken!")
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHERS, DB_WRITE_QUEUE_ENABLED=False,
+                   LOGIN_RATE_LIMIT_ENABLED=True, LOGIN_RATE_LIMIT_WINDOW=300,
+                   LOGIN_RATE_LIMIT_PER_IP=5, LOGIN_RATE_LIMIT_PER_USERNAME=3)
+class LoginRateLimitTests(TestCase):
+    PASSWORD = 'khet-2024-pass'
+    THROTTLED = "Too many login attempts. Please try again in a few minutes."
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        User.objects.create_user('ramesh', password=self.PASSWORD)
+
+    def login(self, password, username='ramesh', ip='10.0.0.1', **extra):
+        return self.client.post('/login/', {'username': username, 'password': password}, REMOTE_ADDR=ip, **extra)
+
+    def test_valid_login(self):
+        response = self.login(self.PASSWORD)
+        self.assertRedirects(response, '/', fetch_redirect_response=False)
+        self.assertIn('_auth_user_id', self.client.session)
+
+    def test_username_locked_after_failures(self):
+        for _ in range(3):
+            self.assertEqual(last_message(self.login('wrong')), "Invalid username or password!")
+        # The right password is refused too, from any IP, until the window ends
+        response = self.login(self.PASSWORD, ip='10.0.0.9')
+        self.assertRedirects(response, '/login/', fetch_redirect_response=False)
+        self.assertEqual(last_message(response), self.THROTTLED)
+        self.assertNotIn('_auth_user_id', self.client.session)
+
+    def test_username_lock_is_case_insensitive(self):
+        for _ in range(3):
+            self.login('wrong', username='RAMESH')
+        self.assertEqual(last_message(self.login(self.PASSWORD)), self.THROTTLED)
+
+    @override_settings(LOGIN_RATE_LIMIT_PER_IP=100)
+    def test_success_resets_username_failures(self):
+        for _ in range(2):
+            self.login('wrong')
+        self.assertRedirects(self.login(self.PASSWORD), '/', fetch_redirect_response=False)
+        self.client.logout()
+        for _ in range(2):
+            self.login('wrong')
+        self.assertRedirects(self.login(self.PASSWORD), '/', fetch_redirect_response=False)
+
+    def test_lock_ends_with_window(self):
+        for _ in range(3):
+            self.login('wrong')
+        self.assertEqual(last_message(self.login(self.PASSWORD)), self.THROTTLED)
+        cache.clear()  # what expiry of the window's keys does
+        self.assertRedirects(self.login(self.PASSWORD), '/', fetch_redirect_response=False)
+
+    def test_ip_limit_counts_every_attempt(self):
+        User.objects.create_user('suresh', password=self.PASSWORD)
+        for i in range(5):
+            self.login('wrong', username=f'user{i}')
+        self.assertEqual(last_message(self.login(self.PASSWORD, username='suresh')), self.THROTTLED)
+        # Other clients are unaffected
+        self.assertRedirects(self.login(self.PASSWORD, username='suresh', ip='10.0.0.2'), '/',
+                             fetch_redirect_response=False)
+
+    @override_settings(LOGIN_RATE_LIMIT_ENABLED=False)
+    def test_disabled(self):
+        for _ in range(10):
+            self.login('wrong')
+        self.assertRedirects(self.login(self.PASSWORD), '/', fetch_redirect_response=False)
+
+    @override_settings(TRUSTED_PROXY_COUNT=1)
+    def test_clients_behind_proxy_are_limited_separately(self):
+        User.objects.create_user('suresh', password=self.PASSWORD)
+        proxy = '172.16.0.2'
+        for i in range(5):
+            self.login('wrong', username=f'user{i}', ip=proxy, HTTP_X_FORWARDED_FOR='203.0.113.7')
+        throttled = self.login(self.PASSWORD, username='suresh', ip=proxy, HTTP_X_FORWARDED_FOR='203.0.113.7')
+        self.assertEqual(last_message(throttled), self.THROTTLED)
+        # Another farmer behind the same proxy can still sign in
+        response = self.login(self.PASSWORD, username='suresh', ip=proxy, HTTP_X_FORWARDED_FOR='198.51.100.4')
+        self.assertRedirects(response, '/', fetch_redirect_response=False)
+
+
+class ClientIPTests(SimpleTestCase):
+    def request(self, forwarded=None):
+        extra = {'HTTP_X_FORWARDED_FOR': forwarded} if forwarded is not None else {}
+        return RequestFactory().get('/login/', REMOTE_ADDR='172.16.0.2', **extra)
+
+    @override_settings(TRUSTED_PROXY_COUNT=0)
+    def test_forwarded_header_ignored_without_trusted_proxies(self):
+        self.assertEqual(ratelimit.client_ip(self.request('203.0.113.7')), '172.16.0.2')
+
+    @override_settings(TRUSTED_PROXY_COUNT=1)
+    def test_one_proxy(self):
+        self.assertEqual(ratelimit.client_ip(self.request('203.0.113.7')), '203.0.113.7')
+        # A client-supplied X-Forwarded-For cannot pick the address
+        self.assertEqual(ratelimit.client_ip(self.request('1.2.3.4, 203.0.113.7')), '203.0.113.7')
+        self.assertEqual(ratelimit.client_ip(self.request()), '172.16.0.2')
+
+    @override_settings(TRUSTED_PROXY_COUNT=2)
+    def test_two_proxies(self):
+        self.assertEqual(ratelimit.client_ip(self.request('1.2.3.4, 203.0.113.7, 10.0.0.5')), '203.0.113.7')
+        self.assertEqual(ratelimit.client_ip(self.request('203.0.113.7')), '172.16.0.2')
@@ -2,6 +2,10 @@ from django.shortcuts import render, redirect
 from django.contrib.auth.models import User
 from django.contrib.auth import authenticate, login, logout
 from django.contrib import messages
+from django.db import IntegrityError
+from django.db.models import Q
+
+from . import ratelimit
 
 # REGISTER VIEW
 
@@ -17,17 +21,21 @@ def register_view(request):
             messages.error(request, "Passwords do not match!")
             return redirect('loginsignup:register')
 
-        if User.objects.filter(username=username).exists():
-            messages.error(request, "Username already taken!")
+        # One query over the username (unique) and email indexes
+        taken = User.objects.filter(Q(username=username) | Q(email=email)).values_list('username', flat=True)[:2]
+        if taken:
+            if username in taken:
+                messages.error(request, "Username already taken!")
+            else:
+                messages.error(request, "Email already registered!")
             return redirect('loginsignup:register')
 
-        if User.objects.filter(email=email).exists():
-            messages.error(request, "Email already registered!")
+        # Create user (the unique index catches a concurrent registration of the same name)
+        try:
+            User.objects.create_user(username=username, email=email, password=password1)
+        except IntegrityError:
+            messages.error(request, "Username already taken!")
             return redirect('loginsignup:register')
-
-        # Create user
-        user = User.objects.create_user(username=username, email=email, password=password1)
-        user.save()
         messages.success(request, "Account created successfully! Please login.")
         return redirect('loginsignup:login')
 
@@ -42,12 +50,19 @@ def login_view(request):
         username = request.POST.get("username").strip()
         password = request.POST.get("password")
 
+        # Throttle before authenticate(), which hashes even for unknown usernames
+        if not ratelimit.allow(ratelimit.client_ip(request), username):
+            messages.error(request, "Too many login attempts. Please try again in a few minutes.")
+            return redirect('loginsignup:login')
+
         user = authenticate(request, username=username, password=password)
         if user is not None:
+            ratelimit.succeeded(username)
             login(request, user)
             messages.success(request, f"Welcome back, {user.username}!")
             return redirect('home')  # Redirect to home page
         else:
+            ratelimit.failed(username)
             messages.error(request, "Invalid username or password!")
             return redirect('loginsignup:login')
 
@@ -0,0 +1,114 @@
+# myapp/batching.py
+"""
+Micro-batching front-end for the crop recommendation model.
+
+Concurrent requests each submit a single feature row; a background thread
+collects whatever arrives within ``max_wait_ms`` (or until ``max_batch_size``
+rows are queued) and runs one vectorized prediction over the stacked batch,
+then hands every caller its own result.
+
+Coalescing needs requests that predict at the same time from different
+threads, i.e. a threaded WSGI server (gunicorn's gthread worker with
+``--threads N``, or runserver). Under ASGI Django runs sync views such as
+``prediction_view`` one at a time on a single thread, so every batch holds
+one row: predictions still work, they just are not batched.
+"""
+import os
+import queue
+import threading
+import time
+import weakref
+from concurrent.futures import Future
+
+import numpy as np
+
+
+class MicroBatcher:
+    def __init__(self, predict_fn, max_batch_size=32, max_wait_ms=5.0, name='batcher'):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self.name = name
+        self._reset()
+        _batchers.add(self)
+
+    def _reset(self):
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.rows = 0
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+
+    # ---------------- Public API ----------------
+    def submit(self, row) -> Future:
+        """Queue one feature row and return a Future for its prediction."""
+        self._ensure_started()
+        future = Future()
+        self._queue.put((np.asarray(row, dtype=np.float64).reshape(-1), future))
+        return future
+
+    def predict(self, row, timeout=None):
+        """Blocking helper: submit a row and wait for its result."""
+        return self.submit(row).result(timeout=timeout)
+
+    def stats(self) -> dict:
+        return {
+            'batches': self.batches,
+            'rows': self.rows,
+            'avg_batch_size': (self.rows / self.batches) if self.batches else 0.0,
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait * 1000.0,
+        }
+
+    # ---------------- Worker ----------------
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.perf_counter() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._dispatch(batch)
+
+    def _dispatch(self, batch):
+        live = [(r, f) for r, f in batch if f.set_running_or_notify_cancel()]
+        if not live:
+            return
+        rows = np.vstack([r for r, _ in live])
+        futures = [f for _, f in live]
+        try:
+            results = self.predict_fn(rows)
+        except Exception as e:
+            for f in futures:
+                f.set_exception(e)
+            return
+        self.batches += 1
+        self.rows += len(futures)
+        for f, result in zip(futures, results):
+            f.set_result(result)
+
+
+# Worker thread and queue locks do not survive fork(); start every batcher fresh in children
+_batchers = weakref.WeakSet()
+
+
+def _reset_after_fork():
+    for batcher in list(_batchers):
+        batcher._reset()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
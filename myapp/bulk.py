@@ -0,0 +1,92 @@
+# myapp/bulk.py
+"""
+Chunked bulk crop recommendation over soil-test CSV sheets.
+
+Rows are read ``chunk_size`` at a time, predicted with one vectorized call per
+chunk and serialized straight back out, so memory stays bounded by the chunk
+size rather than the size of the uploaded sheet.
+"""
+import itertools
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+
+from myapp import views
+
+DEFAULT_FERTILIZER = "General Urea/DAP"
+INVALID_ROW = "Error: invalid input"
+
+
+def chunk_size_setting():
+    return getattr(settings, 'BULK_PREDICTION_CHUNK_SIZE', 5000)
+
+
+def _match_columns(columns):
+    """Map sheet headers onto FEATURES case-insensitively; raise if any are missing."""
+    lookup = {str(c).strip().lower(): c for c in columns}
+    mapping = {}
+    missing = []
+    for feat in views.FEATURES:
+        col = lookup.get(feat.lower())
+        if col is None:
+            missing.append(feat)
+        else:
+            mapping[col] = feat
+    if missing:
+        raise ValueError(f"Missing columns: {', '.join(missing)}")
+    return mapping
+
+
+def predict_chunk(chunk: pd.DataFrame) -> pd.DataFrame:
+    """Append predicted_crop and fertilizer columns to one chunk of rows."""
+    mapping = _match_columns(chunk.columns)
+    X = chunk[list(mapping)].rename(columns=mapping)[views.FEATURES]
+    X = X.apply(pd.to_numeric, errors='coerce').to_numpy(dtype=np.float64)
+    valid = np.isfinite(X).all(axis=1)
+
+    crops = pd.Series(INVALID_ROW, index=chunk.index, dtype=object)
+    if valid.any():
+        crops[valid] = views.predict_crops(X[valid])
+
+    out = chunk.copy()
+    out['predicted_crop'] = crops.where(~valid, crops.str.capitalize())
+    out['fertilizer'] = crops.map(views.fertilizer_map).fillna(DEFAULT_FERTILIZER).where(valid, '')
+    return out
+
+
+def iter_predictions(source, chunk_size=None):
+    """Yield predicted DataFrame chunks from a path or file-like CSV source."""
+    reader = pd.read_csv(source, chunksize=chunk_size or chunk_size_setting())
+    for chunk in reader:
+        yield predict_chunk(chunk)
+
+
+def iter_csv(chunks):
+    for i, chunk in enumerate(chunks):
+        yield chunk.to_csv(index=False, header=(i == 0))
+
+
+def iter_ndjson(chunks):
+    for chunk in chunks:
+        text = chunk.to_json(orient='records', lines=True, force_ascii=False)
+        yield text if text.endswith("\n") else text + "\n"
+
+
+SERIALIZERS = {
+    'csv': (iter_csv, 'text/csv'),
+    'ndjson': (iter_ndjson, 'application/x-ndjson'),
+}
+
+
+def stream_predictions(source, fmt='csv', chunk_size=None):
+    """
+    Validate the first chunk eagerly (so bad sheets fail before streaming
+    starts), then return (iterator of text pieces, content type).
+    """
+    serializer, content_type = SERIALIZERS[fmt]
+    chunks = iter_predictions(source, chunk_size)
+    first = next(chunks, None)
+    if first is None or first.empty:  # a header-only sheet still yields one empty chunk
+        raise ValueError("CSV has no rows.")
+    return serializer(itertools.chain([first], chunks)), content_type
@@ -0,0 +1,46 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from myapp.management.commands.bench_prediction import load_rows
+from myapp.registry import registry
+
+
+class Command(BaseCommand):
+    help = "Compare single-row and batched latency of the tf.keras and NumPy crop model backends."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--single', type=int, default=500, help="Single-row calls to time.")
+        parser.add_argument('--batch-sizes', default='32,256,2200')
+        parser.add_argument('--repeat', type=int, default=20, help="Repeats per batch size.")
+
+    def handle(self, *args, **options):
+        X = registry.get('crop_scaler').transform(load_rows())
+        backends = {}
+        for name in ('keras', 'numpy'):
+            if registry.available(f'crop_model_{name}'):
+                backends[name] = registry.get(f'crop_model_{name}')
+            else:
+                self.stdout.write(self.style.WARNING(f"{name} backend unavailable, skipped"))
+
+        self.stdout.write(f"{'backend':<8} {'batch':>6} {'p50 ms':>9} {'p99 ms':>9} {'rows/s':>12}")
+        for name, model in backends.items():
+            model.predict(X[:1], verbose=0)  # warm-up
+            for batch in [1] + [int(b) for b in options['batch_sizes'].split(',') if b]:
+                calls = options['single'] if batch == 1 else options['repeat']
+                times = []
+                for i in range(calls):
+                    start_row = (i * batch) % max(1, len(X) - batch)
+                    rows = X[start_row:start_row + batch]
+                    start = time.perf_counter()
+                    model.predict(rows, verbose=0)
+                    times.append(time.perf_counter() - start)
+                times = np.array(times) * 1000.0
+                self.stdout.write(
+                    f"{name:<8} {batch:>6} {np.percentile(times, 50):>9.3f} {np.percentile(times, 99):>9.3f} "
+                    f"{batch / (np.median(times) / 1000.0):>12.0f}"
+                )
+        for name, entry in registry.stats().items():
+            if name.startswith('crop_model_') and entry['loaded']:
+                self.stdout.write(f"{name}: load {entry['load_seconds']:.3f}s, RSS +{entry['rss_delta_mb']:.1f} MB")
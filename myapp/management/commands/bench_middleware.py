@@ -0,0 +1,108 @@
+import asyncio
+import logging
+import time
+
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import AsyncClient, Client, override_settings
+
+from AgroVistaar import profiling
+
+# MIDDLEWARE before the fast path, with CommonMiddleware listed twice
+ORIGINAL_MIDDLEWARE = [
+    'AgroVistaar.middleware.MetricsMiddleware',
+    'AgroVistaar.middleware.RequestTraceMiddleware',
+    'django.middleware.security.SecurityMiddleware',
+    'AgroVistaar.middleware.CompressionMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'corsheaders.middleware.CorsMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.locale.LocaleMiddleware',
+]
+
+# (label, path, body, async) -- requests the views answer without models or upstream calls,
+# so the differences between stacks are middleware overhead
+TARGETS = [
+    ('chat greeting (async)', '/chatbot/api/', '{"message": "hello"}', True),
+    ('price predict 400', '/price/predict/', '[]', False),
+]
+
+
+def strip_probes(middleware):
+    return [path for path in middleware if path != 'AgroVistaar.profiling.MiddlewareProbe']
+
+
+class Command(BaseCommand):
+    help = "Benchmark per-request middleware overhead: original stack vs full stack vs the fast path (in-process)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=3000, help="Requests per target and stack.")
+        parser.add_argument('--profile', action='store_true',
+                            help="Also print the time each middleware adds (MIDDLEWARE_PROFILING probes).")
+
+    def run(self, path, body, is_async, n):
+        """Per-request latencies in microseconds (after one warm-up request)."""
+        latencies = np.empty(n)
+        if is_async:
+            client = AsyncClient()
+
+            async def drive():
+                response = await client.post(path, body, content_type='application/json')
+                for i in range(n):
+                    t = time.perf_counter()
+                    response = await client.post(path, body, content_type='application/json')
+                    latencies[i] = time.perf_counter() - t
+                return response
+
+            response = asyncio.run(drive())
+        else:
+            client = Client()
+            response = client.post(path, body, content_type='application/json')
+            for i in range(n):
+                t = time.perf_counter()
+                response = client.post(path, body, content_type='application/json')
+                latencies[i] = time.perf_counter() - t
+        return response, latencies * 1e6
+
+    def handle(self, *args, **options):
+        n = options['requests']
+        logging.getLogger('django.request').setLevel(logging.ERROR)  # the price target is a 400 on purpose
+        main, fast = strip_probes(settings.MIDDLEWARE), strip_probes(settings.FAST_PATH_MIDDLEWARE)
+        stacks = [
+            ('original', ORIGINAL_MIDDLEWARE, False),
+            ('full stack', main, False),
+            ('fast path', main, True),
+        ]
+
+        self.stdout.write(f"{'target':<24} {'stack':<12} {'status':>6} {'mean us':>9} {'p50 us':>9} "
+                          f"{'p99 us':>9} {'saved us':>9}")
+        for label, path, body, is_async in TARGETS:
+            baseline = None
+            for stack, middleware, fast_path in stacks:
+                with override_settings(MIDDLEWARE=middleware, FAST_PATH_MIDDLEWARE=fast, FAST_PATH_ENABLED=fast_path):
+                    response, latencies = self.run(path, body, is_async, n)
+                mean = latencies.mean()
+                baseline = mean if baseline is None else baseline
+                self.stdout.write(
+                    f"{label:<24} {stack:<12} {response.status_code:>6} {mean:>9.1f} "
+                    f"{np.percentile(latencies, 50):>9.1f} {np.percentile(latencies, 99):>9.1f} "
+                    f"{baseline - mean:>9.1f}"
+                )
+
+        if not options['profile']:
+            return
+        for label, path, body, is_async in TARGETS:
+            for stack, middleware, fast_path in stacks[1:]:
+                profiling.reset()
+                with override_settings(MIDDLEWARE=profiling.probed(middleware),
+                                       FAST_PATH_MIDDLEWARE=profiling.probed(fast), FAST_PATH_ENABLED=fast_path):
+                    self.run(path, body, is_async, n)
+                self.stdout.write(f"\n{label}, {stack}: mean us added per request (probes included)")
+                for name, us in profiling.stats().items():
+                    self.stdout.write(f"  {us:>8.1f}  {name}")
@@ -0,0 +1,70 @@
+import csv
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from myapp import views
+
+DATA_PATH = os.path.join(settings.BASE_DIR, 'myapp', 'data', 'Crop_recommendation.csv')
+
+
+def load_rows(limit=None):
+    with open(DATA_PATH, newline='') as f:
+        reader = csv.DictReader(f)
+        rows = [[float(r[feat]) for feat in views.FEATURES] for r in reader]
+    return np.array(rows[:limit] if limit else rows)
+
+
+class Command(BaseCommand):
+    help = "Benchmark crop prediction throughput and p50/p99 latency, per-call vs micro-batched."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--levels', default='1,4,16,64', help="Comma-separated concurrency levels.")
+        parser.add_argument('--requests', type=int, default=1000, help="Requests per concurrency level.")
+        parser.add_argument('--mode', choices=['direct', 'batched', 'both'], default='both')
+
+    def handle(self, *args, **options):
+        if not views.model_loaded():
+            raise CommandError("Crop model is not loaded; nothing to benchmark.")
+
+        rows = load_rows()
+        levels = [int(x) for x in options['levels'].split(',') if x]
+        modes = ['direct', 'batched'] if options['mode'] == 'both' else [options['mode']]
+        n = options['requests']
+
+        calls = {
+            'direct': lambda row: views.predict_crops(row.reshape(1, -1))[0],
+            'batched': lambda row: views.crop_batcher.predict(row),
+        }
+
+        # Warm up both paths so graph building isn't counted
+        for mode in modes:
+            calls[mode](rows[0])
+
+        self.stdout.write(f"{'mode':<8} {'conc':>5} {'req/s':>10} {'p50 ms':>9} {'p99 ms':>9} {'avg batch':>10}")
+        for mode in modes:
+            call = calls[mode]
+            for level in levels:
+                batches_before = views.crop_batcher.batches
+                rows_before = views.crop_batcher.rows
+
+                def timed(i):
+                    start = time.perf_counter()
+                    call(rows[i % len(rows)])
+                    return time.perf_counter() - start
+
+                start = time.perf_counter()
+                with ThreadPoolExecutor(max_workers=level) as pool:
+                    latencies = np.array(list(pool.map(timed, range(n)))) * 1000.0
+                elapsed = time.perf_counter() - start
+
+                batches = views.crop_batcher.batches - batches_before
+                avg_batch = (views.crop_batcher.rows - rows_before) / batches if batches else 1.0
+                self.stdout.write(
+                    f"{mode:<8} {level:>5} {n / elapsed:>10.1f} "
+                    f"{np.percentile(latencies, 50):>9.2f} {np.percentile(latencies, 99):>9.2f} {avg_batch:>10.1f}"
+                )
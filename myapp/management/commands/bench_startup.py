@@ -0,0 +1,68 @@
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Each snippet runs in a fresh interpreter and prints one JSON line with its
+# own wall time and peak RSS, so runs don't contaminate each other.
+CHECK_SNIPPET = """
+import json, resource, time
+start = time.perf_counter()
+import django
+from django.core.management import call_command
+django.setup()
+call_command('check', verbosity=0)
+print(json.dumps({'seconds': time.perf_counter() - start,
+                  'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}))
+"""
+
+FIRST_REQUEST_SNIPPET = """
+import json, resource, time
+import django
+django.setup()
+from django.test import Client
+from django.test.utils import setup_test_environment
+setup_test_environment()
+client = Client()
+data = {'N': 90, 'P': 42, 'K': 43, 'temperature': 20.9, 'humidity': 82.0, 'ph': 6.5, 'rainfall': 202.9}
+start = time.perf_counter()
+client.post('/prediction/', data)
+first = time.perf_counter() - start
+start = time.perf_counter()
+client.post('/prediction/', data)
+second = time.perf_counter() - start
+print(json.dumps({'seconds': first, 'warm_seconds': second,
+                  'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}))
+"""
+
+
+class Command(BaseCommand):
+    help = ("Measure `manage.py check` startup time and first /prediction/ request latency "
+            "in fresh processes, with lazy loading vs MODEL_PRELOAD=all (the old eager behaviour).")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def _run(self, snippet, preload):
+        env = dict(os.environ)
+        env.setdefault('DJANGO_SETTINGS_MODULE', 'AgroVistaar.settings')
+        env['MODEL_PRELOAD'] = 'all' if preload else ''
+        env['CROP_BATCHING_ENABLED'] = '0'
+        proc = subprocess.run([sys.executable, '-c', snippet], cwd=settings.BASE_DIR, env=env,
+                              capture_output=True, text=True)
+        if proc.returncode != 0:
+            raise CommandError(proc.stderr.strip().splitlines()[-1] if proc.stderr else 'child failed')
+        return json.loads(proc.stdout.strip().splitlines()[-1])
+
+    def handle(self, *args, **options):
+        repeat = options['repeat']
+        self.stdout.write(f"{'scenario':<28} {'mode':<8} {'seconds':>9} {'warm s':>8} {'peak RSS MB':>12}")
+        for label, snippet in (('manage.py check', CHECK_SNIPPET), ('first /prediction/ request', FIRST_REQUEST_SNIPPET)):
+            for mode, preload in (('eager', True), ('lazy', False)):
+                runs = [self._run(snippet, preload) for _ in range(repeat)]
+                best = min(runs, key=lambda r: r['seconds'])
+                warm = f"{best['warm_seconds']:.3f}" if 'warm_seconds' in best else '-'
+                self.stdout.write(f"{label:<28} {mode:<8} {best['seconds']:>9.3f} {warm:>8} {best['peak_rss_mb']:>12.1f}")
@@ -0,0 +1,39 @@
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+from myapp.management.commands.bench_prediction import load_rows
+from myapp.npmodel import NumpyDenseModel, export_npz
+from myapp.registry import MODEL_PATH, NPZ_MODEL_PATH, registry
+
+
+class Command(BaseCommand):
+    help = "Export the Keras crop recommendation model to a NumPy .npz for CROP_MODEL_BACKEND='numpy'."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--source', default=MODEL_PATH)
+        parser.add_argument('--output', default=NPZ_MODEL_PATH)
+        parser.add_argument('--no-verify', action='store_true',
+                            help="Skip comparing argmax against tf.keras on the training data.")
+
+    def handle(self, *args, **options):
+        try:
+            n_layers = export_npz(options['source'], options['output'])
+        except (OSError, KeyError, ValueError) as e:
+            raise CommandError(f"Export failed: {e}")
+        self.stdout.write(f"Wrote {n_layers} dense layers to {options['output']}")
+
+        if options['no_verify']:
+            return
+        try:
+            keras_model = registry.get('crop_model_keras')
+        except Exception as e:
+            self.stdout.write(self.style.WARNING(f"Skipping verification, Keras model unavailable: {e}"))
+            return
+
+        X = registry.get('crop_scaler').transform(load_rows())
+        expected = np.argmax(keras_model.predict(X, verbose=0), axis=1)
+        actual = np.argmax(NumpyDenseModel.load(options['output']).predict(X), axis=1)
+        mismatches = int((expected != actual).sum())
+        if mismatches:
+            raise CommandError(f"{mismatches} of {len(X)} training rows disagree with tf.keras")
+        self.stdout.write(self.style.SUCCESS(f"argmax identical to tf.keras on all {len(X)} training rows"))
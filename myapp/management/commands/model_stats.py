@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from myapp.registry import current_rss_mb, registry
+
+
+class Command(BaseCommand):
+    help = "Report load time and memory per registered ML artifact."
+
+    def add_arguments(self, parser):
+        parser.add_argument('names', nargs='*', help="Artifacts to load first (default: all).")
+        parser.add_argument('--no-load', action='store_true', help="Only report what is already loaded.")
+
+    def handle(self, *args, **options):
+        if not options['no_load']:
+            for name in options['names'] or list(registry.stats()):
+                registry.available(name)
+
+        self.stdout.write(f"{'artifact':<16} {'loaded':<7} {'load s':>8} {'RSS +MB':>9}  error")
+        for name, entry in registry.stats().items():
+            self.stdout.write(
+                f"{name:<16} {str(entry['loaded']):<7} "
+                f"{entry.get('load_seconds', 0.0):>8.3f} {entry.get('rss_delta_mb', 0.0):>9.1f}  "
+                f"{entry.get('error', '')}"
+            )
+        self.stdout.write(f"process RSS: {current_rss_mb():.1f} MB")
@@ -0,0 +1,32 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from myapp import bulk, views
+
+
+class Command(BaseCommand):
+    help = "Run crop/fertilizer recommendation over a soil-test CSV, streaming results chunk by chunk."
+
+    def add_arguments(self, parser):
+        parser.add_argument('input', help="CSV with columns " + ", ".join(views.FEATURES))
+        parser.add_argument('-o', '--output', help="Output path (default: stdout).")
+        parser.add_argument('--format', choices=sorted(bulk.SERIALIZERS), default='csv')
+        parser.add_argument('--chunk-size', type=int, default=None)
+
+    def handle(self, *args, **options):
+        if not views.model_loaded():
+            raise CommandError("Crop model is not loaded. Check server logs.")
+
+        try:
+            pieces, _ = bulk.stream_predictions(options['input'], options['format'], options['chunk_size'])
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Could not read CSV: {e}")
+
+        out = open(options['output'], 'w', encoding='utf-8', newline='') if options['output'] else sys.stdout
+        try:
+            for piece in pieces:
+                out.write(piece)
+        finally:
+            if out is not sys.stdout:
+                out.close()
@@ -0,0 +1,298 @@
+import asyncio
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from urllib.parse import parse_qs
+
+import httpx
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from AgroVistaar import traces
+from chatbot.stubs import StubUpstream
+
+# Same CSRF cookie + header pair as chatbot's loadtest_ai; passes the check over plain HTTP
+CSRF_TOKEN = 'loadtest' * 4
+
+# runserver is a development server (about 40 ms of TCP delayed-ACK per request here); compare runs
+# with each other, or pass --server-cmd with the deployment server for absolute numbers
+DEFAULT_SERVER = '{python} manage.py runserver --noreload 127.0.0.1:{port}'
+
+CREATE_USERS = """
+import os
+from django.contrib.auth.models import User
+for name in filter(None, os.environ['REPLAY_USERS'].split(',')):
+    if not User.objects.filter(username=name).exists():
+        User.objects.create_user(username=name, email=name + '@example.com', password=os.environ['REPLAY_PASSWORD'])
+"""
+
+
+# ---------------- Server process CPU / RSS (Linux /proc) ----------------
+class ProcessStats:
+    """CPU seconds and resident memory of a server process and its worker children."""
+
+    def __init__(self, pid):
+        self.pid = pid
+        self.tick = os.sysconf('SC_CLK_TCK') if hasattr(os, 'sysconf') else 100
+        self.available = os.path.exists(f'/proc/{pid}/stat')
+
+    def pids(self):
+        found = [self.pid]
+        for entry in os.listdir('/proc'):
+            if entry.isdigit():
+                try:
+                    with open(f'/proc/{entry}/stat') as f:
+                        ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+                except (OSError, IndexError, ValueError):
+                    continue
+                if ppid == self.pid:
+                    found.append(int(entry))
+        return found
+
+    def cpu_seconds(self, pids):
+        total = 0
+        for pid in pids:
+            try:
+                with open(f'/proc/{pid}/stat') as f:
+                    fields = f.read().rsplit(')', 1)[1].split()
+                total += int(fields[11]) + int(fields[12])  # utime + stime
+            except (OSError, IndexError, ValueError):
+                pass
+        return total / self.tick
+
+    def rss_bytes(self, pids):
+        total = 0
+        for pid in pids:
+            try:
+                with open(f'/proc/{pid}/status') as f:
+                    for line in f:
+                        if line.startswith('VmRSS:'):
+                            total += int(line.split()[1]) * 1024
+                            break
+            except OSError:
+                pass
+        return total
+
+
+class RssSampler(threading.Thread):
+    def __init__(self, stats, pids, interval=0.05):
+        super().__init__(daemon=True)
+        self.stats, self.pids, self.interval = stats, pids, interval
+        self.peak = 0
+        self._done = threading.Event()
+
+    def run(self):
+        while not self._done.is_set():
+            self.peak = max(self.peak, self.stats.rss_bytes(self.pids))
+            self._done.wait(self.interval)
+
+    def stop(self):
+        self._done.set()
+        self.join()
+        return self.peak
+
+
+# ---------------- Replay ----------------
+async def replay(base_url, entries, n, concurrency):
+    """Send ``n`` requests cycling through ``entries`` with ``concurrency`` in flight."""
+    latencies, errors = [], 0
+    counter = iter(range(n))
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60.0) as client:
+        async def worker():
+            nonlocal errors
+            for i in counter:
+                entry = entries[i % len(entries)]
+                # An explicit Cookie header keeps cookies set by earlier responses out of the request
+                headers = {'Cookie': f'csrftoken={CSRF_TOKEN}', 'X-CSRFToken': CSRF_TOKEN}
+                if entry.get('content_type'):
+                    headers['Content-Type'] = entry['content_type']
+                url = entry['path'] + (f"?{entry['query']}" if entry.get('query') else '')
+                start = time.perf_counter()
+                try:
+                    resp = await client.request(entry['method'], url, content=entry.get('body', '').encode('utf-8'),
+                                                headers=headers)
+                    await resp.aread()
+                    if resp.status_code >= 500:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return np.array(latencies) * 1000.0, errors, elapsed
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def login_users(entries):
+    users = set()
+    for entry in entries:
+        if entry['method'] == 'POST' and entry.get('content_type', '').startswith('application/x-www-form-urlencoded'):
+            users.update(parse_qs(entry.get('body', '')).get('username', []))
+    return sorted(u.strip() for u in users if u.strip())
+
+
+class Command(BaseCommand):
+    help = ("Replay a recorded request trace against a local server with Gemini/OpenWeather stubbed, "
+            "report throughput, latency percentiles and server CPU/RSS per endpoint, and fail on regressions.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--trace', default=getattr(settings, 'REPLAY_TRACE_PATH', 'traces/smoke.jsonl'),
+                            help="JSONL trace recorded by RequestTraceMiddleware.")
+        parser.add_argument('--levels', default='1,10', help="Comma-separated concurrency levels.")
+        parser.add_argument('--requests', type=int, default=200, help="Requests per endpoint and level.")
+        parser.add_argument('--endpoints', default='', help="Comma-separated endpoint groups (default: all in the trace).")
+        parser.add_argument('--url', default='', help="Replay against an already running server instead of starting one.")
+        parser.add_argument('--server-pid', type=int, default=0, help="With --url: server process to sample CPU/RSS from.")
+        parser.add_argument('--server-cmd', default=DEFAULT_SERVER,
+                            help="Server command; {python} and {port} are substituted. "
+                                 "E.g. 'uvicorn AgroVistaar.asgi:application --port {port} --workers 2'.")
+        parser.add_argument('--latency', type=float, default=0.3, help="Stub Gemini latency in seconds.")
+        parser.add_argument('--weather-latency', type=float, default=0.1, help="Stub OpenWeather latency in seconds.")
+        parser.add_argument('--save', default='', help="Write results as JSON (use as a later --baseline).")
+        parser.add_argument('--baseline', default='', help="Results JSON from a previous run to compare against.")
+        parser.add_argument('--threshold', type=float, default=0.2,
+                            help="Allowed regression vs baseline: throughput drop or p95 increase (0.2 = 20%%).")
+
+    def handle(self, *args, **options):
+        entries = traces.load(options['trace'])
+        if not entries:
+            raise CommandError(f"No requests in {options['trace']}.")
+        groups = defaultdict(list)
+        for entry in entries:
+            if not entry.get('body_truncated'):
+                groups[traces.endpoint_for(entry['path'], '/' + settings.STATIC_URL.lstrip('/'))].append(entry)
+        wanted = [e for e in options['endpoints'].split(',') if e] or sorted(groups)
+        missing = [e for e in wanted if e not in groups]
+        if missing:
+            raise CommandError(f"No trace entries for: {', '.join(missing)} (have: {', '.join(sorted(groups))}).")
+        levels = [int(x) for x in options['levels'].split(',') if x]
+
+        with StubUpstream(latency=options['latency'], weather_latency=options['weather_latency']) as stub:
+            if options['url']:
+                base_url, server, scratch = options['url'].rstrip('/'), None, None
+                pid = options['server_pid']
+            else:
+                scratch = tempfile.mkdtemp(prefix='agrovistaar-replay-')
+                base_url, server = self.start_server(options['server_cmd'], stub, scratch, login_users(entries))
+                pid = server.pid
+            try:
+                results = self.run(base_url, groups, wanted, levels, options['requests'], pid)
+            finally:
+                if server is not None:
+                    server.terminate()
+                    server.wait(timeout=10)
+                    shutil.rmtree(scratch, ignore_errors=True)
+
+        if options['save']:
+            with open(options['save'], 'w', encoding='utf-8') as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(f"Saved results to {options['save']}")
+        if options['baseline']:
+            self.compare(results, options['baseline'], options['threshold'])
+
+    # ---------------- Local server ----------------
+    def start_server(self, command, stub, scratch, users):
+        port = free_port()
+        env = dict(os.environ,
+                   GEMINI_API_BASE=stub.url, OPENWEATHER_API_BASE=stub.url,
+                   GEMINI_API_KEY='replay', OPENWEATHER_API_KEY='replay',
+                   SQLITE_PATH=os.path.join(scratch, 'db.sqlite3'), REQUEST_TRACE_PATH='',
+                   LOGIN_RATE_LIMIT_ENABLED='0',  # every replayed login comes from 127.0.0.1
+                   REPLAY_USERS=','.join(users), REPLAY_PASSWORD=traces.REPLAY_PASSWORD)
+        manage = [sys.executable, 'manage.py']
+        for setup in (['migrate', '--noinput', '-v0'], ['shell', '-c', CREATE_USERS]):
+            subprocess.run(manage + setup, cwd=settings.BASE_DIR, env=env, check=True)
+
+        self.stdout.write(f"Starting server on port {port} with Gemini/OpenWeather stubbed at {stub.url}")
+        server = subprocess.Popen(command.format(python=sys.executable, port=port).split(), cwd=settings.BASE_DIR,
+                                  env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        base_url = f'http://127.0.0.1:{port}'
+        deadline = time.monotonic() + 60
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError(f"Server exited with code {server.returncode}: {command}")
+            try:
+                httpx.get(base_url + '/metrics', timeout=1.0)
+                return base_url, server
+            except httpx.HTTPError:
+                time.sleep(0.2)
+        server.terminate()
+        raise CommandError("Server did not start within 60 s.")
+
+    # ---------------- Benchmark ----------------
+    def run(self, base_url, groups, wanted, levels, n, pid):
+        stats = ProcessStats(pid) if pid else None
+        sample = stats is not None and stats.available
+        self.stdout.write(
+            f"{'endpoint':<11} {'conc':>5} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} "
+            f"{'errors':>7} {'cpu ms/req':>11} {'cores':>6} {'rss MB':>8}"
+        )
+        results = {}
+        for endpoint in wanted:
+            entries = groups[endpoint]
+            asyncio.run(replay(base_url, entries, min(len(entries), 5), 1))  # warm up
+            for level in levels:
+                pids = stats.pids() if sample else []
+                cpu_before = stats.cpu_seconds(pids) if sample else 0.0
+                sampler = RssSampler(stats, pids) if sample else None
+                if sampler:
+                    sampler.start()
+                latencies, errors, elapsed = asyncio.run(replay(base_url, entries, n, level))
+                cpu = (stats.cpu_seconds(pids) - cpu_before) if sample else None
+                rss = sampler.stop() if sampler else None
+
+                row = {
+                    'endpoint': endpoint, 'concurrency': level, 'requests': n,
+                    'throughput': n / elapsed,
+                    'p50': float(np.percentile(latencies, 50)),
+                    'p95': float(np.percentile(latencies, 95)),
+                    'p99': float(np.percentile(latencies, 99)),
+                    'errors': errors,
+                    'cpu_ms_per_request': cpu / n * 1000.0 if cpu is not None else None,
+                    'cores': cpu / elapsed if cpu is not None else None,
+                    'rss_mb': rss / 2 ** 20 if rss is not None else None,
+                }
+                results[f'{endpoint}@{level}'] = row
+                self.stdout.write(
+                    f"{endpoint:<11} {level:>5} {row['throughput']:>9.1f} {row['p50']:>9.1f} {row['p95']:>9.1f} "
+                    f"{row['p99']:>9.1f} {errors:>7} "
+                    + (f"{row['cpu_ms_per_request']:>11.2f} {row['cores']:>6.2f} {row['rss_mb']:>8.1f}"
+                       if sample else f"{'-':>11} {'-':>6} {'-':>8}")
+                )
+        return results
+
+    def compare(self, results, path, threshold):
+        with open(path, encoding='utf-8') as f:
+            baseline = json.load(f)
+        failures = []
+        for key, row in results.items():
+            base = baseline.get(key)
+            if base is None:
+                continue
+            if row['throughput'] < base['throughput'] * (1 - threshold):
+                failures.append(f"{key}: throughput {row['throughput']:.1f} req/s vs {base['throughput']:.1f}")
+            if row['p95'] > base['p95'] * (1 + threshold):
+                failures.append(f"{key}: p95 {row['p95']:.1f} ms vs {base['p95']:.1f}")
+            if row['errors'] > base['errors']:
+                failures.append(f"{key}: {row['errors']} errors vs {base['errors']}")
+        if failures:
+            for failure in failures:
+                self.stderr.write(f"REGRESSION {failure}")
+            raise CommandError(f"{len(failures)} regression(s) beyond {threshold:.0%} of {path}.")
+        self.stdout.write(self.style.SUCCESS(f"No regressions beyond {threshold:.0%} of {path}."))
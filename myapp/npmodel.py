@@ -0,0 +1,128 @@
+# myapp/npmodel.py
+"""
+TensorFlow-free inference for the crop recommendation network.
+
+``export_npz`` reads the Sequential Dense/BatchNormalization/Dropout stack
+straight out of the Keras ``.h5`` file (via h5py, no TensorFlow needed),
+folds each inference-mode BatchNormalization into the following Dense layer
+and saves the result as a handful of arrays in a ``.npz``. ``NumpyDenseModel``
+then runs the forward pass with plain NumPy matmuls.
+"""
+import json
+
+import numpy as np
+
+ACTIVATIONS = {
+    'linear': lambda x: x,
+    'relu': lambda x: np.maximum(x, 0, out=x),
+    'sigmoid': lambda x: 1.0 / (1.0 + np.exp(-x)),
+    'tanh': np.tanh,
+}
+
+
+def _softmax(x):
+    x = x - x.max(axis=1, keepdims=True)
+    np.exp(x, out=x)
+    x /= x.sum(axis=1, keepdims=True)
+    return x
+
+
+ACTIVATIONS['softmax'] = _softmax
+
+
+def _layer_weights(group):
+    """Return {short_name: array} for one layer group of a Keras .h5 file."""
+    out = {}
+    for full_name in group.attrs.get('weight_names', []):
+        full_name = full_name.decode() if isinstance(full_name, bytes) else full_name
+        short = full_name.split('/')[-1].split(':')[0]
+        out[short] = np.asarray(group[full_name], dtype=np.float64)
+    return out
+
+
+def read_h5_layers(h5_path):
+    """Read a Sequential Keras model into a list of ('dense'|'affine', ...) layers."""
+    import h5py
+
+    layers = []
+    with h5py.File(h5_path, 'r') as f:
+        config = f.attrs['model_config']
+        config = json.loads(config.decode() if isinstance(config, bytes) else config)
+        weights = f['model_weights']
+        for layer in config['config']['layers']:
+            kind, cfg = layer['class_name'], layer['config']
+            if kind in ('InputLayer', 'Dropout'):
+                continue  # no-ops at inference time
+            w = _layer_weights(weights[cfg['name']])
+            if kind == 'Dense':
+                activation = cfg.get('activation', 'linear')
+                if activation not in ACTIVATIONS:
+                    raise ValueError(f"Unsupported activation '{activation}' in layer {cfg['name']}")
+                bias = w.get('bias', np.zeros(w['kernel'].shape[1]))
+                layers.append(('dense', w['kernel'], bias, activation))
+            elif kind == 'BatchNormalization':
+                gamma = w.get('gamma', np.ones_like(w['moving_mean']))
+                beta = w.get('beta', np.zeros_like(w['moving_mean']))
+                scale = gamma / np.sqrt(w['moving_variance'] + cfg.get('epsilon', 1e-3))
+                layers.append(('affine', scale, beta - w['moving_mean'] * scale))
+            else:
+                raise ValueError(f"Unsupported layer type '{kind}' ({cfg['name']})")
+    return layers
+
+
+def fold_layers(layers):
+    """Fold every affine (BatchNorm) layer into the next Dense; return [(W, b, activation)]."""
+    dense = []
+    pending = None  # (scale, shift) waiting for the next Dense
+    for layer in layers:
+        if layer[0] == 'affine':
+            _, scale, shift = layer
+            if pending is not None:
+                scale, shift = pending[0] * scale, pending[1] * scale + shift
+            pending = (scale, shift)
+            continue
+        _, W, b, activation = layer
+        if pending is not None:
+            scale, shift = pending
+            # (x * scale + shift) @ W + b == x @ (scale[:, None] * W) + (shift @ W + b)
+            W, b = scale[:, None] * W, shift @ W + b
+            pending = None
+        dense.append((W, b, activation))
+    if pending is not None:
+        # Trailing affine layer: express it as a linear Dense with a diagonal kernel
+        scale, shift = pending
+        dense.append((np.diag(scale), shift, 'linear'))
+    return dense
+
+
+def export_npz(h5_path, npz_path, dtype=np.float32):
+    dense = fold_layers(read_h5_layers(h5_path))
+    arrays = {}
+    for i, (W, b, activation) in enumerate(dense):
+        arrays[f'W{i}'] = W.astype(dtype)
+        arrays[f'b{i}'] = b.astype(dtype)
+    arrays['activations'] = np.array([a for _, _, a in dense])
+    np.savez_compressed(npz_path, **arrays)
+    return len(dense)
+
+
+class NumpyDenseModel:
+    """Drop-in for the ``predict`` part of a Keras Sequential dense model."""
+
+    def __init__(self, layers):
+        self.layers = layers
+
+    @classmethod
+    def load(cls, npz_path):
+        with np.load(npz_path) as data:
+            activations = [str(a) for a in data['activations']]
+            layers = [(data[f'W{i}'], data[f'b{i}'], activations[i]) for i in range(len(activations))]
+        return cls(layers)
+
+    def predict(self, X, verbose=0, **kwargs):
+        x = np.asarray(X, dtype=self.layers[0][0].dtype)
+        for W, b, activation in self.layers:
+            x = x @ W
+            x += b
+            x = ACTIVATIONS[activation](x)
+        return x
@@ -0,0 +1,168 @@
+# myapp/registry.py
+"""
+Lazy, process-wide registry for ML artifacts.
+
+Artifacts are registered with a loader callable and only loaded the first
+time they are requested, so workers that never serve a prediction never pay
+for TensorFlow or the pickles. Setting ``MODEL_PRELOAD`` (comma-separated
+names or ``all``) loads them in ``MyappConfig.ready()`` instead; combined with
+gunicorn's ``preload_app`` that happens once in the master and the loaded
+objects are shared copy-on-write with every forked worker.
+"""
+import gc
+import os
+import resource
+import threading
+import time
+
+import joblib
+from django.conf import settings
+
+MODEL_DIR = os.path.join(settings.BASE_DIR, 'myapp', 'model')
+
+
+class ModelLoadError(RuntimeError):
+    pass
+
+
+def current_rss_mb() -> float:
+    """Resident set size of this process in MB (peak RSS where /proc is unavailable)."""
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return usage / 1024 if os.uname().sysname != 'Darwin' else usage / (1024 * 1024)
+
+
+class ModelRegistry:
+    def __init__(self):
+        self._loaders = {}
+        self._artifacts = {}
+        self._errors = {}
+        self._stats = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def register(self, name, loader):
+        with self._lock:
+            self._loaders[name] = loader
+            self._locks.setdefault(name, threading.Lock())
+
+    def is_loaded(self, name) -> bool:
+        return name in self._artifacts
+
+    def get(self, name):
+        try:
+            return self._artifacts[name]
+        except KeyError:
+            pass
+        if name not in self._loaders:
+            raise KeyError(f"No artifact registered as '{name}'")
+        with self._locks[name]:
+            if name in self._artifacts:
+                return self._artifacts[name]
+            if name in self._errors:
+                raise ModelLoadError(f"{name}: {self._errors[name]}")
+
+            rss_before = current_rss_mb()
+            start = time.perf_counter()
+            try:
+                artifact = self._loaders[name]()
+            except Exception as e:
+                print(f"Error loading {name}: {e}")
+                # Remember the failure so every request doesn't retry a broken load; a missing
+                # artifact is retried, so one trained or exported later is picked up without a restart
+                if not isinstance(e, FileNotFoundError) and not isinstance(e.__cause__, FileNotFoundError):
+                    self._errors[name] = e
+                raise ModelLoadError(f"{name}: {e}") from e
+            self._stats[name] = {
+                'load_seconds': time.perf_counter() - start,
+                'rss_delta_mb': current_rss_mb() - rss_before,
+                'pid': os.getpid(),
+            }
+            self._artifacts[name] = artifact
+            return artifact
+
+    def available(self, *names) -> bool:
+        """True if every named artifact is (or can be) loaded."""
+        try:
+            for name in names:
+                self.get(name)
+        except ModelLoadError:
+            return False
+        return True
+
+    def preload(self, names=None):
+        """Eagerly load artifacts (all registered ones by default)."""
+        for name in (names or list(self._loaders)):
+            try:
+                self.get(name)
+            except ModelLoadError:
+                pass
+        # Move everything loaded so far out of the GC's tracked generations so
+        # collections in forked workers don't touch (and un-share) those pages.
+        if hasattr(gc, 'freeze'):
+            gc.freeze()
+
+    def reset(self, name=None):
+        """Forget loaded artifacts (or one of them) so the next get() reloads."""
+        names = [name] if name else list(self._loaders)
+        for n in names:
+            self._artifacts.pop(n, None)
+            self._errors.pop(n, None)
+            self._stats.pop(n, None)
+
+    def stats(self) -> dict:
+        out = {}
+        for name in self._loaders:
+            entry = {'loaded': name in self._artifacts}
+            entry.update(self._stats.get(name, {}))
+            if name in self._errors:
+                entry['error'] = str(self._errors[name])
+            out[name] = entry
+        return out
+
+
+registry = ModelRegistry()
+
+
+# ---------------- Crop recommendation artifacts ----------------
+def _load_keras_model(path):
+    import tensorflow as tf  # deferred: importing TF alone costs seconds and hundreds of MB
+    return tf.keras.models.load_model(path)
+
+
+MODEL_PATH = os.path.join(MODEL_DIR, 'crop_recommendation_model.h5')
+NPZ_MODEL_PATH = os.path.join(MODEL_DIR, 'crop_recommendation_model.npz')
+SCALER_PATH = os.path.join(MODEL_DIR, 'crop_scaler.pkl')
+ENCODER_PATH = os.path.join(MODEL_DIR, 'crop_label_encoder.pkl')
+
+def _load_numpy_model(path):
+    from myapp.npmodel import NumpyDenseModel
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"{path} not found; run `manage.py export_crop_model` first")
+    return NumpyDenseModel.load(path)
+
+
+def _load_crop_model():
+    # CROP_MODEL_BACKEND picks the implementation behind the 'crop_model' name
+    backend = getattr(settings, 'CROP_MODEL_BACKEND', 'keras')
+    return registry.get(f'crop_model_{backend}')
+
+
+registry.register('crop_model_keras', lambda: _load_keras_model(MODEL_PATH))
+registry.register('crop_model_numpy', lambda: _load_numpy_model(NPZ_MODEL_PATH))
+registry.register('crop_model', _load_crop_model)
+registry.register('crop_scaler', lambda: joblib.load(SCALER_PATH))
+registry.register('crop_encoder', lambda: joblib.load(ENCODER_PATH))
+
+
+def preload_from_settings():
+    value = getattr(settings, 'MODEL_PRELOAD', '')
+    if isinstance(value, str):
+        value = [v.strip() for v in value.split(',') if v.strip()]
+    if not value:
+        return
+    registry.preload(None if 'all' in value else value)
@@ -1,3 +1,220 @@
-from django.test import TestCase
+import io
+import json
+import threading
+import warnings
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+import pandas as pd
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, override_settings
+
+from . import batching, views
+from .npmodel import ACTIVATIONS, NumpyDenseModel, fold_layers, read_h5_layers
+from .registry import MODEL_PATH, NPZ_MODEL_PATH, ModelLoadError, ModelRegistry, registry
+
+
+@override_settings(FAST_PATH_ENABLED=True, ALLOWED_HOSTS=['agrovistaar.example'])
+class FastPathHostTests(SimpleTestCase):
+    # GET is answered (405) before the model is needed, so these run without the artifacts
+
+    def test_allowed_host_reaches_view(self):
+        response = self.client.get('/prediction/bulk/', HTTP_HOST='agrovistaar.example')
+        self.assertEqual(response.status_code, 405)
+
+    def test_disallowed_host_rejected_on_fast_path(self):
+        with self.assertLogs('django.security.DisallowedHost', 'ERROR'):
+            response = self.client.get('/prediction/bulk/', HTTP_HOST='evil.example')
+        self.assertEqual(response.status_code, 400)
+
+    def test_disallowed_host_rejected_on_full_stack(self):
+        with self.assertLogs('django.security.DisallowedHost', 'ERROR'):
+            response = self.client.get('/prediction/', HTTP_HOST='evil.example')
+        self.assertEqual(response.status_code, 400)
+
+
+class ModelRegistryTests(SimpleTestCase):
+    def test_missing_artifact_is_retried(self):
+        registry = ModelRegistry()
+        loader = mock.Mock(side_effect=[FileNotFoundError('model.pkl'), 'model'])
+        registry.register('model', loader)
+        with self.assertRaises(ModelLoadError):
+            registry.get('model')
+        self.assertEqual(registry.get('model'), 'model')
+        self.assertEqual(loader.call_count, 2)
+
+    def test_missing_dependency_artifact_is_retried(self):
+        registry = ModelRegistry()
+        registry.register('backend', mock.Mock(side_effect=[FileNotFoundError('model.npz'), 'model']))
+        registry.register('model', lambda: registry.get('backend'))
+        with self.assertRaises(ModelLoadError):
+            registry.get('model')
+        self.assertEqual(registry.get('model'), 'model')
+
+    def test_broken_artifact_is_remembered(self):
+        registry = ModelRegistry()
+        loader = mock.Mock(side_effect=ValueError('corrupt pickle'))
+        registry.register('model', loader)
+        for _ in range(2):
+            with self.assertRaises(ModelLoadError):
+                registry.get('model')
+        self.assertEqual(loader.call_count, 1)
+        self.assertEqual(registry.stats()['model']['error'], 'corrupt pickle')
+
+
+class MicroBatcherTests(SimpleTestCase):
+    def test_concurrent_rows_share_a_batch(self):
+        sizes = []
+
+        def predict(rows):
+            sizes.append(len(rows))
+            return rows.sum(axis=1)
+
+        batcher = batching.MicroBatcher(predict, max_batch_size=8, max_wait_ms=200)
+        barrier = threading.Barrier(8)
+        results = {}
+
+        def request(i):
+            barrier.wait()
+            results[i] = batcher.predict([i, 1], timeout=5)
+
+        threads = [threading.Thread(target=request, args=(i,)) for i in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(results, {i: i + 1 for i in range(8)})
+        self.assertEqual(sum(sizes), 8)
+        self.assertLess(len(sizes), 8)
+
+    def test_errors_reach_every_caller(self):
+        batcher = batching.MicroBatcher(mock.Mock(side_effect=ValueError('bad row')), max_wait_ms=0)
+        with self.assertRaisesMessage(ValueError, 'bad row'):
+            batcher.predict(np.zeros(3), timeout=5)
+
+    def test_fork_starts_batchers_fresh(self):
+        batcher = batching.MicroBatcher(lambda rows: rows[:, 0], max_wait_ms=0)
+        self.assertEqual(batcher.predict([7.0], timeout=5), 7.0)
+        old_queue, old_lock = batcher._queue, batcher._lock
+        batching._reset_after_fork()
+        self.assertIsNot(batcher._queue, old_queue)
+        self.assertIsNot(batcher._lock, old_lock)
+        self.assertIsNone(batcher._thread)
+        self.assertEqual(batcher.stats()['rows'], 0)
+        self.assertEqual(batcher.predict([3.0], timeout=5), 3.0)
+
+
+@override_settings(CROP_MODEL_BACKEND='numpy', BULK_PREDICTION_CHUNK_SIZE=2)
+class BulkPredictionTests(SimpleTestCase):
+    HEADER = 'N,P,K,temperature,humidity,ph,rainfall,farm'
+    ROWS = [
+        '90,42,43,20.8,82.0,6.5,202.9,north',
+        '20,67,20,26.0,22.0,5.7,140.0,east',
+        'abc,42,43,20.8,82.0,6.5,202.9,south',
+        '104,18,30,23.6,60.3,6.7,140.9,west',
+        '60,55,44,23.0,82.3,,263.9,river',
+    ]
+
+    def setUp(self):
+        registry.reset('crop_model')
+        self.addCleanup(registry.reset, 'crop_model')
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')  # scaler/encoder pickled with an older scikit-learn
+            registry.get('crop_scaler'), registry.get('crop_encoder')
+
+    def post(self, text, fmt='csv'):
+        upload = SimpleUploadedFile('soil.csv', text.encode('utf-8'), content_type='text/csv')
+        return self.client.post(f'/prediction/bulk/?format={fmt}', {'file': upload})
+
+    def expected_crops(self, rows):
+        X = np.array([[float(v) for v in row.split(',')[:7]] for row in rows])
+        return [crop.capitalize() for crop in views.predict_crops(X)]
+
+    def test_valid_rows(self):
+        response = self.post('\n'.join([self.HEADER] + self.ROWS[:2] + self.ROWS[3:4]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        out = pd.read_csv(io.StringIO(b''.join(response.streaming_content).decode('utf-8')))
+        crops = self.expected_crops(self.ROWS[:2] + self.ROWS[3:4])
+        self.assertEqual(out['predicted_crop'].tolist(), crops)
+        self.assertEqual(out['fertilizer'].tolist(),
+                         [views.fertilizer_map.get(c.lower(), 'General Urea/DAP') for c in crops])
+        self.assertEqual(out['farm'].tolist(), ['north', 'east', 'west'])  # other columns pass through
+
+    def test_invalid_rows_reported_in_place(self):
+        response = self.post('\n'.join([self.HEADER] + self.ROWS), fmt='ndjson')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = [json.loads(line) for line in b''.join(response.streaming_content).decode('utf-8').splitlines()]
+        self.assertEqual([line['farm'] for line in lines], ['north', 'east', 'south', 'west', 'river'])
+        for i in (2, 4):
+            self.assertEqual((lines[i]['predicted_crop'], lines[i]['fertilizer']), ('Error: invalid input', ''))
+        valid = [self.ROWS[i] for i in (0, 1, 3)]
+        self.assertEqual([lines[i]['predicted_crop'] for i in (0, 1, 3)], self.expected_crops(valid))
+
+    def test_headers_match_case_insensitively(self):
+        response = self.post('\n'.join([self.HEADER.upper()] + self.ROWS[:1]))
+        out = pd.read_csv(io.StringIO(b''.join(response.streaming_content).decode('utf-8')))
+        self.assertEqual(out['predicted_crop'].tolist(), self.expected_crops(self.ROWS[:1]))
+
+    def test_missing_column_is_a_400(self):
+        response = self.post('N,P,K,temperature,humidity,rainfall\n90,42,43,20.8,82.0,202.9')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Missing columns: ph', response.json()['error'])
+
+    def test_bad_requests(self):
+        self.assertEqual(self.client.post('/prediction/bulk/').status_code, 400)
+        self.assertEqual(self.post(self.HEADER).status_code, 400)  # no rows
+        self.assertEqual(self.post('\n'.join([self.HEADER] + self.ROWS), fmt='xlsx').status_code, 400)
+
+
+def unfolded_forward(layers, X):
+    """Reference forward pass: BatchNorm applied as its own layer, as Keras does at inference time."""
+    x = np.array(X, dtype=np.float64)
+    for layer in layers:
+        if layer[0] == 'affine':
+            x = x * layer[1] + layer[2]
+        else:
+            _, W, b, activation = layer
+            x = ACTIVATIONS[activation](x @ W + b)
+    return x
+
+
+class FoldLayersTests(SimpleTestCase):
+    def setUp(self):
+        self.rng = np.random.default_rng(5)
+        self.X = self.rng.normal(size=(16, 7))
+
+    def dense(self, n_in, n_out, activation):
+        return ('dense', self.rng.normal(size=(n_in, n_out)), self.rng.normal(size=n_out), activation)
+
+    def batchnorm(self, n):
+        gamma, beta = self.rng.uniform(0.5, 2.0, n), self.rng.normal(size=n)
+        mean, var = self.rng.normal(size=n), self.rng.uniform(0.1, 3.0, n)
+        scale = gamma / np.sqrt(var + 1e-3)
+        return ('affine', scale, beta - mean * scale)
+
+    def assertFoldsExactly(self, layers):
+        folded = NumpyDenseModel(fold_layers(layers))
+        np.testing.assert_allclose(folded.predict(self.X), unfolded_forward(layers, self.X), rtol=1e-9, atol=1e-12)
+
+    def test_batchnorm_between_dense_layers(self):
+        layers = [self.dense(7, 12, 'relu'), self.batchnorm(12), self.dense(12, 8, 'relu'),
+                  self.batchnorm(8), self.dense(8, 5, 'softmax')]
+        self.assertEqual(len(fold_layers(layers)), 3)
+        self.assertFoldsExactly(layers)
+
+    def test_leading_and_consecutive_batchnorms(self):
+        layers = [self.batchnorm(7), self.batchnorm(7), self.dense(7, 6, 'tanh'), self.dense(6, 3, 'sigmoid')]
+        self.assertEqual(len(fold_layers(layers)), 2)
+        self.assertFoldsExactly(layers)
+
+    def test_trailing_batchnorm(self):
+        layers = [self.dense(7, 4, 'relu'), self.batchnorm(4)]
+        self.assertEqual(len(fold_layers(layers)), 2)
+        self.assertFoldsExactly(layers)
+
+    def test_shipped_npz_matches_h5(self):
+        layers = read_h5_layers(MODEL_PATH)
+        expected = unfolded_forward(layers, self.X * 50)
+        np.testing.assert_allclose(NumpyDenseModel.load(NPZ_MODEL_PATH).predict(self.X * 50), expected,
+                                   rtol=1e-3, atol=1e-5)
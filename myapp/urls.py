@@ -9,6 +9,7 @@ app_name = 'myapp'
 
 urlpatterns = [
     path('prediction/', views.prediction_view, name='prediction'),
+    path('prediction/bulk/', views.bulk_prediction_view, name='bulk_prediction'),
     
 
 ]
\ No newline at end of file
@@ -1,28 +1,21 @@
 # myapp/views.py
 from django.shortcuts import render
-import os
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt
 import numpy as np
-import tensorflow as tf
-import joblib
 from django.conf import settings
 
-# Paths
-MODEL_PATH = os.path.join(settings.BASE_DIR, 'myapp', 'model', 'crop_recommendation_model.h5')
-SCALER_PATH = os.path.join(settings.BASE_DIR, 'myapp', 'model', 'crop_scaler.pkl')
-ENCODER_PATH = os.path.join(settings.BASE_DIR, 'myapp', 'model', 'crop_label_encoder.pkl')
-
-# Load model and preprocessors
-try:
-    crop_model = tf.keras.models.load_model(MODEL_PATH)
-    crop_scaler = joblib.load(SCALER_PATH)
-    crop_encoder = joblib.load(ENCODER_PATH)
-    model_loaded = True
-except Exception as e:
-    print(f"Error loading model or preprocessors: {e}")
-    crop_model = None
-    crop_scaler = None
-    crop_encoder = None
-    model_loaded = False
+from AgroVistaar.metrics import INFERENCE_ROWS, INFERENCE_SECONDS, timed
+from myapp.batching import MicroBatcher
+from myapp.registry import registry
+
+# Model and preprocessors are loaded lazily by the registry on first use
+CROP_ARTIFACTS = ('crop_model', 'crop_scaler', 'crop_encoder')
+
+
+def model_loaded():
+    return registry.available(*CROP_ARTIFACTS)
+
 
 # Fertilizer map
 fertilizer_map = {
@@ -37,22 +30,41 @@ fertilizer_map = {
 # Features in order
 FEATURES = ["N", "P", "K", "temperature", "humidity", "ph", "rainfall"]
 
+
+def predict_crops(X):
+    """Vectorized scale -> predict -> decode for an (n, len(FEATURES)) array."""
+    INFERENCE_ROWS.inc('crop', amount=len(X))
+    with timed(INFERENCE_SECONDS, 'crop'):
+        X_scaled = registry.get('crop_scaler').transform(X)
+        pred_idx = np.argmax(registry.get('crop_model').predict(X_scaled, verbose=0), axis=1)
+        return registry.get('crop_encoder').inverse_transform(pred_idx)
+
+
+# Concurrent requests share one model call per batch
+crop_batcher = MicroBatcher(
+    predict_crops,
+    max_batch_size=getattr(settings, 'CROP_BATCH_MAX_SIZE', 32),
+    max_wait_ms=getattr(settings, 'CROP_BATCH_MAX_WAIT_MS', 5),
+    name='crop-batcher',
+)
+
 # Prediction & Dashboard view
 def prediction_view(request):
     prediction_result = None
     fertilizer_result = None
     input_data = {f: '' for f in FEATURES}
 
-    if request.method == 'POST' and model_loaded:
+    if request.method == 'POST' and model_loaded():
         try:
             # Collect input data
             input_data = {f: request.POST.get(f, 0) for f in FEATURES}
             X = np.array([float(input_data[f]) for f in FEATURES]).reshape(1, -1)
 
-            # Scale inputs and predict
-            X_scaled = crop_scaler.transform(X)
-            pred_idx = np.argmax(crop_model.predict(X_scaled, verbose=0), axis=1)[0]
-            predicted_crop = crop_encoder.inverse_transform([pred_idx])[0]
+            # Scale inputs and predict (batched with concurrent requests)
+            if getattr(settings, 'CROP_BATCHING_ENABLED', True):
+                predicted_crop = crop_batcher.predict(X[0], timeout=getattr(settings, 'CROP_BATCH_TIMEOUT', 10))
+            else:
+                predicted_crop = predict_crops(X)[0]
 
             # Capitalize first letter
             predicted_crop = predicted_crop.capitalize()
@@ -66,7 +78,7 @@ def prediction_view(request):
         except Exception as e:
             prediction_result = f"Error: {e}"
 
-    elif not model_loaded:
+    elif not model_loaded():
         prediction_result = "Model not loaded. Check server logs."
 
     context = {
@@ -77,3 +89,30 @@ def prediction_view(request):
     }
 
     return render(request, 'myapp/recomm.html', context)
+
+
+# Bulk CSV prediction (streams results back chunk by chunk)
+@csrf_exempt
+def bulk_prediction_view(request):
+    if request.method != 'POST':
+        return JsonResponse({'error': f'Method {request.method} not allowed.'}, status=405)
+    if not model_loaded():
+        return JsonResponse({'error': 'Model not loaded. Check server logs.'}, status=503)
+
+    upload = request.FILES.get('file')
+    if upload is None:
+        return JsonResponse({'error': "Upload a CSV file in the 'file' field."}, status=400)
+
+    fmt = request.GET.get('format', request.POST.get('format', 'csv')).lower()
+    from myapp import bulk
+    if fmt not in bulk.SERIALIZERS:
+        return JsonResponse({'error': f"Unsupported format '{fmt}'. Use csv or ndjson."}, status=400)
+
+    try:
+        pieces, content_type = bulk.stream_predictions(upload, fmt)
+    except Exception as e:
+        return JsonResponse({'error': f"Could not read CSV: {e}"}, status=400)
+
+    response = StreamingHttpResponse(pieces, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="predictions.{fmt}"'
+    return response
@@ -10,3 +10,33 @@ class CropPriceForm(forms.Form):
     Day = forms.IntegerField(min_value=1, max_value=31)
     Month = forms.IntegerField(min_value=1, max_value=12)
     Year = forms.IntegerField(min_value=2000, max_value=2100)
+
+
+class PriceQueryForm(forms.Form):
+    State = forms.CharField(max_length=50, required=False)
+    District = forms.CharField(max_length=50, required=False)
+    Market = forms.CharField(max_length=50, required=False)
+    Commodity = forms.CharField(max_length=50, required=False)
+    Variety = forms.CharField(max_length=50, required=False)
+    Grade = forms.CharField(max_length=50, required=False)
+    start = forms.DateField(required=False, input_formats=['%d-%m-%Y', '%Y-%m-%d'])
+    end = forms.DateField(required=False, input_formats=['%d-%m-%Y', '%Y-%m-%d'])
+    group_by = forms.ChoiceField(required=False, choices=[('', '---')] + [
+        (c, c) for c in ('State', 'District', 'Market', 'Commodity', 'Variety', 'Grade', 'Arrival_Date')
+    ])
+    limit = forms.IntegerField(required=False, min_value=0, max_value=500)
+
+
+class PricePredictionForm(forms.Form):
+    """Inputs of crop_price_pipeline.pkl; `Commodity` (as in CropPriceForm) is accepted for `Crop`."""
+    Crop = forms.CharField(max_length=50)
+    State = forms.CharField(max_length=50)
+    Rainfall = forms.FloatField(min_value=0)
+    Temperature = forms.FloatField()
+    Demand = forms.FloatField(min_value=0)
+    Area = forms.FloatField(min_value=0)
+
+    def __init__(self, data=None, *args, **kwargs):
+        if data is not None and 'Crop' not in data and 'Commodity' in data:
+            data = {**data, 'Crop': data['Commodity']}
+        super().__init__(data, *args, **kwargs)
@@ -0,0 +1,50 @@
+import time
+
+import numpy as np
+import pandas as pd
+from django.core.management.base import BaseCommand
+
+from price.store import CSV_PATH, DIMENSIONS, PriceStore
+
+
+class Command(BaseCommand):
+    help = "Compare indexed PriceStore queries against a pandas scan of the price CSV."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--queries', type=int, default=500)
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        store = PriceStore()
+        self.stdout.write(f"store build: {(time.perf_counter() - start) * 1000:.1f} ms for {store.size} rows")
+
+        df = pd.read_csv(CSV_PATH)
+        sample = df.sample(options['queries'], random_state=0)
+        shapes = {
+            'full key': ('State', 'District', 'Market', 'Commodity'),
+            'state+commodity': ('State', 'Commodity'),
+            'commodity': ('Commodity',),
+        }
+
+        self.stdout.write(f"{'query':<16} {'store p50 us':>13} {'store p99 us':>13} {'scan p50 us':>12}")
+        for label, cols in shapes.items():
+            store_times, scan_times = [], []
+            for _, row in sample.iterrows():
+                filters = {c: row[c] for c in cols if c in DIMENSIONS}
+
+                t = time.perf_counter()
+                store.summary(filters)
+                store_times.append(time.perf_counter() - t)
+
+                t = time.perf_counter()
+                mask = np.ones(len(df), dtype=bool)
+                for c, v in filters.items():
+                    mask &= (df[c] == v).to_numpy()
+                hit = df[mask]
+                (hit['Min Price'].min(), hit['Max Price'].max(), hit['Modal Price'].mean())
+                scan_times.append(time.perf_counter() - t)
+
+            store_us = np.array(store_times) * 1e6
+            scan_us = np.array(scan_times) * 1e6
+            self.stdout.write(f"{label:<16} {np.percentile(store_us, 50):>13.1f} "
+                              f"{np.percentile(store_us, 99):>13.1f} {np.percentile(scan_us, 50):>12.1f}")
@@ -0,0 +1,90 @@
+# price/predictor.py
+"""
+Crop price prediction backed by myapp/model/crop_price_pipeline.pkl.
+
+The pipeline is loaded once through the shared model registry. Inputs are
+normalized into a tuple (canonical category spelling, rounded numbers) that
+doubles as the cache key, so repeated queries for the same market/commodity
+skip the model entirely; misses in a batch are predicted in a single call.
+Crops and states the pipeline was not trained on are rejected (``ValueError``)
+rather than predicted from an all-zero one-hot row.
+"""
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+from django.conf import settings
+
+from AgroVistaar.cache import MISSING, TTLCache
+from AgroVistaar.metrics import Stats
+from myapp.registry import MODEL_DIR, registry
+
+PIPELINE_PATH = os.path.join(MODEL_DIR, 'crop_price_pipeline.pkl')
+CATEGORICAL = ('Crop', 'State')
+NUMERIC = ('Rainfall', 'Temperature', 'Demand', 'Area')
+FEATURES = CATEGORICAL + NUMERIC
+
+registry.register('crop_price_pipeline', lambda: joblib.load(PIPELINE_PATH))
+
+cache = TTLCache(
+    maxsize=getattr(settings, 'PRICE_PREDICTION_CACHE_SIZE', 10000),
+    ttl=getattr(settings, 'PRICE_PREDICTION_CACHE_TTL', 3600),
+)
+Stats('agrovistaar_price_prediction_cache', 'Price prediction result cache.', lambda: {(): cache.stats()})
+
+_canonical = None
+
+
+def canonical_categories():
+    """{column: {lowercased value: spelling the pipeline was trained on}}."""
+    global _canonical
+    if _canonical is None:
+        pipeline = registry.get('crop_price_pipeline')
+        lookup = {col: {} for col in CATEGORICAL}
+        for name, transformer, columns in pipeline.named_steps['preprocessor'].transformers_:
+            categories = getattr(transformer, 'categories_', None)
+            if categories is None:
+                continue
+            for col, values in zip(columns, categories):
+                if col in lookup:
+                    lookup[col] = {str(v).strip().lower(): v for v in values}
+        _canonical = lookup
+    return _canonical
+
+
+def known_values():
+    """Accepted names per categorical column (for API error messages)."""
+    return {col: sorted(map(str, values.values())) for col, values in canonical_categories().items()}
+
+
+def normalize(item: dict) -> tuple:
+    """Cache key / model row for one cleaned input dict; raises ValueError on unknown names."""
+    canonical = canonical_categories()
+    key = []
+    for col in CATEGORICAL:
+        value = str(item[col]).strip()
+        if value.lower() not in canonical[col]:
+            raise ValueError(f"Unknown {col}: {value}")
+        key.append(canonical[col][value.lower()])
+    for col in NUMERIC:
+        key.append(round(float(item[col]), 2))
+    return tuple(key)
+
+
+def predict_many(items):
+    """Predict prices for a list of cleaned input dicts; returns (prices, cache_hit flags)."""
+    keys = [normalize(item) for item in items]
+    prices = [cache.get(k) for k in keys]
+    hits = [p is not MISSING for p in prices]
+
+    missing = {k: None for k, hit in zip(keys, hits) if not hit}  # dedupe, keep order
+    if missing:
+        frame = pd.DataFrame(list(missing), columns=FEATURES)
+        predicted = registry.get('crop_price_pipeline').predict(frame)
+        for k, value in zip(missing, np.asarray(predicted, dtype=float)):
+            value = round(float(value), 2)
+            missing[k] = value
+            cache.set(k, value)
+        prices = [missing[k] if not hit else p for k, p, hit in zip(keys, prices, hits)]
+    return prices, hits
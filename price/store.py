@@ -0,0 +1,265 @@
+# price/store.py
+"""
+In-memory, columnar store for the weekly commodity price sheet.
+
+The CSV is read once; every text column is dictionary-encoded into small
+integer codes and prices/dates become NumPy arrays. Rows are sorted by
+(State, District, Market, Commodity, Arrival_Date), so every prefix of that
+key maps to one contiguous slice and dates inside a full key are sorted.
+Separate date and commodity indexes cover queries that skip the location
+prefix. Queries therefore narrow to a handful of rows via dict lookups and
+``searchsorted`` before any vectorized aggregation runs.
+"""
+import os
+import threading
+import time
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+
+CSV_PATH = os.path.join(settings.BASE_DIR, 'price', 'data', 'Price_Agriculture_commodities_Week.csv')
+
+LOCATION_KEY = ('State', 'District', 'Market', 'Commodity')
+DIMENSIONS = LOCATION_KEY + ('Variety', 'Grade')
+PRICES = {'Min Price': 'min_price', 'Max Price': 'max_price', 'Modal Price': 'modal_price'}
+DATE_COLUMN = 'Arrival_Date'
+DATE_FORMAT = '%d-%m-%Y'
+EPOCH = np.datetime64('1970-01-01', 'D')
+
+
+def to_day(value):
+    """Parse a date (dd-mm-yyyy, yyyy-mm-dd or date object) into days since epoch."""
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    if isinstance(value, str):
+        value = value.strip()
+        value = datetime.strptime(value, DATE_FORMAT if value[2:3] == '-' else '%Y-%m-%d').date()
+    elif isinstance(value, datetime):
+        value = value.date()
+    return (value - date(1970, 1, 1)).days
+
+
+def from_day(day):
+    return str(EPOCH + np.timedelta64(int(day), 'D'))
+
+
+class PriceStore:
+    def __init__(self, path=CSV_PATH):
+        self.path = path
+        self._load()
+
+    # ---------------- Loading & indexes ----------------
+    def _load(self):
+        stat = os.stat(self.path)
+        df = pd.read_csv(self.path)
+        df['_day'] = to_days(df[DATE_COLUMN])
+        for col in DIMENSIONS:
+            df[col] = fold_case(df[col].astype(str).str.strip())
+        df = df.sort_values(list(LOCATION_KEY) + ['_day'], kind='mergesort').reset_index(drop=True)
+
+        self.categories = {}   # column -> array of labels (code -> label)
+        self.lookup = {}       # column -> {lowercased label: code}
+        self.codes = {}        # column -> int32 code array
+        for col in DIMENSIONS:
+            cat = pd.Categorical(df[col])
+            self.categories[col] = np.asarray(cat.categories, dtype=object)
+            self.lookup[col] = {label.lower(): code for code, label in enumerate(self.categories[col])}
+            self.codes[col] = cat.codes.astype(np.int32)
+        self.days = df['_day'].to_numpy(np.int32)
+        self.prices = {name: df[col].to_numpy(np.float64) for col, name in PRICES.items()}
+        self.size = len(df)
+
+        # Prefix index: (code, ...) for 1..4 leading location columns -> (start, stop)
+        self.prefix_index = {}
+        key_codes = np.column_stack([self.codes[c] for c in LOCATION_KEY])
+        for depth in range(1, len(LOCATION_KEY) + 1):
+            keys = key_codes[:, :depth]
+            change = np.ones(self.size, dtype=bool)
+            change[1:] = (keys[1:] != keys[:-1]).any(axis=1)
+            starts = np.flatnonzero(change)
+            stops = np.append(starts[1:], self.size)
+            for start, stop in zip(starts, stops):
+                self.prefix_index[tuple(keys[start])] = (int(start), int(stop))
+
+        # Date index: row ids ordered by day, for date-only range queries
+        self.date_order = np.argsort(self.days, kind='mergesort').astype(np.int32)
+        self.date_sorted = self.days[self.date_order]
+
+        # Commodity index: row ids per commodity, ordered by day
+        order = np.lexsort((self.days, self.codes['Commodity']))
+        bounds = np.searchsorted(self.codes['Commodity'][order], np.arange(len(self.categories['Commodity']) + 1))
+        self.commodity_rows = [order[bounds[i]:bounds[i + 1]].astype(np.int32)
+                               for i in range(len(self.categories['Commodity']))]
+
+        self.signature = (stat.st_mtime_ns, stat.st_size)
+        self.loaded_at = time.time()
+
+    def is_stale(self) -> bool:
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return False
+        return (stat.st_mtime_ns, stat.st_size) != self.signature
+
+    # ---------------- Queries ----------------
+    def encode(self, filters):
+        """Translate {column: label} into {column: code}; None if any label is unknown."""
+        codes = {}
+        for col, value in filters.items():
+            if value in (None, ''):
+                continue
+            code = self.lookup[col].get(str(value).strip().lower())
+            if code is None:
+                return None
+            codes[col] = code
+        return codes
+
+    def _candidates(self, codes, start_day, end_day):
+        """Smallest pre-indexed row set covering the filters, plus filters still to apply."""
+        options = []
+
+        prefix = []
+        for col in LOCATION_KEY:
+            if col not in codes:
+                break
+            prefix.append(codes[col])
+        if prefix:
+            start, stop = self.prefix_index.get(tuple(prefix), (0, 0))
+            if len(prefix) == len(LOCATION_KEY) and stop > start:
+                # Full key: rows are sorted by day, narrow by binary search
+                days = self.days[start:stop]
+                lo = start + np.searchsorted(days, start_day, 'left') if start_day is not None else start
+                hi = start + np.searchsorted(days, end_day, 'right') if end_day is not None else stop
+                start, stop = int(lo), int(hi)
+            options.append((stop - start, np.arange(start, stop, dtype=np.int32), set(LOCATION_KEY[:len(prefix)])))
+
+        if 'Commodity' in codes:
+            rows = self.commodity_rows[codes['Commodity']]
+            options.append((len(rows), rows, {'Commodity'}))
+
+        if start_day is not None or end_day is not None:
+            lo = np.searchsorted(self.date_sorted, start_day, 'left') if start_day is not None else 0
+            hi = np.searchsorted(self.date_sorted, end_day, 'right') if end_day is not None else self.size
+            options.append((hi - lo, self.date_order[lo:hi], set()))
+
+        if not options:
+            return np.arange(self.size, dtype=np.int32), set()
+        _, rows, covered = min(options, key=lambda o: o[0])
+        return rows, covered
+
+    def select(self, filters=None, start=None, end=None):
+        """Row ids matching exact-match filters and an inclusive date range."""
+        codes = self.encode(filters or {})
+        if codes is None:
+            return np.empty(0, dtype=np.int32)
+        start_day = to_day(start) if start else None
+        end_day = to_day(end) if end else None
+
+        rows, covered = self._candidates(codes, start_day, end_day)
+        mask = np.ones(len(rows), dtype=bool)
+        for col, code in codes.items():
+            if col not in covered:
+                mask &= self.codes[col][rows] == code
+        if start_day is not None:
+            mask &= self.days[rows] >= start_day
+        if end_day is not None:
+            mask &= self.days[rows] <= end_day
+        return rows[mask]
+
+    def summarize(self, rows):
+        """min/max/modal price summary over selected row ids."""
+        if len(rows) == 0:
+            return {'count': 0}
+        modal = self.prices['modal_price'][rows]
+        return {
+            'count': int(len(rows)),
+            'min_price': float(self.prices['min_price'][rows].min()),
+            'max_price': float(self.prices['max_price'][rows].max()),
+            'modal_price_avg': round(float(modal.mean()), 2),
+            'modal_price_median': float(np.median(modal)),
+            'from': from_day(self.days[rows].min()),
+            'to': from_day(self.days[rows].max()),
+        }
+
+    def summary(self, filters=None, start=None, end=None):
+        return self.summarize(self.select(filters, start, end))
+
+    def aggregate(self, rows, group_by):
+        """Per-group min/max/avg-modal/count over row ids, grouped by a dimension or Arrival_Date."""
+        if group_by == DATE_COLUMN:
+            keys = self.days[rows]
+            label = from_day
+        else:
+            keys = self.codes[group_by][rows]
+            label = self.categories[group_by].__getitem__
+        if len(rows) == 0:
+            return []
+
+        order = np.argsort(keys, kind='mergesort')
+        keys, rows = keys[order], rows[order]
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+        counts = np.diff(np.append(starts, len(rows)))
+        mins = np.minimum.reduceat(self.prices['min_price'][rows], starts)
+        maxs = np.maximum.reduceat(self.prices['max_price'][rows], starts)
+        modal_sums = np.add.reduceat(self.prices['modal_price'][rows], starts)
+        return [
+            {
+                group_by: label(keys[s]),
+                'count': int(c),
+                'min_price': float(lo),
+                'max_price': float(hi),
+                'modal_price_avg': round(float(total / c), 2),
+            }
+            for s, c, lo, hi, total in zip(starts, counts, mins, maxs, modal_sums)
+        ]
+
+    def records(self, rows, limit=50):
+        """Materialize up to `limit` rows (latest first) as dicts."""
+        rows = rows[np.argsort(-self.days[rows], kind='mergesort')][:limit]
+        out = []
+        for r in rows:
+            record = {col: self.categories[col][self.codes[col][r]] for col in DIMENSIONS}
+            record[DATE_COLUMN] = from_day(self.days[r])
+            record.update({name: float(values[r]) for name, values in self.prices.items()})
+            out.append(record)
+        return out
+
+
+def fold_case(values):
+    """Give labels that differ only in case ('Other'/'other') their most common spelling."""
+    counts = values.value_counts()
+    spelling = pd.Series(counts.index, index=counts.index.str.lower())
+    spelling = spelling[~spelling.index.duplicated()]
+    return values.str.lower().map(spelling)
+
+
+def to_days(series):
+    parsed = pd.to_datetime(series, format=DATE_FORMAT)
+    return (parsed.values.astype('datetime64[D]') - EPOCH).astype(np.int32)
+
+
+# ---------------- Process-wide instance ----------------
+_store = None
+_last_check = 0.0
+_lock = threading.Lock()
+
+
+def get_store() -> PriceStore:
+    """Shared store, rebuilt when the CSV changes (checked at most every few seconds)."""
+    global _store, _last_check
+    interval = getattr(settings, 'PRICE_STORE_RELOAD_CHECK_SECONDS', 30)
+    now = time.monotonic()
+    if _store is not None and now - _last_check < interval:
+        return _store
+    with _lock:
+        if _store is None:
+            _store = PriceStore()
+        elif now - _last_check >= interval and _store.is_stale():
+            try:
+                _store = PriceStore(_store.path)
+            except Exception as e:
+                print(f"Price data reload failed, keeping previous data: {e}")
+        _last_check = now
+    return _store
@@ -0,0 +1,179 @@
+import json
+import os
+import random
+import tempfile
+import warnings
+from unittest import mock
+
+import pandas as pd
+from django.test import SimpleTestCase
+
+from AgroVistaar.cache import MISSING, TTLCache
+from myapp.registry import registry
+from . import predictor
+from .store import CSV_PATH, DATE_COLUMN, DATE_FORMAT, DIMENSIONS, PriceStore
+
+
+def pandas_summary(df, filters, start=None, end=None):
+    """Reference answer: a full scan of the CSV with case-insensitive exact matches."""
+    mask = pd.Series(True, index=df.index)
+    for col, value in filters.items():
+        mask &= df[col].astype(str).str.strip().str.lower() == value.strip().lower()
+    days = pd.to_datetime(df[DATE_COLUMN], format=DATE_FORMAT)
+    if start:
+        mask &= days >= pd.Timestamp(start)
+    if end:
+        mask &= days <= pd.Timestamp(end)
+    rows = df[mask]
+    if rows.empty:
+        return {'count': 0}
+    return {
+        'count': len(rows),
+        'min_price': float(rows['Min Price'].min()),
+        'max_price': float(rows['Max Price'].max()),
+        'modal_price_avg': round(float(rows['Modal Price'].mean()), 2),
+    }
+
+
+class PriceStoreTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.df = pd.read_csv(CSV_PATH)
+        cls.store = PriceStore()
+
+    def assertMatchesPandas(self, filters, start=None, end=None):
+        expected = pandas_summary(self.df, filters, start, end)
+        summary = self.store.summary(filters, start, end)
+        self.assertEqual({k: summary[k] for k in expected}, expected, (filters, start, end))
+
+    def test_labels_differing_in_case_share_a_code(self):
+        self.assertMatchesPandas({'Variety': 'Other'})
+        self.assertMatchesPandas({'Variety': 'other'})
+        self.assertEqual(self.store.summary({'Variety': 'OTHER'})['count'],
+                         int((self.df['Variety'].str.lower() == 'other').sum()))
+
+    def test_random_queries_match_a_pandas_scan(self):
+        rng = random.Random(7)
+        days = pd.to_datetime(self.df[DATE_COLUMN], format=DATE_FORMAT)
+        for _ in range(150):
+            row = self.df.iloc[rng.randrange(len(self.df))]
+            columns = rng.sample(DIMENSIONS, rng.randint(1, 3))
+            filters = {col: rng.choice([str.lower, str.upper, str])(str(row[col])) for col in columns}
+            start = end = None
+            if rng.random() < 0.5:
+                lo, hi = sorted(rng.sample(list(days.dt.date.unique()), 2))
+                start, end = lo.isoformat(), hi.isoformat()
+            self.assertMatchesPandas(filters, start, end)
+
+    def test_unknown_label_matches_nothing(self):
+        self.assertEqual(self.store.summary({'Commodity': 'zzz'}), {'count': 0})
+
+    def test_aggregate_matches_groupby(self):
+        rows = self.store.select({'Commodity': 'Onion'})
+        groups = {g['State']: g for g in self.store.aggregate(rows, 'State')}
+        onion = self.df[self.df['Commodity'].str.strip().str.lower() == 'onion']
+        expected = onion.groupby(onion['State'].str.strip())
+        self.assertEqual(set(groups), set(expected.groups))
+        for state, group in expected:
+            self.assertEqual(groups[state]['count'], len(group))
+            self.assertEqual(groups[state]['min_price'], float(group['Min Price'].min()))
+            self.assertEqual(groups[state]['modal_price_avg'], round(float(group['Modal Price'].mean()), 2))
+
+    def test_mixed_case_rows_stay_in_one_prefix(self):
+        csv = (
+            "State,District,Market,Commodity,Variety,Grade,Arrival_Date,Min Price,Max Price,Modal Price\n"
+            "Punjab,Ludhiana,Khanna,Wheat,Other,FAQ,01-07-2023,2000,2200,2100\n"
+            "Gujarat,Amreli,Damnagar,Wheat,other,FAQ,02-07-2023,2100,2300,2200\n"
+            "punjab,Ludhiana,Khanna,wheat,Other,FAQ,03-07-2023,2300,2500,2400\n"
+        )
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'prices.csv')
+            with open(path, 'w') as f:
+                f.write(csv)
+            store = PriceStore(path)
+        full_key = {'State': 'PUNJAB', 'District': 'ludhiana', 'Market': 'Khanna', 'Commodity': 'Wheat'}
+        rows = store.select(full_key, '2023-07-02', '2023-07-03')
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(store.summary({'Variety': 'OTHER'})['count'], 3)
+        self.assertEqual(sorted(store.select({'Commodity': 'WHEAT'})), [0, 1, 2])
+
+
+class TTLCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.now = 1000.0
+        self.cache = TTLCache(maxsize=2, ttl=60, timer=lambda: self.now)
+
+    def test_entries_expire(self):
+        self.cache.set('wheat', 2100)
+        self.now += 59
+        self.assertEqual(self.cache.get('wheat'), 2100)
+        self.now += 1
+        self.assertIs(self.cache.get('wheat'), MISSING)
+        self.assertEqual(len(self.cache), 0)
+        self.assertEqual(self.cache.stats()['expirations'], 1)
+
+    def test_least_recently_used_is_evicted(self):
+        self.cache.set('wheat', 1)
+        self.cache.set('rice', 2)
+        self.cache.get('wheat')  # rice is now the oldest
+        self.cache.set('maize', 3)
+        self.assertIs(self.cache.get('rice'), MISSING)
+        self.assertEqual((self.cache.get('wheat'), self.cache.get('maize')), (1, 3))
+        stats = self.cache.stats()
+        self.assertEqual((stats['evictions'], stats['hits'], stats['misses']), (1, 3, 1))
+
+    def test_set_refreshes_expiry(self):
+        self.cache.set('wheat', 1)
+        self.now += 50
+        self.cache.set('wheat', 2)
+        self.now += 50
+        self.assertEqual(self.cache.get('wheat'), 2)
+
+
+class PricePredictTests(SimpleTestCase):
+    ITEM = {'Crop': 'Wheat', 'State': 'Punjab', 'Rainfall': 650.0, 'Temperature': 24.5, 'Demand': 120.0, 'Area': 2.0}
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')  # pickled with an older scikit-learn
+            cls.pipeline = registry.get('crop_price_pipeline')
+
+    def setUp(self):
+        patcher = mock.patch.object(predictor, 'cache', TTLCache())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def predict_many(self, items):
+        with mock.patch.object(self.pipeline, 'predict', wraps=self.pipeline.predict) as predict:
+            prices, hits = predictor.predict_many(items)
+        return prices, hits, predict
+
+    def test_misses_are_predicted_in_one_call(self):
+        other = dict(self.ITEM, Crop='rice', State='bihar')
+        prices, hits, predict = self.predict_many([self.ITEM, other, dict(self.ITEM, Crop=' WHEAT ')])
+        self.assertEqual(predict.call_count, 1)
+        self.assertEqual(len(predict.call_args.args[0]), 2)  # the respelled wheat row shares a key
+        self.assertEqual(hits, [False, False, False])
+        self.assertEqual(prices[0], prices[2])
+        expected = self.pipeline.predict(pd.DataFrame([predictor.normalize(self.ITEM)], columns=predictor.FEATURES))
+        self.assertEqual(prices[0], round(float(expected[0]), 2))
+
+    def test_repeat_is_served_from_cache(self):
+        first, _, _ = self.predict_many([self.ITEM])
+        prices, hits, predict = self.predict_many([dict(self.ITEM, Rainfall=650.001)])
+        self.assertEqual((prices, hits), (first, [True]))
+        predict.assert_not_called()
+
+    def test_unknown_category_is_rejected(self):
+        with self.assertRaisesMessage(ValueError, 'Unknown Crop: zzz'):
+            predictor.predict_many([dict(self.ITEM, Crop='zzz')])
+
+    def test_unknown_category_is_a_400(self):
+        response = self.client.post('/price/predict/', json.dumps(dict(self.ITEM, Crop='zzz')),
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['error'], 'Unknown Crop: zzz')
+        self.assertIn('Wheat', response.json()['known']['Crop'])
@@ -0,0 +1,9 @@
+from django.urls import path
+from . import views
+
+app_name = 'price'
+
+urlpatterns = [
+    path('query/', views.price_query_view, name='price_query'),
+    path('predict/', views.price_predict_view, name='price_predict'),
+]
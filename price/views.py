@@ -0,0 +1,73 @@
+import json
+
+from django.conf import settings
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+
+from myapp.registry import ModelLoadError
+from . import predictor
+from .forms import PricePredictionForm, PriceQueryForm
+from .store import DIMENSIONS, get_store
+
+
+# --- Commodity price lookup (served from the in-memory store) ---
+def price_query_view(request):
+    if request.method != 'GET':
+        return JsonResponse({'error': f'Method {request.method} not allowed.'}, status=405)
+
+    form = PriceQueryForm(request.GET)
+    if not form.is_valid():
+        return JsonResponse({'errors': form.errors}, status=400)
+    data = form.cleaned_data
+
+    store = get_store()
+    filters = {col: data[col] for col in DIMENSIONS if data.get(col)}
+    rows = store.select(filters, data['start'], data['end'])
+
+    result = {'filters': filters, **store.summarize(rows)}
+    if data['group_by']:
+        result['groups'] = store.aggregate(rows, data['group_by'])
+    if data['limit']:
+        result['records'] = store.records(rows, data['limit'])
+    return JsonResponse(result)
+
+
+# --- Price prediction (crop_price_pipeline.pkl, memoized per normalized input) ---
+@csrf_exempt
+def price_predict_view(request):
+    if request.method != 'POST':
+        return JsonResponse({'error': f'Method {request.method} not allowed.'}, status=405)
+
+    try:
+        payload = json.loads(request.body)
+    except json.JSONDecodeError:
+        return JsonResponse({'error': 'Invalid JSON format.'}, status=400)
+
+    batched = isinstance(payload, list) or (isinstance(payload, dict) and 'items' in payload)
+    items = payload.get('items') if isinstance(payload, dict) and batched else payload
+    items = items if batched else [items]
+    if not isinstance(items, list) or not items or not all(isinstance(i, dict) for i in items):
+        return JsonResponse({'error': 'Send one input object, a list, or {"items": [...]}.'}, status=400)
+    max_batch = getattr(settings, 'PRICE_PREDICTION_MAX_BATCH', 1000)
+    if len(items) > max_batch:
+        return JsonResponse({'error': f'At most {max_batch} items per request.'}, status=400)
+
+    cleaned = []
+    for index, item in enumerate(items):
+        form = PricePredictionForm(item)
+        if not form.is_valid():
+            return JsonResponse({'error': 'Invalid input.', 'index': index, 'errors': form.errors}, status=400)
+        cleaned.append(form.cleaned_data)
+
+    try:
+        prices, hits = predictor.predict_many(cleaned)
+    except ModelLoadError:
+        return JsonResponse({'error': 'Price model not loaded. Check server logs.'}, status=503)
+    except ValueError as e:
+        return JsonResponse({'error': str(e), 'known': predictor.known_values()}, status=400)
+    except Exception as e:
+        print(f"Price prediction error: {e}")
+        return JsonResponse({'error': 'Could not predict price.'}, status=500)
+
+    results = [{'predicted_price': p, 'cached': hit} for p, hit in zip(prices, hits)]
+    return JsonResponse({'predictions': results} if batched else results[0])
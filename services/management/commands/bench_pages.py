@@ -0,0 +1,56 @@
+import time
+
+import numpy as np
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, override_settings
+
+
+class Command(BaseCommand):
+    help = "Benchmark services page requests/sec with and without the page cache (full middleware stack, in-process)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/', help="Page to request.")
+        parser.add_argument('--requests', type=int, default=2000, help="Requests per mode.")
+        parser.add_argument('--user', default='', help="Existing username to also benchmark signed-in renders.")
+
+    def run(self, client, n, path, **headers):
+        client.get(path, **headers)  # warm up templates and the cache
+        latencies = np.empty(n)
+        start = time.perf_counter()
+        for i in range(n):
+            t = time.perf_counter()
+            response = client.get(path, **headers)
+            latencies[i] = time.perf_counter() - t
+        elapsed = time.perf_counter() - start
+        return response, n / elapsed, latencies * 1000.0
+
+    def handle(self, *args, **options):
+        path, n = options['path'], options['requests']
+        modes = [
+            ('uncached', False, None, {}),
+            ('cached', True, None, {}),
+            ('304', True, None, 'etag'),
+        ]
+        if options['user']:
+            try:
+                user = User.objects.get(username=options['user'])
+            except User.DoesNotExist:
+                raise CommandError(f"No user named {options['user']!r}.")
+            modes += [('signed-in, no fragments', False, user, {}), ('signed-in, fragments', True, user, {})]
+
+        self.stdout.write(f"{'mode':<24} {'status':>6} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'bytes':>8}")
+        for name, enabled, user, headers in modes:
+            caches['pages'].clear()
+            with override_settings(PAGE_CACHE_ENABLED=enabled):
+                client = Client()
+                if user is not None:
+                    client.force_login(user)
+                if headers == 'etag':
+                    headers = {'HTTP_IF_NONE_MATCH': client.get(path)['ETag']}
+                response, rps, latencies = self.run(client, n, path, **headers)
+            self.stdout.write(
+                f"{name:<24} {response.status_code:>6} {rps:>9.1f} {np.percentile(latencies, 50):>8.3f} "
+                f"{np.percentile(latencies, 99):>8.3f} {len(response.content):>8}"
+            )
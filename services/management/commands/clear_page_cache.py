@@ -0,0 +1,12 @@
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+
+from services import pages
+
+
+class Command(BaseCommand):
+    help = "Empty the services page cache (pages and navbar/footer fragments). Run on deploy with a shared cache backend."
+
+    def handle(self, *args, **options):
+        caches['pages'].clear()
+        self.stdout.write(f"Cleared the page cache (current version {pages.version()}).")
@@ -0,0 +1,104 @@
+# services/pages.py
+"""
+Page cache for the mostly static services pages (home, services, about,
+soilInfo, profile).
+
+Anonymous GET/HEAD requests are served whole from the ``pages`` cache, one
+entry per template and active language, rendered once per release. Signed-in
+users still get a fresh render, but their navbar and the footer come from
+``{% cache %}`` fragments keyed on the user and language. Every response
+carries an ETag (and cached pages a Last-Modified), so revalidating browsers
+get a 304 without a body.
+
+All keys include ``version()``: ``PAGE_CACHE_VERSION`` when the deploy sets
+it (e.g. to the release id), otherwise a fingerprint of the template files.
+A deploy that changes a template therefore never serves the old page;
+``manage.py clear_page_cache`` empties the cache outright.
+
+Cached pages must not contain ``{% csrf_token %}`` or per-request data
+outside the ``user.is_authenticated`` branches.
+"""
+import hashlib
+import os
+import time
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.template.loader import render_to_string
+from django.utils import translation
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+
+from AgroVistaar.metrics import PAGE_CACHE
+
+_version = None
+
+
+def version() -> str:
+    global _version
+    if _version is None:
+        _version = getattr(settings, 'PAGE_CACHE_VERSION', '') or template_fingerprint()
+    return _version
+
+
+def template_fingerprint() -> str:
+    """Hash of every app template's path, size and mtime, taken once per process."""
+    digest = hashlib.blake2b(digest_size=8)
+    for config in apps.get_app_configs():
+        for dirpath, dirnames, filenames in os.walk(os.path.join(config.path, 'templates')):
+            dirnames.sort()
+            for name in sorted(filenames):
+                stat = os.stat(os.path.join(dirpath, name))
+                digest.update(f"{dirpath}/{name}:{stat.st_size}:{stat.st_mtime_ns}\n".encode())
+    return digest.hexdigest()
+
+
+def enabled() -> bool:
+    return getattr(settings, 'PAGE_CACHE_ENABLED', True)
+
+
+def page_cache(request):
+    """Context processor: variables for the navbar/footer ``{% cache %}`` tags (timeout 0 disables them)."""
+    return {
+        'page_cache_version': version(),
+        'page_cache_timeout': getattr(settings, 'PAGE_CACHE_TIMEOUT', 3600) if enabled() else 0,
+    }
+
+
+def _etag(content: bytes) -> str:
+    return '"%s"' % hashlib.blake2b(content, digest_size=12).hexdigest()
+
+
+def render_page(request, template_name):
+    anonymous = not request.user.is_authenticated
+    last_modified = None
+    if enabled() and anonymous and request.method in ('GET', 'HEAD'):
+        key = f"page:{version()}:{template_name}:{translation.get_language()}"
+        cache = caches['pages']
+        entry = cache.get(key)
+        if entry is None:
+            content = render_to_string(template_name, request=request).encode('utf-8')
+            entry = (content, _etag(content), int(time.time()))
+            cache.set(key, entry)
+            PAGE_CACHE.inc('miss')
+        else:
+            PAGE_CACHE.inc('hit')
+        content, etag, last_modified = entry
+        response = HttpResponse(content)
+        response.headers['Last-Modified'] = http_date(last_modified)
+    else:
+        response = HttpResponse(render_to_string(template_name, request=request))
+        etag = _etag(response.content)
+        PAGE_CACHE.inc('bypass')
+
+    response.headers['ETag'] = etag
+    patch_vary_headers(response, ('Cookie', 'Accept-Language'))
+    patch_cache_control(response, max_age=0, must_revalidate=True)
+    if not anonymous:
+        patch_cache_control(response, private=True)
+    conditional = get_conditional_response(request, etag, last_modified, response)
+    if conditional is not response:
+        PAGE_CACHE.inc('not_modified')
+    return conditional
@@ -1,3 +1,85 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+
+from . import pages
+
+FAST_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+
+@override_settings(PAGE_CACHE_ENABLED=True, PAGE_CACHE_VERSION='release-1', PASSWORD_HASHERS=FAST_HASHERS,
+                   DB_WRITE_QUEUE_ENABLED=False)
+class PageCacheTests(TestCase):
+    def setUp(self):
+        caches['pages'].clear()
+        self.addCleanup(caches['pages'].clear)
+        patcher = mock.patch.object(pages, '_version', None)  # version() is computed once per process
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def sign_in(self, username):
+        User.objects.create_user(username, password='khet-2024-pass')
+        self.client.login(username=username, password='khet-2024-pass')
+
+    def test_anonymous_page_is_cached_with_validators(self):
+        with mock.patch.object(pages, 'render_to_string', wraps=pages.render_to_string) as render:
+            first = self.client.get('/services/')
+            second = self.client.get('/services/')
+        self.assertEqual(render.call_count, 1)
+        self.assertEqual(first.content, second.content)
+        self.assertEqual(first['ETag'], second['ETag'])
+        self.assertIn('Last-Modified', first)
+        self.assertIn('Cookie', first['Vary'])
+
+    def test_if_none_match_gives_304(self):
+        etag = self.client.get('/services/')['ETag']
+        response = self.client.get('/services/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(self.client.get('/services/', HTTP_IF_NONE_MATCH='"stale"').status_code, 200)
+
+    def test_if_modified_since_gives_304(self):
+        last_modified = self.client.get('/services/')['Last-Modified']
+        self.assertEqual(self.client.get('/services/', HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+
+    def test_signed_in_users_bypass_the_page_cache(self):
+        anonymous = self.client.get('/services/')
+        self.sign_in('ramesh')
+        with mock.patch.object(pages, 'render_to_string', wraps=pages.render_to_string) as render:
+            response = self.client.get('/services/')
+        self.assertEqual(render.call_count, 1)
+        self.assertContains(response, 'ramesh')
+        self.assertNotIn('Last-Modified', response)
+        self.assertIn('private', response['Cache-Control'])
+        self.assertNotEqual(response['ETag'], anonymous['ETag'])
+
+    def test_signed_in_page_never_reaches_other_visitors(self):
+        self.sign_in('ramesh')
+        self.assertContains(self.client.get('/services/'), 'ramesh')
+        self.client.logout()
+        self.assertNotContains(self.client.get('/services/'), 'ramesh')
+        self.sign_in('suresh')
+        response = self.client.get('/services/')
+        self.assertContains(response, 'suresh')
+        self.assertNotContains(response, 'ramesh')
+
+    def test_new_deploy_version_invalidates(self):
+        old = self.client.get('/services/')
+        with mock.patch.object(pages, 'render_to_string', return_value='<p>new release</p>'):
+            self.assertEqual(self.client.get('/services/').content, old.content)  # same release: cached page
+            with override_settings(PAGE_CACHE_VERSION='release-2'), mock.patch.object(pages, '_version', None):
+                response = self.client.get('/services/', HTTP_IF_NONE_MATCH=old['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b'<p>new release</p>')
+        self.assertNotEqual(response['ETag'], old['ETag'])
+
+    @override_settings(PAGE_CACHE_ENABLED=False)
+    def test_disabled(self):
+        with mock.patch.object(pages, 'render_to_string', wraps=pages.render_to_string) as render:
+            self.client.get('/services/')
+            response = self.client.get('/services/')
+        self.assertEqual(render.call_count, 2)
+        self.assertNotIn('Last-Modified', response)
+        self.assertEqual(self.client.get('/services/', HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
@@ -8,6 +8,10 @@ urlpatterns = [
     path('soilInfo/', views.soilInfo, name='soilInfo'),     
     path('about/', views.about, name='about'),     
     path('chatbot/', include('chatbot.urls')),       
+    path('crops/', include('crops.urls')),
+    path('ai_simulator/', include('aisim.urls')),
     path('', include('loginsignup.urls')),          
     path('', include('myapp.urls')),  
+    path('price/', include('price.urls')),
+    path('yield/', include('yield.urls')),
 ]
@@ -1,16 +1,17 @@
-from django.shortcuts import render
+from .pages import render_page
 
+# Mostly static pages: served from the page cache for anonymous visitors (see services.pages)
 def home_view(request):
-    return render(request, 'services/home.html')
+    return render_page(request, 'services/home.html')
 
 def profile(request):
-    return render(request, 'services/profile.html')
+    return render_page(request, 'services/profile.html')
 
 def services(request):
-    return render(request, 'services/services.html')
+    return render_page(request, 'services/services.html')
 
 def about(request):
-    return render(request, 'services/about.html')
+    return render_page(request, 'services/about.html')
 
 def soilInfo(request):
-    return render(request, 'services/SoilInfo.html')
\ No newline at end of file
+    return render_page(request, 'services/SoilInfo.html')
\ No newline at end of file
@@ -0,0 +1,147 @@
+# yield/cube.py
+"""
+Pre-aggregated Crop x Season x State x Crop_Year cube over crop_yield.csv.
+
+``build_cube`` (run offline via ``manage.py build_yield_cube``) materializes
+the full cuboid lattice: for every subset of the four dimensions it groups
+the CSV into occupied cells holding int16 dimension codes, per-measure sums
+and a source-row count, all saved to one compressed ``.npz``. ``YieldCube``
+answers a query from the smallest cuboid that still contains the grouped and
+filtered dimensions, so a roll-up to Crop x State scans a few hundred
+pre-summed cells rather than the ~19.7k raw rows. Means are derived as
+sum / count of the underlying rows.
+"""
+import itertools
+import os
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+
+from myapp.registry import registry
+from .predictor import clean
+
+SOURCE_PATH = os.path.join(settings.BASE_DIR, 'yield', 'data', 'crop_yield.csv')
+CUBE_PATH = os.path.join(settings.BASE_DIR, 'yield', 'data', 'yield_cube.npz')
+
+DIMENSIONS = ('Crop', 'Season', 'State', 'Crop_Year')
+MEASURES = ('Area', 'Production', 'Yield', 'Fertilizer', 'Pesticide')
+
+
+def cuboid_name(dims):
+    return 'all' if not dims else '_'.join(dims)
+
+
+def build_cube(source=SOURCE_PATH, output=CUBE_PATH):
+    df = pd.read_csv(source)
+    arrays = {'measures': np.array(MEASURES)}
+    codes = {}
+    for dim in DIMENSIONS:
+        values = df[dim].astype(str).str.strip() if dim != 'Crop_Year' else df[dim]
+        cat = pd.Categorical(values)
+        labels = np.asarray(cat.categories)
+        arrays[f'labels_{dim}'] = labels.astype(np.int32) if dim == 'Crop_Year' else labels.astype(str)
+        codes[dim] = cat.codes.astype(np.intp)
+    measures = df[list(MEASURES)].to_numpy(dtype=np.float64)
+
+    cells_total = 0
+    for r in range(len(DIMENSIONS) + 1):
+        for dims in itertools.combinations(DIMENSIONS, r):
+            name = cuboid_name(dims)
+            if dims:
+                shape = tuple(len(arrays[f'labels_{d}']) for d in dims)
+                flat = np.ravel_multi_index([codes[d] for d in dims], shape)
+                cells, inverse = np.unique(flat, return_inverse=True)
+                coords = np.column_stack(np.unravel_index(cells, shape)).astype(np.int16)
+            else:
+                inverse = np.zeros(len(df), dtype=np.intp)
+                coords = np.zeros((1, 0), dtype=np.int16)
+            n = len(coords)
+            arrays[f'{name}__coords'] = coords
+            arrays[f'{name}__counts'] = np.bincount(inverse, minlength=n).astype(np.int32)
+            arrays[f'{name}__sums'] = np.column_stack([
+                np.bincount(inverse, weights=measures[:, k], minlength=n) for k in range(len(MEASURES))
+            ])
+            cells_total += n
+    np.savez_compressed(output, **arrays)
+    return cells_total, len(df)
+
+
+class YieldCube:
+    def __init__(self, cuboids, labels, measures):
+        self.cuboids = cuboids    # {dims tuple: (coords int16 (cells, len(dims)), sums (cells, measures), counts)}
+        self.labels = labels      # {dim: array of labels}
+        self.measures = list(measures)
+        self.index = {dim: {clean(v): i for i, v in enumerate(vals)} for dim, vals in labels.items()}
+
+    @classmethod
+    def load(cls, path=CUBE_PATH):
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"{path} not found; run `manage.py build_yield_cube` first")
+        with np.load(path, allow_pickle=False) as data:
+            labels = {dim: data[f'labels_{dim}'] for dim in DIMENSIONS}
+            cuboids = {}
+            for r in range(len(DIMENSIONS) + 1):
+                for dims in itertools.combinations(DIMENSIONS, r):
+                    name = cuboid_name(dims)
+                    cuboids[dims] = (data[f'{name}__coords'], data[f'{name}__sums'], data[f'{name}__counts'])
+            return cls(cuboids, labels, [str(m) for m in data['measures']])
+
+    def _positions(self, dim, values):
+        if dim == 'Crop_Year':
+            wanted = {int(v) for v in values}
+            return [i for i, year in enumerate(self.labels[dim]) if int(year) in wanted]
+        return [self.index[dim][clean(v)] for v in values if clean(v) in self.index[dim]]
+
+    def query(self, by=(), filters=None, year_from=None, year_to=None, measures=None):
+        """
+        Roll up to the `by` dimensions after slicing on `filters` ({dim: [values]})
+        and an optional inclusive year range. Returns one dict per non-empty group.
+        """
+        filters = {d: v for d, v in (filters or {}).items() if d in DIMENSIONS and v}
+        by = [d for d in DIMENSIONS if d in by]
+        needed = set(by) | set(filters)
+        if year_from is not None or year_to is not None:
+            needed.add('Crop_Year')
+        dims = tuple(d for d in DIMENSIONS if d in needed)
+        coords, sums, cell_counts = self.cuboids[dims]
+
+        measures = [m for m in (measures or self.measures) if m in self.measures]
+        m_index = [self.measures.index(m) for m in measures]
+
+        mask = np.ones(len(cell_counts), dtype=bool)
+        for dim, values in filters.items():
+            mask &= np.isin(coords[:, dims.index(dim)], self._positions(dim, values))
+        if year_from is not None or year_to is not None:
+            years = self.labels['Crop_Year'][coords[:, dims.index('Crop_Year')]]
+            if year_from is not None:
+                mask &= years >= year_from
+            if year_to is not None:
+                mask &= years <= year_to
+
+        shape = tuple(len(self.labels[d]) for d in by)
+        if by:
+            selected = coords[mask][:, [dims.index(d) for d in by]].astype(np.intp)
+            groups = np.ravel_multi_index(tuple(selected.T), shape)
+        else:
+            groups = np.zeros(int(mask.sum()), dtype=np.intp)
+        size = int(np.prod(shape)) if by else 1
+        counts = np.bincount(groups, weights=cell_counts[mask], minlength=size)
+        totals = [np.bincount(groups, weights=sums[mask, k], minlength=size) for k in m_index]
+
+        nz = np.flatnonzero(counts)
+        n = counts[nz]
+        columns = {}
+        for dim, idx in zip(by, np.unravel_index(nz, shape) if by else ()):
+            columns[dim] = self.labels[dim][idx].tolist()
+        columns['count'] = n.astype(int).tolist()
+        for m, total in zip(measures, totals):
+            sums_nz = total[nz]
+            columns[m] = [{'sum': s_, 'mean': m_} for s_, m_ in
+                          zip(np.round(sums_nz, 4).tolist(), np.round(sums_nz / n, 6).tolist())]
+        keys = list(columns)
+        rows = [dict(zip(keys, values)) for values in zip(*columns.values())]
+        return rows
+
+
+registry.register('yield_cube', YieldCube.load)
@@ -0,0 +1,33 @@
+from django import forms
+
+
+class YieldPredictionForm(forms.Form):
+    Crop = forms.CharField(max_length=50)
+    Season = forms.CharField(max_length=50)
+    State = forms.CharField(max_length=50)
+    Area = forms.FloatField(min_value=0)
+    Rainfall = forms.FloatField(min_value=0)
+    Fertilizer = forms.FloatField(min_value=0)
+    Pesticide = forms.FloatField(min_value=0)
+
+
+class YieldCubeQueryForm(forms.Form):
+    """Comma-separated lists for `by`, `measures` and each dimension filter."""
+    by = forms.CharField(required=False)
+    measures = forms.CharField(required=False)
+    Crop = forms.CharField(required=False)
+    Season = forms.CharField(required=False)
+    State = forms.CharField(required=False)
+    Crop_Year = forms.CharField(required=False)
+    year_from = forms.IntegerField(required=False, min_value=1900, max_value=2100)
+    year_to = forms.IntegerField(required=False, min_value=1900, max_value=2100)
+
+    def clean(self):
+        data = super().clean()
+        for field in ('by', 'measures', 'Crop', 'Season', 'State', 'Crop_Year'):
+            data[field] = [v.strip() for v in (data.get(field) or '').split(',') if v.strip()]
+        try:
+            data['Crop_Year'] = [int(v) for v in data['Crop_Year']]
+        except ValueError:
+            self.add_error('Crop_Year', 'Enter comma-separated years, e.g. 2019,2020.')
+        return data
@@ -0,0 +1,19 @@
+import os
+
+from django.core.management.base import BaseCommand
+
+from ...cube import CUBE_PATH, DIMENSIONS, SOURCE_PATH, build_cube
+
+
+class Command(BaseCommand):
+    help = "Pre-aggregate crop_yield.csv into the Crop x Season x State x Crop_Year cube (.npz)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--source', default=SOURCE_PATH)
+        parser.add_argument('--output', default=CUBE_PATH)
+
+    def handle(self, *args, **options):
+        cells, rows = build_cube(options['source'], options['output'])
+        size_kb = os.path.getsize(options['output']) / 1024
+        self.stdout.write(self.style.SUCCESS(f"{rows} rows -> {cells} cells across all {' x '.join(DIMENSIONS)} roll-ups, "
+            f"{size_kb:.0f} KB at {options['output']}"))
@@ -0,0 +1,34 @@
+import joblib
+import numpy as np
+import pandas as pd
+from django.core.management.base import BaseCommand
+
+from ...predictor import DATA_PATH, MODEL_PATH, encode_frame
+
+
+class Command(BaseCommand):
+    help = "Train the Random Forest yield model on yield/model/crop_data.csv and save yield_model.pkl."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--trees', type=int, default=100)
+        parser.add_argument('--max-depth', type=int, default=None)
+        parser.add_argument('--output', default=MODEL_PATH)
+
+    def handle(self, *args, **options):
+        from sklearn.ensemble import RandomForestRegressor
+        from sklearn.metrics import r2_score
+
+        df = pd.read_csv(DATA_PATH)
+        X = encode_frame(df)
+        y = df['Yield'].to_numpy(dtype=np.float64)
+
+        rng = np.random.default_rng(42)
+        test = rng.random(len(df)) < 0.2
+        model = RandomForestRegressor(n_estimators=options['trees'], max_depth=options['max_depth'],
+                                      random_state=42, n_jobs=-1)
+        model.fit(X[~test], y[~test])
+        self.stdout.write(f"holdout R^2: {r2_score(y[test], model.predict(X[test])):.3f}")
+
+        model.fit(X, y)
+        joblib.dump(model, options['output'], compress=3)
+        self.stdout.write(self.style.SUCCESS(f"Saved {options['output']}"))
@@ -0,0 +1,100 @@
+# yield/predictor.py
+"""
+Crop yield estimation.
+
+The sklearn LabelEncoders shipped in yield/model were fitted on ordinal
+codes of the sorted Crop/Season/State names, so at load time they are turned
+into plain {normalized name: code} dicts; encoding a request is then a dict
+lookup instead of a per-call sklearn transform. Season values in the data are
+space-padded (``"Kharif     "``); names are normalized once when the tables
+are built and once per incoming value.
+"""
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+from django.conf import settings
+
+from myapp.registry import registry
+
+MODEL_DIR = os.path.join(settings.BASE_DIR, 'yield', 'model')
+DATA_PATH = os.path.join(MODEL_DIR, 'crop_data.csv')
+MODEL_PATH = os.path.join(MODEL_DIR, 'yield_model.pkl')
+ENCODER_FILES = {
+    'Crop': 'crop_encoder.pkl',
+    'Season': 'season_encoder.pkl',
+    'State': 'state_encoder.pkl',
+}
+CATEGORICAL = tuple(ENCODER_FILES)
+NUMERIC = ('Area', 'Annual_Rainfall', 'Fertilizer', 'Pesticide')
+FEATURES = CATEGORICAL + NUMERIC
+
+
+def clean(value) -> str:
+    """Collapse padding/inner whitespace and case: ' Whole  Year ' -> 'whole year'."""
+    return ' '.join(str(value).split()).lower()
+
+
+def build_lookup_tables(data_path=DATA_PATH):
+    """{column: {normalized name: encoded value}} from the training data and encoders."""
+    df = pd.read_csv(data_path, usecols=list(CATEGORICAL))
+    tables = {}
+    for col, filename in ENCODER_FILES.items():
+        labels = sorted(df[col].astype(str).unique())  # LabelEncoder order of the raw strings
+        encoder = joblib.load(os.path.join(MODEL_DIR, filename))
+        if len(encoder.classes_) != len(labels):
+            raise ValueError(f"{filename} has {len(encoder.classes_)} classes, data has {len(labels)} {col} values")
+        codes = encoder.transform(np.arange(len(labels)))
+        tables[col] = {clean(label): int(code) for label, code in zip(labels, codes)}
+    return tables
+
+
+def _load_model(path=MODEL_PATH):
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"{path} not found; run `manage.py train_yield_model` first")
+    return joblib.load(path)
+
+
+registry.register('yield_lookup_tables', build_lookup_tables)
+registry.register('yield_model', _load_model)
+
+
+def encode_frame(df: pd.DataFrame) -> np.ndarray:
+    """Vectorized encoding of a DataFrame with FEATURES columns; raises ValueError on unknown names."""
+    tables = registry.get('yield_lookup_tables')
+    X = np.empty((len(df), len(FEATURES)), dtype=np.float64)
+    for i, col in enumerate(CATEGORICAL):
+        codes = df[col].map(clean).map(tables[col])
+        if codes.isna().any():
+            unknown = sorted(set(df.loc[codes.isna(), col].astype(str).str.strip()))
+            raise ValueError(f"Unknown {col}: {', '.join(unknown[:5])}")
+        X[:, i] = codes.to_numpy()
+    for i, col in enumerate(NUMERIC, start=len(CATEGORICAL)):
+        X[:, i] = df[col].to_numpy(dtype=np.float64)
+    return X
+
+
+def encode_rows(rows) -> np.ndarray:
+    """Encode a list of dicts keyed by FEATURES with plain dict lookups."""
+    tables = registry.get('yield_lookup_tables')
+    X = np.empty((len(rows), len(FEATURES)), dtype=np.float64)
+    for r, row in enumerate(rows):
+        for i, col in enumerate(CATEGORICAL):
+            code = tables[col].get(clean(row[col]))
+            if code is None:
+                raise ValueError(f"Unknown {col}: {str(row[col]).strip()}")
+            X[r, i] = code
+        for i, col in enumerate(NUMERIC, start=len(CATEGORICAL)):
+            X[r, i] = row[col]
+    return X
+
+
+def predict_rows(rows) -> np.ndarray:
+    """Predicted yield for each input row, in one model call."""
+    return registry.get('yield_model').predict(encode_rows(rows))
+
+
+def known_values():
+    """Accepted names per categorical column (for API error messages / forms)."""
+    return {col: sorted(table) for col, table in registry.get('yield_lookup_tables').items()}
@@ -0,0 +1,130 @@
+import os
+import tempfile
+
+import joblib
+import numpy as np
+import pandas as pd
+from django.test import SimpleTestCase
+
+from . import predictor
+from .cube import MEASURES, YieldCube, build_cube
+from .forms import YieldCubeQueryForm
+
+
+class YieldCubeQueryFormTests(SimpleTestCase):
+    def test_lists_are_split(self):
+        form = YieldCubeQueryForm({'by': 'Crop, State', 'Crop': 'Rice,,Wheat ', 'Crop_Year': '2019, 2020'})
+        self.assertTrue(form.is_valid())
+        self.assertEqual(form.cleaned_data['by'], ['Crop', 'State'])
+        self.assertEqual(form.cleaned_data['Crop'], ['Rice', 'Wheat'])
+        self.assertEqual(form.cleaned_data['Crop_Year'], [2019, 2020])
+
+    def test_crop_year_must_be_integers(self):
+        form = YieldCubeQueryForm({'Crop_Year': '2019,abc'})
+        self.assertFalse(form.is_valid())
+        self.assertIn('Crop_Year', form.errors)
+
+    def test_bad_crop_year_is_a_400(self):
+        response = self.client.get('/yield/cube/', {'Crop_Year': 'abc'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Crop_Year', response.json()['errors'])
+
+
+class LookupTableTests(SimpleTestCase):
+    NUMBERS = {'Area': 120.0, 'Annual_Rainfall': 1100.0, 'Fertilizer': 5000.0, 'Pesticide': 30.0}
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.df = pd.read_csv(predictor.DATA_PATH, usecols=list(predictor.CATEGORICAL))
+        cls.tables = predictor.build_lookup_tables()
+        cls.encoders = {col: joblib.load(os.path.join(predictor.MODEL_DIR, filename))
+                        for col, filename in predictor.ENCODER_FILES.items()}
+
+    def encoder_code(self, col, name):
+        """How the shipped LabelEncoder encodes a raw name: by its index among the sorted names."""
+        labels = sorted(self.df[col].astype(str).unique())
+        return int(self.encoders[col].transform([labels.index(name)])[0])
+
+    def test_tables_match_fitted_encoders(self):
+        for col in predictor.CATEGORICAL:
+            for name in self.df[col].astype(str).unique():
+                with self.subTest(col=col, name=name):
+                    self.assertEqual(self.tables[col][predictor.clean(name)], self.encoder_code(col, name))
+
+    def test_encode_rows_matches_encoders_and_encode_frame(self):
+        raw = self.df.sample(50, random_state=3).to_dict('records')
+        rows = [dict(row, **self.NUMBERS) for row in raw]
+        X = predictor.encode_rows(rows)
+        for r, row in enumerate(raw):
+            expected = [self.encoder_code(col, row[col]) for col in predictor.CATEGORICAL]
+            self.assertEqual(list(X[r, :3]), expected)
+        self.assertTrue((X[:, 3:] == list(self.NUMBERS.values())).all())
+        np.testing.assert_array_equal(X, predictor.encode_frame(pd.DataFrame(rows, columns=predictor.FEATURES)))
+
+    def test_spelling_variants_share_a_code(self):
+        self.assertEqual(self.tables['Season'][predictor.clean('Kharif     ')],
+                         self.tables['Season'][predictor.clean('  KHARIF')])
+        self.assertEqual(self.tables['Season'][predictor.clean('whole   year')],
+                         self.encoder_code('Season', 'Whole Year '))
+
+    def test_unknown_names_are_rejected(self):
+        row = dict(self.NUMBERS, Crop='Rice', Season='Kharif', State='Atlantis')
+        with self.assertRaisesMessage(ValueError, 'Unknown State: Atlantis'):
+            predictor.encode_rows([row])
+        with self.assertRaisesMessage(ValueError, 'Unknown State: Atlantis'):
+            predictor.encode_frame(pd.DataFrame([row], columns=predictor.FEATURES))
+
+
+class YieldCubeQueryTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        rng = np.random.default_rng(11)
+        n = 300
+        cls.df = pd.DataFrame({
+            'Crop': rng.choice(['Rice', 'Wheat', 'Maize'], n),
+            'Crop_Year': rng.integers(2000, 2005, n),
+            'Season': rng.choice(['Kharif     ', 'Rabi       ', 'Whole Year '], n),
+            'State': rng.choice(['Punjab', 'Bihar', 'Assam'], n),
+            **{m: rng.uniform(1, 1000, n).round(2) for m in MEASURES},
+        })
+        with tempfile.TemporaryDirectory() as tmp:
+            source, output = os.path.join(tmp, 'yield.csv'), os.path.join(tmp, 'cube.npz')
+            cls.df.to_csv(source, index=False)
+            build_cube(source, output)
+            cls.cube = YieldCube.load(output)
+        cls.df['Season'] = cls.df['Season'].str.strip()
+
+    def assertMatchesGroupby(self, rows, frame, by):
+        expected = frame.groupby(by) if by else [((), frame)]
+        self.assertEqual(len(rows), len(expected))
+        got = {tuple(row[d] for d in by): row for row in rows}
+        for key, group in expected:
+            row = got[key if isinstance(key, tuple) else (key,)]
+            self.assertEqual(row['count'], len(group))
+            for m in MEASURES:
+                self.assertAlmostEqual(row[m]['sum'], group[m].sum(), places=3)
+                self.assertAlmostEqual(row[m]['mean'], group[m].mean(), places=5)
+
+    def test_crop_by_state(self):
+        self.assertMatchesGroupby(self.cube.query(by=['Crop', 'State']), self.df, ['Crop', 'State'])
+
+    def test_season_filter(self):
+        rows = self.cube.query(by=['Crop'], filters={'Season': ['kharif']})
+        self.assertMatchesGroupby(rows, self.df[self.df['Season'] == 'Kharif'], ['Crop'])
+
+    def test_year_range(self):
+        rows = self.cube.query(by=['State'], filters={'Crop': ['Rice']}, year_from=2001, year_to=2003)
+        frame = self.df[(self.df['Crop'] == 'Rice') & self.df['Crop_Year'].between(2001, 2003)]
+        self.assertMatchesGroupby(rows, frame, ['State'])
+
+    def test_year_list_and_grand_total(self):
+        rows = self.cube.query(filters={'Crop_Year': [2000, 2004], 'State': ['punjab', 'Assam']})
+        frame = self.df[self.df['Crop_Year'].isin([2000, 2004]) & self.df['State'].isin(['Punjab', 'Assam'])]
+        self.assertMatchesGroupby(rows, frame, [])
+
+    def test_measures_and_unknown_values(self):
+        rows = self.cube.query(by=['Season'], measures=['Yield'])
+        self.assertEqual(set(rows[0]), {'Season', 'count', 'Yield'})
+        self.assertEqual(self.cube.query(by=['Crop'], filters={'Crop': ['Cotton']}), [])
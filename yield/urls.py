@@ -0,0 +1,9 @@
+from django.urls import path
+from . import views
+
+app_name = 'yield'
+
+urlpatterns = [
+    path('predict/', views.yield_predict_view, name='yield_predict'),
+    path('cube/', views.yield_cube_view, name='yield_cube'),
+]
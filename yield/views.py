@@ -0,0 +1,85 @@
+import json
+
+from django.conf import settings
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+
+from myapp.registry import ModelLoadError, registry
+from . import predictor
+from .cube import DIMENSIONS, MEASURES
+from .forms import YieldCubeQueryForm, YieldPredictionForm
+
+
+# --- Yield estimation (single or batched rows) ---
+@csrf_exempt
+def yield_predict_view(request):
+    if request.method != 'POST':
+        return JsonResponse({'error': f'Method {request.method} not allowed.'}, status=405)
+
+    try:
+        payload = json.loads(request.body)
+    except json.JSONDecodeError:
+        return JsonResponse({'error': 'Invalid JSON format.'}, status=400)
+
+    batched = isinstance(payload, list) or (isinstance(payload, dict) and 'items' in payload)
+    items = payload.get('items') if isinstance(payload, dict) and batched else payload
+    items = items if batched else [items]
+    if not isinstance(items, list) or not items or not all(isinstance(i, dict) for i in items):
+        return JsonResponse({'error': 'Send one input object, a list, or {"items": [...]}.'}, status=400)
+    max_batch = getattr(settings, 'YIELD_PREDICTION_MAX_BATCH', 5000)
+    if len(items) > max_batch:
+        return JsonResponse({'error': f'At most {max_batch} items per request.'}, status=400)
+
+    rows = []
+    for index, item in enumerate(items):
+        form = YieldPredictionForm(item)
+        if not form.is_valid():
+            return JsonResponse({'error': 'Invalid input.', 'index': index, 'errors': form.errors}, status=400)
+        row = form.cleaned_data
+        row['Annual_Rainfall'] = row.pop('Rainfall')
+        rows.append(row)
+
+    try:
+        yields = predictor.predict_rows(rows)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    except ModelLoadError:
+        return JsonResponse({'error': 'Yield model not loaded. Check server logs.'}, status=503)
+
+    results = [
+        {'predicted_yield': round(float(y), 4), 'estimated_production': round(float(y) * row['Area'], 2)}
+        for y, row in zip(yields, rows)
+    ]
+    return JsonResponse({'predictions': results} if batched else results[0])
+
+
+# --- Yield analytics (served from the pre-aggregated cube) ---
+def yield_cube_view(request):
+    if request.method != 'GET':
+        return JsonResponse({'error': f'Method {request.method} not allowed.'}, status=405)
+
+    form = YieldCubeQueryForm(request.GET)
+    if not form.is_valid():
+        return JsonResponse({'errors': form.errors}, status=400)
+    data = form.cleaned_data
+
+    unknown = [d for d in data['by'] if d not in DIMENSIONS] + [m for m in data['measures'] if m not in MEASURES]
+    if unknown:
+        return JsonResponse({
+            'error': f"Unknown dimension/measure: {', '.join(unknown)}",
+            'dimensions': DIMENSIONS,
+            'measures': MEASURES,
+        }, status=400)
+
+    try:
+        cube = registry.get('yield_cube')
+    except ModelLoadError:
+        return JsonResponse({'error': 'Yield cube not built. Check server logs.'}, status=503)
+
+    filters = {dim: data[dim] for dim in DIMENSIONS if data[dim]}
+    try:
+        rows = cube.query(by=data['by'], filters=filters, year_from=data['year_from'],
+                          year_to=data['year_to'], measures=data['measures'] or None)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    return JsonResponse({'by': data['by'], 'filters': filters, 'groups': rows})